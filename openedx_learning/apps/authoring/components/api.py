@@ -212,32 +212,38 @@ def create_next_component_version(
     TODO: Have to add learning_downloadable info to this when it comes time to
           support static asset download.
     """
-    # This needs to grab the highest version_num for this Publishable Entity.
-    # This will often be the Draft version, but not always. For instance, if
-    # an entity was soft-deleted, the draft would be None, but the version_num
-    # should pick up from the last edited version. Likewise, a Draft might get
-    # reverted to an earlier version, but we want the latest version_num when
-    # creating the next version.
-    component = Component.objects.get(pk=component_pk)
-    last_version = component.versioning.latest
-    if last_version is None:
-        next_version_num = 1
-        title = title or ""
-    else:
-        next_version_num = last_version.version_num + 1
-        if title is None:
+    with atomic():
+        component = Component.objects.get(pk=component_pk)
+
+        # The next version_num picks up from the highest version_num for this
+        # Publishable Entity. This will often be the Draft version, but not
+        # always. For instance, if an entity was soft-deleted, the draft would be
+        # None, but the version_num should pick up from the last edited version.
+        # Likewise, a Draft might get reverted to an earlier version, but we want
+        # the latest version_num when creating the next version. Reserving it
+        # also makes concurrent edits of this component wait for us to finish.
+        if force_version_num is None:
+            next_version_num = publishing_api.reserve_next_version_nums([component_pk])[component_pk]
+            last_version_num = next_version_num - 1
+        else:
+            next_version_num = force_version_num
+            last_version_num = component.publishable_entity.latest_version_num
+
+        last_version = component.versioning.versions.filter(
+            publishable_entity_version__version_num=last_version_num,
+        ).first()
+        if last_version is None:
+            title = title or ""
+        elif title is None:
             title = last_version.title
 
-    if force_version_num is not None:
-        next_version_num = force_version_num
-
-    with atomic():
         publishable_entity_version = publishing_api.create_publishable_entity_version(
             component_pk,
             version_num=next_version_num,
             title=title,
             created=created,
             created_by=created_by,
+            version_num_reserved=force_version_num is None,
         )
         component_version = ComponentVersion.objects.create(
             publishable_entity_version=publishable_entity_version,
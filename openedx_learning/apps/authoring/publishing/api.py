@@ -10,10 +10,25 @@ from contextlib import nullcontext
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from enum import Enum
-from typing import ContextManager, Optional, TypeVar
+from typing import ContextManager, Iterable, Optional, Sequence, TypeVar
 
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
-from django.db.models import F, Prefetch, Q, QuerySet
+from django.db import connection
+from django.db.models import (
+    BooleanField,
+    Case,
+    Count,
+    F,
+    IntegerField,
+    OuterRef,
+    Prefetch,
+    Q,
+    QuerySet,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
 from django.db.transaction import atomic
 
 from openedx_learning.lib.fields import create_hash_digest
@@ -21,6 +36,7 @@ from openedx_learning.lib.fields import create_hash_digest
 from .contextmanagers import DraftChangeLogContext
 from .models import (
     Container,
+    ContainerTypeRegistry,
     ContainerVersion,
     Draft,
     DraftChangeLog,
@@ -60,6 +76,7 @@ __all__ = [
     "learning_package_exists",
     "create_publishable_entity",
     "create_publishable_entity_version",
+    "reserve_next_version_nums",
     "get_publishable_entity",
     "get_publishable_entity_by_key",
     "get_publishable_entities",
@@ -75,11 +92,13 @@ __all__ = [
     "soft_delete_draft",
     "reset_drafts_to_published",
     "register_publishable_models",
+    "register_container_type",
     "filter_publishable_entities",
     # 🛑 UNSTABLE: All APIs related to containers are unstable until we've figured
     #              out our approach to dynamic content (randomized, A/B tests, etc.)
     "create_container",
     "create_container_version",
+    "create_container_and_version",
     "create_next_container_version",
     "get_container",
     "get_container_by_key",
@@ -88,12 +107,20 @@ __all__ = [
     "ChildrenEntitiesAction",
     "ContainerEntityListEntry",
     "ContainerEntityRow",
+    "get_entity_rows_for_children",
     "get_entities_in_container",
+    "get_entities_in_containers",
+    "get_entities_in_published_container_as_of",
     "contains_unpublished_changes",
+    "contains_unpublished_changes_bulk",
+    "annotate_unpublished_changes",
     "get_containers_with_entity",
     "get_container_children_count",
+    "get_container_children_count_bulk",
+    "annotate_container_children_count",
     "bulk_draft_changes_for",
     "get_container_children_entities_keys",
+    "get_container_children_entities_keys_bulk",
 ]
 
 
@@ -219,12 +246,17 @@ def create_publishable_entity_version(
     created_by: int | None,
     *,
     dependencies: list[int] | None = None,  # PublishableEntity IDs
+    version_num_reserved: bool = False,
 ) -> PublishableEntityVersion:
     """
     Create a PublishableEntityVersion.
 
     You'd typically want to call this right before creating your own content
     version model that points to it.
+
+    Pass version_num_reserved=True if the version_num was reserved with
+    reserve_next_version_nums(), which already updated the entity's
+    latest_version_num. Otherwise, it's updated here if needed.
     """
     with atomic(savepoint=False):
         version = PublishableEntityVersion.objects.create(
@@ -234,6 +266,13 @@ def create_publishable_entity_version(
             created=created,
             created_by_id=created_by,
         )
+        if not version_num_reserved:
+            # Keep the denormalized latest_version_num counter in sync, since
+            # callers are allowed to pick version numbers explicitly.
+            PublishableEntity.objects.filter(
+                pk=entity_id,
+                latest_version_num__lt=version_num,
+            ).update(latest_version_num=version_num)
         if dependencies:
             set_version_dependencies(version.id, dependencies)
 
@@ -246,6 +285,36 @@ def create_publishable_entity_version(
     return version
 
 
+def reserve_next_version_nums(entity_ids: Iterable[int], /) -> dict[int, int]:
+    """
+    Reserve the next version number for each of the given PublishableEntities.
+
+    Returns a dict mapping each PublishableEntity ID to the version_num that
+    the caller should use for that entity's next PublishableEntityVersion.
+    Entities that don't exist are left out of the result.
+
+    This is an atomic increment of PublishableEntity.latest_version_num, done
+    in a single UPDATE for all the entities, so it doesn't matter how many
+    versions each entity already has. The UPDATE also locks those entity rows
+    until the end of the transaction, so concurrent callers that want a new
+    version of the same entity will wait for this transaction to finish and
+    then get the following number, instead of failing on the unique
+    (entity, version_num) constraint. That means you should call this inside
+    the same transaction that creates the new versions, and as late as you
+    reasonably can.
+    """
+    entity_ids = list(entity_ids)
+    with atomic(savepoint=False):
+        PublishableEntity.objects.filter(pk__in=entity_ids).update(
+            latest_version_num=F("latest_version_num") + 1,
+        )
+        return dict(
+            PublishableEntity.objects
+            .filter(pk__in=entity_ids)
+            .values_list("pk", "latest_version_num")
+        )
+
+
 def set_version_dependencies(
     version_id: int,  # PublishableEntityVersion.id,
     /,
@@ -1317,6 +1386,36 @@ def register_publishable_models(
     )
 
 
+def register_container_type(
+    container_cls: type[Container],
+    child_model_classes: list[type[PublishableEntityMixin]],
+) -> None:
+    """
+    [ 🛑 UNSTABLE ]
+    Register what content models can be the children of a Container type.
+
+    Registered container types get their children validated and converted to
+    ContainerEntityRows by `get_entity_rows_for_children()`, and the content
+    versions of their children (e.g. ComponentVersions in a Unit) preloaded in
+    bulk by `get_entities_in_container()` and `get_entities_in_containers()`.
+
+    Like `register_publishable_models()`, this should only be run from your
+    app's AppConfig.ready() method. For example, in the units app::
+
+        def ready(self):
+            from ..components.models import Component
+            from ..publishing.api import register_container_type, register_publishable_models
+            from .models import Unit, UnitVersion
+
+            register_publishable_models(Unit, UnitVersion)
+            register_container_type(Unit, [Component])
+
+    The child models must themselves be registered with
+    `register_publishable_models()`, but that may happen after this call.
+    """
+    ContainerTypeRegistry.register(container_cls, child_model_classes)
+
+
 def filter_publishable_entities(
     entities: QuerySet[PublishableEntity],
     has_draft=None,
@@ -1420,30 +1519,65 @@ def create_entity_list_with_rows(
     Returns:
         The newly created entity list.
     """
+    return create_entity_lists_bulk([entity_rows], learning_package_id=learning_package_id)[0]
+
+
+def create_entity_lists_bulk(
+    entity_rows_lists: list[list[ContainerEntityRow]],
+    *,
+    learning_package_id: int | None,
+) -> list[EntityList]:
+    """
+    [ 🛑 UNSTABLE ]
+    Create many new entity lists (with their rows) at once.
+
+    This is the batch version of `create_entity_list_with_rows()`, meant for
+    things like imports and restores that create many containers. No matter
+    how many lists are passed in, the validation is done with at most one query
+    per type of check, and the EntityList and EntityListRow records are
+    inserted with one ``bulk_create`` call each.
+
+    Args:
+        entity_rows_lists: A list of lists of ContainerEntityRows. Each inner
+            list specifies the publishable entity ID and version ID (if
+            pinned) of the rows of one new EntityList.
+        learning_package_id: Optional. Verify that all the entities are from
+            the specified learning package.
+
+    Returns:
+        The newly created entity lists, in the same order as entity_rows_lists.
+    """
+    all_entity_rows = [entity for entity_rows in entity_rows_lists for entity in entity_rows]
+
     # Do a quick check that the given entities are in the right learning package:
-    if learning_package_id:
+    if learning_package_id and all_entity_rows:
         if PublishableEntity.objects.filter(
-            pk__in=[entity.entity_pk for entity in entity_rows],
+            pk__in={entity.entity_pk for entity in all_entity_rows},
         ).exclude(
             learning_package_id=learning_package_id,
         ).exists():
             raise ValidationError("Container entities must be from the same learning package.")
 
     # Ensure that any pinned entity versions are linked to the correct entity
-    pinned_entities = {
-        entity.version_pk: entity.entity_pk
-        for entity in entity_rows if entity.pinned
-    }
+    pinned_entities: dict[int, set[int]] = {}
+    for entity in all_entity_rows:
+        if entity.version_pk is not None:
+            pinned_entities.setdefault(entity.version_pk, set()).add(entity.entity_pk)
     if pinned_entities:
         entity_versions = PublishableEntityVersion.objects.filter(
             pk__in=pinned_entities.keys(),
         ).only('pk', 'entity_id')
         for entity_version in entity_versions:
-            if pinned_entities[entity_version.pk] != entity_version.entity_id:
+            if pinned_entities[entity_version.pk] != {entity_version.entity_id}:
                 raise ValidationError("Container entity versions must belong to the specified entity.")
 
     with atomic(savepoint=False):
-        entity_list = create_entity_list()
+        if connection.features.can_return_rows_from_bulk_insert:
+            entity_lists = EntityList.objects.bulk_create([EntityList() for _ in entity_rows_lists])
+        else:
+            # Some backends (e.g. MySQL) can't give us the primary keys of
+            # bulk-inserted rows, and we need them to create the rows below.
+            entity_lists = [create_entity_list() for _ in entity_rows_lists]
         EntityListRow.objects.bulk_create(
             [
                 EntityListRow(
@@ -1452,10 +1586,11 @@ def create_entity_list_with_rows(
                     order_num=order_num,
                     entity_version_id=entity.version_pk,
                 )
+                for entity_list, entity_rows in zip(entity_lists, entity_rows_lists)
                 for order_num, entity in enumerate(entity_rows)
             ]
         )
-    return entity_list
+    return entity_lists
 
 
 def _create_container_version(
@@ -1467,6 +1602,7 @@ def _create_container_version(
     created: datetime,
     created_by: int | None,
     container_version_cls: type[ContainerVersionModel] = ContainerVersion,  # type: ignore[assignment]
+    version_num_reserved: bool = False,
 ) -> ContainerVersionModel:
     """
     Private internal method for logic shared by create_container_version() and
@@ -1484,7 +1620,8 @@ def _create_container_version(
                 entity_row.entity_id
                 for entity_row in entity_list.rows
                 if entity_row.is_unpinned()
-            ]
+            ],
+            version_num_reserved=version_num_reserved,
         )
         container_version = container_version_cls.objects.create(
             publishable_entity_version=publishable_entity_version,
@@ -1544,6 +1681,57 @@ def create_container_version(
     return container_version
 
 
+def create_container_and_version(
+    learning_package_id: int,
+    key: str,
+    *,
+    title: str,
+    entity_rows: list[ContainerEntityRow] | None,
+    created: datetime,
+    created_by: int | None,
+    can_stand_alone: bool = True,
+    container_cls: type[ContainerModel] = Container,  # type: ignore[assignment]
+    container_version_cls: type[ContainerVersionModel] = ContainerVersion,  # type: ignore[assignment]
+) -> tuple[ContainerModel, ContainerVersionModel]:
+    """
+    [ 🛑 UNSTABLE ]
+    Create a new container and its first version.
+
+    Args:
+        learning_package_id: The ID of the learning package that contains the container.
+        key: The key of the container.
+        title: The title of the container.
+        entity_rows: List of ContainerEntityRows specifying the publishable entity ID and version ID (if pinned).
+        created: The date and time the container was created.
+        created_by: The ID of the user who created the container.
+        can_stand_alone: Set to False when created as part of containers
+        container_cls: The subclass of Container to use, if applicable
+        container_version_cls: The subclass of ContainerVersion to use, if applicable.
+
+    Returns:
+        The newly created container and container version.
+    """
+    with atomic(savepoint=False):
+        container = create_container(
+            learning_package_id,
+            key,
+            created,
+            created_by,
+            can_stand_alone=can_stand_alone,
+            container_cls=container_cls,
+        )
+        container_version = create_container_version(
+            container.pk,
+            1,
+            title=title,
+            entity_rows=entity_rows or [],
+            created=created,
+            created_by=created_by,
+            container_version_cls=container_version_cls,
+        )
+    return container, container_version
+
+
 class ChildrenEntitiesAction(Enum):
     """Possible actions for children entities"""
 
@@ -1653,14 +1841,16 @@ def create_next_container_version(
     with atomic():
         container = Container.objects.select_related("publishable_entity").get(pk=container_pk)
         entity = container.publishable_entity
-        last_version = container.versioning.latest
-        if last_version is None:
-            next_version_num = 1
+        if force_version_num is None:
+            next_version_num = reserve_next_version_nums([container_pk])[container_pk]
+            last_version_num = next_version_num - 1
         else:
-            next_version_num = last_version.version_num + 1
-
-        if force_version_num is not None:
             next_version_num = force_version_num
+            last_version_num = entity.latest_version_num
+
+        last_version = container.versioning.versions.filter(
+            publishable_entity_version__version_num=last_version_num,
+        ).first()
 
         if entity_rows is None and last_version is not None:
             # We're only changing metadata. Keep the same entity list.
@@ -1681,6 +1871,7 @@ def create_next_container_version(
             created=created,
             created_by=created_by,
             container_version_cls=container_version_cls,
+            version_num_reserved=force_version_num is None,
         )
 
     return next_container_version
@@ -1789,6 +1980,76 @@ class ContainerEntityRow:
         return self.entity_pk and self.version_pk is not None
 
 
+def get_entity_rows_for_children(
+    container_cls: type[Container],
+    children: Sequence[PublishableEntityMixin | PublishableEntityVersionMixin] | None,
+) -> list[ContainerEntityRow] | None:
+    """
+    [ 🛑 UNSTABLE ]
+    Given a list of children for a container, return the list of
+    ContainerEntityRows needed for the base container APIs.
+
+    The children must be instances of the content models registered for
+    ``container_cls`` with `register_container_type()`, e.g. Components for a
+    Unit. A content model instance (e.g. Component) is added unpinned, and a
+    content version instance (e.g. ComponentVersion) is added pinned to that
+    version.
+
+    The entities of all pinned versions are looked up with one query per child
+    type, which also verifies that those versions still exist.
+
+    Args:
+        container_cls: The type of container the children are for, e.g. Unit.
+        children: The children. None means "don't change the entities in the
+            list", and is returned as-is.
+    """
+    if children is None:
+        # When these are None, that means don't change the entities in the list.
+        return None
+
+    child_model_classes = ContainerTypeRegistry.get_child_model_classes(container_cls)
+    child_version_classes = tuple(
+        PublishableContentModelRegistry.get_versioned_model_cls(child_model_cls)
+        for child_model_cls in child_model_classes
+    )
+    if not child_model_classes:
+        raise TypeError(f"{container_cls.__name__} is not a registered container type.")
+    allowed_classes = child_model_classes + child_version_classes
+    for child in children:
+        if not isinstance(child, allowed_classes):
+            children_name = " or ".join(
+                str(child_model_cls._meta.verbose_name_plural).lower() for child_model_cls in child_model_classes
+            )
+            allowed_names = " or ".join(cls.__name__ for cls in allowed_classes)
+            raise TypeError(f"{container_cls.__name__} {children_name} must be either {allowed_names}.")
+
+    # Find out which entities the pinned versions belong to:
+    entity_pk_for_version: dict[int, int] = {}
+    for child_model_cls, child_version_cls in zip(child_model_classes, child_version_classes):
+        version_pks = {child.pk for child in children if isinstance(child, child_version_cls)}
+        if not version_pks:
+            continue
+        found = dict(
+            child_version_cls.objects.filter(pk__in=version_pks).values_list(
+                "pk", "publishable_entity_version__entity_id",
+            )
+        )
+        if len(found) != len(version_pks):
+            raise child_model_cls.DoesNotExist(
+                f"{child_model_cls.__name__} versions do not exist: {sorted(version_pks - found.keys())}"
+            )
+        entity_pk_for_version.update(found)
+
+    return [
+        (
+            ContainerEntityRow(entity_pk=child.pk, version_pk=None)
+            if isinstance(child, child_model_classes)
+            else ContainerEntityRow(entity_pk=entity_pk_for_version[child.pk], version_pk=child.pk)
+        )
+        for child in children
+    ]
+
+
 def get_entities_in_container(
     container: Container,
     *,
@@ -1800,6 +2061,11 @@ def get_entities_in_container(
     Get the list of entities and their versions in the current draft or
     published version of the given container.
 
+    If the type of container was registered with `register_container_type()`,
+    the content versions of its children (e.g. ComponentVersion for a Unit)
+    are preloaded, so ``entry.entity_version.componentversion`` won't cause
+    any extra queries.
+
     Args:
         container: The Container, e.g. returned by `get_container()`
         published: `True` if we want the published version of the container, or
@@ -1809,40 +2075,151 @@ def get_entities_in_container(
         to preload via select_related.
     """
     assert isinstance(container, Container)
-    if published:
-        # Very minor optimization: reload the container with related 1:1 entities
-        container = Container.objects.select_related(
-            "publishable_entity__published__version__containerversion__entity_list").get(pk=container.pk)
-        container_version = container.versioning.published
-        select_related = ["entity__published__version"]
-        if select_related_version:
-            select_related.append(f"entity__published__version__{select_related_version}")
-    else:
-        # Very minor optimization: reload the container with related 1:1 entities
-        container = Container.objects.select_related(
-            "publishable_entity__draft__version__containerversion__entity_list").get(pk=container.pk)
-        container_version = container.versioning.draft
-        select_related = ["entity__draft__version"]
-        if select_related_version:
-            select_related.append(f"entity__draft__version__{select_related_version}")
-    if container_version is None:
+    entities = get_entities_in_containers(
+        [container],
+        published=published,
+        select_related_version=select_related_version,
+    )
+    if container.pk not in entities:
         raise ContainerVersion.DoesNotExist  # This container has not been published yet, or has been deleted.
-    assert isinstance(container_version, ContainerVersion)
-    entity_list: list[ContainerEntityListEntry] = []
-    for row in container_version.entity_list.entitylistrow_set.select_related(
-        "entity_version",
-        *select_related,
-    ).order_by("order_num"):
+    return entities[container.pk]
+
+
+def _child_version_paths(container_classes: set[type[Container]]) -> set[str]:
+    """
+    Get the select_related() paths from PublishableEntityVersion to the content
+    versions of the children of the given (registered) container types, e.g.
+    ``{"componentversion"}`` for Units.
+    """
+    return {
+        "__".join(PublishableContentModelRegistry.get_version_relation_path(
+            PublishableContentModelRegistry.get_versioned_model_cls(child_model_cls)
+        ))
+        for container_cls in container_classes
+        for child_model_cls in ContainerTypeRegistry.get_child_model_classes(container_cls)
+    }
+
+
+def get_entities_in_containers(
+    containers: list[ContainerModel],
+    *,
+    published: bool,
+    select_related_version: str | None = None,
+) -> dict[int, list[ContainerEntityListEntry]]:
+    """
+    [ 🛑 UNSTABLE ]
+    Get the list of entities and their versions in the current draft or
+    published version of each of the given containers.
+
+    This is the batch version of `get_entities_in_container()`. It uses the
+    same number of queries no matter how many containers are given. The
+    content versions of the children of every registered container type (see
+    `register_container_type()`) are preloaded in the same pass.
+
+    Args:
+        containers: The Containers (or Container subclasses like Units) to get
+            the children of.
+        published: `True` if we want the published versions of the containers,
+            or `False` for the draft versions.
+        select_related_version: An optional optimization; specify a relationship
+        on ContainerVersion, like `componentversion` or `containerversion__x`
+        to preload via select_related.
+
+    Returns:
+        A dict mapping each Container primary key to its list of entries.
+        Containers that have not been published yet (or have been deleted) are
+        omitted.
+    """
+    branch = "published" if published else "draft"
+    entity_list_ids = dict(
+        ContainerVersion.objects.filter(
+            **{f"publishable_entity_version__{branch}__entity_id__in": [container.pk for container in containers]},
+        ).values_list("container_id", "entity_list_id")
+    )
+
+    version_paths = _child_version_paths({type(container) for container in containers})
+    if select_related_version:
+        version_paths.add(select_related_version)
+    select_related = ["entity_version", f"entity__{branch}__version"]
+    for version_path in sorted(version_paths):
+        select_related.append(f"entity_version__{version_path}")
+        select_related.append(f"entity__{branch}__version__{version_path}")
+
+    entries_by_list: dict[int, list[ContainerEntityListEntry]] = {
+        entity_list_id: [] for entity_list_id in entity_list_ids.values()
+    }
+    for row in EntityListRow.objects.filter(
+        entity_list_id__in=entries_by_list.keys(),
+    ).select_related(*select_related).order_by("entity_list_id", "order_num"):
         entity_version = row.entity_version  # This will be set if pinned
         if not entity_version:  # If this entity is "unpinned", use the latest published/draft version:
             entity_version = row.entity.published.version if published else row.entity.draft.version
         if entity_version is not None:  # As long as this hasn't been soft-deleted:
-            entity_list.append(ContainerEntityListEntry(
+            entries_by_list[row.entity_list_id].append(ContainerEntityListEntry(
                 entity_version=entity_version,
                 pinned=row.entity_version is not None,
             ))
         # else we could indicate somehow a deleted item was here, e.g. by returning a ContainerEntityListEntry with
         # deleted=True, but we don't have a use case for that yet.
+
+    # Several containers may share one EntityList, so give each its own list.
+    return {
+        container_id: list(entries_by_list[entity_list_id])
+        for container_id, entity_list_id in entity_list_ids.items()
+    }
+
+
+def get_entities_in_published_container_as_of(
+    container: Container,
+    publish_log_id: int,
+) -> list[ContainerEntityListEntry] | None:
+    """
+    [ 🛑 UNSTABLE ]
+    Get the list of entities and their versions in the published version of the
+    given container as of the given PublishLog version (which is essentially a
+    version for the entire learning package).
+
+    Returns None if the container was not published as of the given PublishLog.
+
+    The versions of all unpinned children are looked up together, so this uses
+    the same number of queries no matter how many children the container has.
+    """
+    assert isinstance(container, Container)
+    container_pub_entity_version = get_published_version_as_of(container.publishable_entity_id, publish_log_id)
+    if container_pub_entity_version is None:
+        return None  # This container was not published as of the given PublishLog ID.
+    container_version = container_pub_entity_version.containerversion
+
+    version_paths = sorted(_child_version_paths({type(container)}))
+    rows = list(
+        container_version.entity_list.entitylistrow_set.select_related(
+            "entity_version",
+            *[f"entity_version__{version_path}" for version_path in version_paths],
+        ).annotate(
+            # For unpinned children, figure out what their latest published
+            # version was at that point in time:
+            version_as_of_id=Subquery(
+                PublishLogRecord.objects.filter(
+                    entity_id=OuterRef("entity_id"),
+                    publish_log_id__lte=publish_log_id,
+                ).order_by("-publish_log_id").values("new_version_id")[:1]
+            ),
+        ).order_by("order_num")
+    )
+    unpinned_version_ids = [row.version_as_of_id for row in rows if row.entity_version is None]
+    versions_as_of = PublishableEntityVersion.objects.select_related(*version_paths).in_bulk(
+        [version_id for version_id in unpinned_version_ids if version_id is not None]
+    ) if unpinned_version_ids else {}
+
+    entity_list = []
+    for row in rows:
+        if row.entity_version is not None:
+            entity_list.append(ContainerEntityListEntry(entity_version=row.entity_version, pinned=True))
+        elif row.version_as_of_id in versions_as_of:
+            entity_list.append(ContainerEntityListEntry(
+                entity_version=versions_as_of[row.version_as_of_id],
+                pinned=False,
+            ))
     return entity_list
 
 
@@ -1863,31 +2240,101 @@ def contains_unpublished_changes(container_id: int) -> bool:
     `has_unpublished_changes` will be `True`, but if you merely edit a component
     that's in the container, it will be `False`. This method will return `True`
     in either case.
+
+    If you need to check many containers at once, use
+    `contains_unpublished_changes_bulk()` or `annotate_unpublished_changes()`
+    instead of calling this in a loop.
+    """
+    container = annotate_unpublished_changes(Container.objects.filter(pk=container_id)).get()
+    return container.contains_unpublished_changes  # type: ignore[attr-defined]
+
+
+def contains_unpublished_changes_bulk(
+    containers: list[int] | QuerySet[ContainerModel],
+) -> dict[int, bool]:
     """
-    container = (
-        Container.objects
-                 .select_related('publishable_entity__draft__draft_log_record')
-                 .select_related('publishable_entity__published__publish_log_record')
-                 .get(pk=container_id)
+    [ 🛑 UNSTABLE ]
+    Check recursively if each of the given containers has unpublished changes.
+
+    This is the batch version of `contains_unpublished_changes()`, and it
+    answers for all of the containers with a single query.
+
+    Args:
+        containers: A list of Container primary keys, or a QuerySet of
+            Containers (or a Container subclass like Unit).
+
+    Returns:
+        A dict mapping each Container primary key to `True` if it or any of its
+        descendants have unpublished changes, `False` otherwise. IDs that don't
+        match any Container are omitted.
+    """
+    container_qset: QuerySet[Container]
+    if isinstance(containers, QuerySet):
+        container_qset = containers
+    else:
+        container_qset = Container.objects.filter(pk__in=containers)
+    return dict(
+        annotate_unpublished_changes(container_qset).values_list(
+            "pk", "contains_unpublished_changes",  # type: ignore[misc]
+        )
     )
-    if container.versioning.has_unpublished_changes:
-        return True
 
-    draft = container.publishable_entity.draft
-    published = container.publishable_entity.published
 
-    # Edge case: A container that was created and then immediately soft-deleted
-    # does not contain any unpublished changes.
-    if draft is None and published is None:
-        return False
+def annotate_unpublished_changes(containers: QuerySet[ContainerModel]) -> QuerySet[ContainerModel]:
+    """
+    [ 🛑 UNSTABLE ]
+    Annotate a QuerySet of Containers with ``contains_unpublished_changes``.
+
+    The annotation is computed in SQL, so it can be used to filter and sort
+    listings, e.g.::
 
-    # The dependencies_hash_digest captures the state of all descendants, so we
-    # can do this quick comparison instead of iterating through layers of
-    # containers.
-    draft_version_hash_digest = draft.log_record.dependencies_hash_digest
-    published_version_hash_digest = published.log_record.dependencies_hash_digest
+        annotate_unpublished_changes(get_containers(lp_id)).filter(
+            contains_unpublished_changes=True,
+        )
 
-    return draft_version_hash_digest != published_version_hash_digest
+    The rules are the same as for `contains_unpublished_changes()`:
+
+    * If the draft and published versions of the container itself differ, it
+      has unpublished changes.
+    * If it was never published or drafted (or was created and then
+      immediately soft-deleted), it has no unpublished changes.
+    * Otherwise, the dependencies_hash_digest of the draft and published log
+      records are compared. That hash captures the state of all descendants,
+      so we don't need to iterate through the layers of containers.
+    """
+    draft_version = "publishable_entity__draft__version"
+    published_version = "publishable_entity__published__version"
+    draft_hash = "publishable_entity__draft__draft_log_record__dependencies_hash_digest"
+    published_hash = "publishable_entity__published__publish_log_record__dependencies_hash_digest"
+
+    return containers.annotate(
+        contains_unpublished_changes=Case(
+            # Exactly one of draft/published points to a version:
+            When(
+                Q(**{f"{draft_version}__isnull": True}) & Q(**{f"{published_version}__isnull": False}),
+                then=Value(True),
+            ),
+            When(
+                Q(**{f"{draft_version}__isnull": False}) & Q(**{f"{published_version}__isnull": True}),
+                then=Value(True),
+            ),
+            # Both point to versions, but different ones:
+            When(
+                Q(**{f"{draft_version}__isnull": False}) & ~Q(**{draft_version: F(published_version)}),
+                then=Value(True),
+            ),
+            # Edge case: A container that was created and then immediately
+            # soft-deleted does not contain any unpublished changes.
+            When(
+                Q(publishable_entity__draft__isnull=True) | Q(publishable_entity__published__isnull=True),
+                then=Value(False),
+            ),
+            # Same version of the container itself, so check the descendants:
+            When(~Q(**{draft_hash: F(published_hash)}), then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        )
+    )
 
 
 def get_containers_with_entity(
@@ -1976,6 +2423,110 @@ def get_container_children_entities_keys(container_version: ContainerVersion) ->
     )
 
 
+def annotate_container_children_count(
+    containers: QuerySet[ContainerModel],
+    *,
+    published: bool,
+) -> QuerySet[ContainerModel]:
+    """
+    [ 🛑 UNSTABLE ]
+    Annotate a QuerySet of Containers with ``children_count``.
+
+    This is the batch version of `get_container_children_count()`: the count of
+    entities in the current draft or published version of each container,
+    excluding soft-deleted children, computed with a single grouped subquery.
+
+    Containers that have no draft (or published) version are annotated with
+    None, since `get_container_children_count()` would raise an exception for
+    them.
+
+    Args:
+        containers: A QuerySet of Containers (or a Container subclass like Unit).
+        published: `True` if we want the published version of the containers,
+            or `False` for the draft version.
+    """
+    branch = "published" if published else "draft"
+    children_count = EntityListRow.objects.filter(
+        entity_list_id=OuterRef(f"publishable_entity__{branch}__version__containerversion__entity_list_id"),
+        **{f"entity__{branch}__version__isnull": False},
+    ).order_by().values("entity_list_id").annotate(count=Count("pk")).values("count")
+
+    return containers.annotate(
+        children_count=Case(
+            When(**{f"publishable_entity__{branch}__version__isnull": True}, then=Value(None)),
+            default=Coalesce(Subquery(children_count), 0),
+            output_field=IntegerField(null=True),
+        )
+    )
+
+
+def get_container_children_count_bulk(
+    containers: list[int] | QuerySet[ContainerModel],
+    *,
+    published: bool,
+) -> dict[int, int | None]:
+    """
+    [ 🛑 UNSTABLE ]
+    Get the count of children in the current draft or published version of
+    many containers at once, using a single query.
+
+    Args:
+        containers: A list of Container primary keys, or a QuerySet of
+            Containers (or a Container subclass like Unit).
+        published: `True` if we want the published version of the containers,
+            or `False` for the draft version.
+
+    Returns:
+        A dict mapping each Container primary key to its count of children
+        (excluding soft-deleted children), or to None if the container has no
+        draft (or published) version. IDs that don't match any Container are
+        omitted.
+    """
+    container_qset: QuerySet[Container]
+    if isinstance(containers, QuerySet):
+        container_qset = containers
+    else:
+        container_qset = Container.objects.filter(pk__in=containers)
+    return dict(
+        annotate_container_children_count(container_qset, published=published).values_list(
+            "pk", "children_count",  # type: ignore[misc]
+        )
+    )
+
+
+def get_container_children_entities_keys_bulk(
+    container_versions: list[ContainerVersion],
+) -> dict[int, list[str]]:
+    """
+    [ 🛑 UNSTABLE ]
+    Fetch the ordered list of entity keys for many container versions at once.
+
+    This is the batch version of `get_container_children_entities_keys()`, and
+    it uses a single query no matter how many container versions are given.
+
+    Args:
+        container_versions: The ContainerVersions to fetch the entity keys for.
+    Returns:
+        A dict mapping each ContainerVersion primary key to the list of entity
+        keys of its children, in the order they appear in the container.
+    """
+    keys_by_entity_list: dict[int, list[str]] = {
+        container_version.entity_list_id: [] for container_version in container_versions
+    }
+    rows = EntityListRow.objects.filter(
+        entity_list_id__in=keys_by_entity_list.keys(),
+    ).values_list("entity_list_id", "entity__key").order_by("entity_list_id", "order_num")
+    for entity_list_id, entity_key in rows:
+        keys_by_entity_list[entity_list_id].append(entity_key)
+
+    # Several versions of the same container may share one EntityList, so make
+    # sure each of them gets its own copy of the list.
+    return {
+        container_version.pk: list(keys_by_entity_list[container_version.entity_list_id])
+        for container_version in container_versions
+    }
+
+
 def bulk_draft_changes_for(
     learning_package_id: int,
     changed_by: int | None = None,
@@ -0,0 +1,46 @@
+"""
+Add and backfill PublishableEntity.latest_version_num.
+
+This is a denormalized copy of the highest version_num of each entity's
+PublishableEntityVersions, so that we don't have to query the versions table to
+figure out what the next version number should be.
+"""
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_latest_version_nums(apps, schema_editor):
+    """
+    Set latest_version_num for all existing PublishableEntities.
+    """
+    PublishableEntity = apps.get_model("oel_publishing", "PublishableEntity")
+    PublishableEntityVersion = apps.get_model("oel_publishing", "PublishableEntityVersion")
+
+    max_version_num = (
+        PublishableEntityVersion.objects
+        .filter(entity_id=OuterRef("pk"))
+        .order_by()
+        .values("entity_id")
+        .annotate(max_version_num=Max("version_num"))
+        .values("max_version_num")
+    )
+    PublishableEntity.objects.update(
+        latest_version_num=Coalesce(Subquery(max_version_num), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oel_publishing', '0010_backfill_dependencies'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publishableentity',
+            name='latest_version_num',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_latest_version_nums, reverse_code=migrations.RunPython.noop),
+    ]
@@ -1,7 +1,9 @@
 """
 Container and ContainerVersion models
 """
-from django.core.exceptions import ValidationError
+from __future__ import annotations
+
+from django.core.exceptions import ImproperlyConfigured, ValidationError
 from django.db import models
 
 from .entity_list import EntityList
@@ -68,3 +70,47 @@ class ContainerVersion(PublishableEntityVersionMixin):
         super().clean()
         if self.container_id != self.publishable_entity_version.entity.container.pk:  # pylint: disable=no-member
             raise ValidationError("Inconsistent foreign keys to Container")
+
+
+class ContainerTypeRegistry:
+    """
+    This class tracks which content models can be the children of each type of
+    Container.
+
+    For example, Units hold Components, and Subsections hold Units. Knowing this
+    lets the generic container APIs validate children, and preload the right
+    content version models (e.g. ComponentVersion) for a whole list of
+    children at once, instead of each container app having to do its own
+    per-child lookups.
+    """
+
+    _container_to_children: dict[type[Container], tuple[type[PublishableEntityMixin], ...]] = {}
+
+    @classmethod
+    def register(
+        cls,
+        container_cls: type[Container],
+        child_model_classes: list[type[PublishableEntityMixin]],
+    ):
+        """
+        Register what content models can be the children of a Container type.
+
+        If you want to call this from another app, please use the
+        ``register_container_type`` function in this app's ``api`` module
+        instead.
+        """
+        if not issubclass(container_cls, Container):
+            raise ImproperlyConfigured(f"{container_cls} must inherit from Container")
+        for child_model_cls in child_model_classes:
+            if not issubclass(child_model_cls, PublishableEntityMixin):
+                raise ImproperlyConfigured(f"{child_model_cls} must inherit from PublishableEntityMixin")
+
+        cls._container_to_children[container_cls] = tuple(child_model_classes)
+
+    @classmethod
+    def get_child_model_classes(cls, container_cls: type[Container]) -> tuple[type[PublishableEntityMixin], ...]:
+        """
+        Get the content models that can be children of the given Container
+        type, or an empty tuple if it was never registered.
+        """
+        return cls._container_to_children.get(container_cls, ())
@@ -134,6 +134,16 @@ class PublishableEntity(models.Model):
         help_text=_("Set to True when created independently, False when created as part of a container."),
     )
 
+    # The highest PublishableEntityVersion.version_num created for this entity
+    # so far (0 if there are no versions yet). This is denormalized so that
+    # creating the next version doesn't require an ordered query over all the
+    # versions, and so that the next version number can be reserved with an
+    # atomic increment (see the publishing API's reserve_next_version_nums).
+    # This locks the row for the rest of the transaction, which makes
+    # concurrent editors of the same entity wait their turn instead of
+    # colliding on the unique (entity, version_num) constraint.
+    latest_version_num = models.PositiveIntegerField(default=0, editable=False)
+
     class Meta:
         constraints = [
             # Keys are unique within a given LearningPackage.
@@ -429,28 +439,10 @@ class PublishableEntityMixin(models.Model):
             self.content_version_model_cls = PublishableContentModelRegistry.get_versioned_model_cls(
                 type(content_obj)
             )
-            # Get the field that points from the *versioned* content model
-            # (e.g. ComponentVersion) to the PublishableEntityVersion.
-            field_to_pev = self.content_version_model_cls._meta.get_field(
-                "publishable_entity_version"
+            # Example: self.related_name = "containerversion.unitversion"
+            self.related_name = ".".join(
+                PublishableContentModelRegistry.get_version_relation_path(self.content_version_model_cls)
             )
-            # Now that we know the field that leads to PublishableEntityVersion,
-            # get the reverse related field name so that we can use that later.
-            self.related_name = field_to_pev.related_query_name()
-
-            if field_to_pev.model != self.content_version_model_cls:
-                # In the case of multi-table inheritance and mixins, this can get tricky.
-                # Example:
-                #   content_version_model_cls is UnitVersion, which is a subclass of ContainerVersion
-                # This versioning helper can be accessed via unit_version.versioning (should return UnitVersion) or
-                # via container_version.versioning (should return ContainerVersion)
-                intermediate_model = field_to_pev.model  # example: ContainerVersion
-                # This is the field on the subclass (e.g. UnitVersion) that gets
-                # the intermediate (e.g. ContainerVersion). Example: "UnitVersion.container_version" (1:1 foreign key)
-                field_to_intermediate = self.content_version_model_cls._meta.get_ancestor_link(intermediate_model)
-                if field_to_intermediate:
-                    # Example: self.related_name = "containerversion.unitversion"
-                    self.related_name = self.related_name + "." + field_to_intermediate.related_query_name()
 
         def _content_obj_version(self, pub_ent_version: PublishableEntityVersion | None):
             """
@@ -683,3 +675,37 @@ class PublishableContentModelRegistry:
     @classmethod
     def get_unversioned_model_cls(cls, content_version_model_cls):
         return cls._versioned_to_unversioned[content_version_model_cls]
+
+    @classmethod
+    def get_version_relation_path(
+        cls,
+        content_version_model_cls: type[PublishableEntityVersionMixin],
+    ) -> list[str]:
+        """
+        Get the chain of reverse relations from PublishableEntityVersion to
+        the given content version model.
+
+        For example, this is ``["componentversion"]`` for ComponentVersion, and
+        ``["containerversion", "unitversion"]`` for UnitVersion. Join it with
+        ``"__"`` to get a path for ``select_related()``.
+        """
+        # Get the field that points from the *versioned* content model
+        # (e.g. ComponentVersion) to the PublishableEntityVersion.
+        field_to_pev = content_version_model_cls._meta.get_field("publishable_entity_version")
+        # Now that we know the field that leads to PublishableEntityVersion,
+        # get the reverse related field name.
+        path = [field_to_pev.related_query_name()]
+
+        if field_to_pev.model != content_version_model_cls:
+            # In the case of multi-table inheritance and mixins, this can get tricky.
+            # Example:
+            #   content_version_model_cls is UnitVersion, which is a subclass of ContainerVersion
+            # The versioning helper can be accessed via unit_version.versioning (should return UnitVersion) or
+            # via container_version.versioning (should return ContainerVersion)
+            intermediate_model = field_to_pev.model  # example: ContainerVersion
+            # This is the field on the subclass (e.g. UnitVersion) that gets
+            # the intermediate (e.g. ContainerVersion). Example: "UnitVersion.container_version" (1:1 foreign key)
+            field_to_intermediate = content_version_model_cls._meta.get_ancestor_link(intermediate_model)
+            if field_to_intermediate:
+                path.append(field_to_intermediate.related_query_name())
+        return path
@@ -5,8 +5,6 @@ This module provides functions to manage sections.
 from dataclasses import dataclass
 from datetime import datetime
 
-from django.db.transaction import atomic
-
 from openedx_learning.apps.authoring.subsections.models import Subsection, SubsectionVersion
 
 from ..publishing import api as publishing_api
@@ -91,38 +89,6 @@ def create_section_version(
     )
 
 
-def _pub_entities_for_subsections(
-    subsections: list[Subsection | SubsectionVersion] | None,
-) -> list[publishing_api.ContainerEntityRow] | None:
-    """
-    Helper method: given a list of Subsection | SubsectionVersion, return the
-    lists of publishable_entities_pks and entity_version_pks needed for the
-    base container APIs.
-
-    SubsectionVersion is passed when we want to pin a specific version, otherwise
-    Subsection is used for unpinned.
-    """
-    if subsections is None:
-        # When these are None, that means don't change the entities in the list.
-        return None
-    for u in subsections:
-        if not isinstance(u, (Subsection, SubsectionVersion)):
-            raise TypeError("Section subsections must be either Subsection or SubsectionVersion.")
-    return [
-        (
-            publishing_api.ContainerEntityRow(
-                entity_pk=s.container.publishable_entity_id,
-                version_pk=None,
-            ) if isinstance(s, Subsection)
-            else publishing_api.ContainerEntityRow(
-                entity_pk=s.subsection.container.publishable_entity_id,
-                version_pk=s.container_version.publishable_entity_version_id,
-            )
-        )
-        for s in subsections
-    ]
-
-
 def create_next_section_version(
     section: Section,
     *,
@@ -159,7 +125,7 @@ def create_next_section_version(
     Why not use create_component_version?
         The main reason is that we want to reuse the logic for adding entities to this container.
     """
-    entity_rows = _pub_entities_for_subsections(subsections)
+    entity_rows = publishing_api.get_entity_rows_for_children(Section, subsections)
     section_version = publishing_api.create_next_container_version(
         section.pk,
         title=title,
@@ -193,24 +159,17 @@ def create_section_and_version(
         created_by: The user who created the section.
         can_stand_alone: Set to False when created as part of containers
     """
-    entity_rows = _pub_entities_for_subsections(subsections)
-    with atomic():
-        section = create_section(
-            learning_package_id,
-            key,
-            created,
-            created_by,
-            can_stand_alone=can_stand_alone,
-        )
-        section_version = create_section_version(
-            section,
-            1,
-            title=title,
-            entity_rows=entity_rows or [],
-            created=created,
-            created_by=created_by,
-        )
-    return section, section_version
+    return publishing_api.create_container_and_version(
+        learning_package_id,
+        key,
+        title=title,
+        entity_rows=publishing_api.get_entity_rows_for_children(Section, subsections),
+        created=created,
+        created_by=created_by,
+        can_stand_alone=can_stand_alone,
+        container_cls=Section,
+        container_version_cls=SectionVersion,
+    )
 
 
 def get_section(section_pk: int) -> Section:
@@ -257,6 +216,18 @@ class SectionListEntry:
         return self.subsection_version.subsection
 
 
+def _section_list_entry(entry: publishing_api.ContainerEntityListEntry) -> SectionListEntry:
+    """
+    Convert from a generic ContainerEntityListEntry to a SectionListEntry.
+
+    The SubsectionVersion is preloaded by the publishing API, because Sections are
+    registered as holding Subsections (see apps.py).
+    """
+    subsection_version = entry.entity_version.containerversion.subsectionversion
+    assert isinstance(subsection_version, SubsectionVersion)
+    return SectionListEntry(subsection_version=subsection_version, pinned=entry.pinned)
+
+
 def get_subsections_in_section(
     section: Section,
     *,
@@ -273,18 +244,8 @@ def get_subsections_in_section(
             `False` for the draft version.
     """
     assert isinstance(section, Section)
-    subsections = []
-    entries = publishing_api.get_entities_in_container(
-        section,
-        published=published,
-        select_related_version="containerversion__subsectionversion",
-    )
-    for entry in entries:
-        # Convert from generic PublishableEntityVersion to SubsectionVersion:
-        subsection_version = entry.entity_version.containerversion.subsectionversion
-        assert isinstance(subsection_version, SubsectionVersion)
-        subsections.append(SectionListEntry(subsection_version=subsection_version, pinned=entry.pinned))
-    return subsections
+    entries = publishing_api.get_entities_in_container(section, published=published)
+    return [_section_list_entry(entry) for entry in entries]
 
 
 def get_subsections_in_published_section_as_of(
@@ -300,32 +261,11 @@ def get_subsections_in_published_section_as_of(
     TODO: This API should be updated to also return the SectionVersion so we can
           see the section title and any other metadata from that point in time.
     TODO: accept a publish log UUID, not just int ID?
-    TODO: move the implementation to be a generic 'containers' implementation
-          that this sections function merely wraps.
     TODO: optimize, perhaps by having the publishlog store a record of all
           ancestors of every modified PublishableEntity in the publish.
     """
     assert isinstance(section, Section)
-    section_pub_entity_version = publishing_api.get_published_version_as_of(
-        section.publishable_entity_id, publish_log_id
-    )
-    if section_pub_entity_version is None:
+    entries = publishing_api.get_entities_in_published_container_as_of(section, publish_log_id)
+    if entries is None:
         return None  # This section was not published as of the given PublishLog ID.
-    container_version = section_pub_entity_version.containerversion
-
-    entity_list = []
-    rows = container_version.entity_list.entitylistrow_set.order_by("order_num")
-    for row in rows:
-        if row.entity_version is not None:
-            subsection_version = row.entity_version.containerversion.subsectionversion
-            assert isinstance(subsection_version, SubsectionVersion)
-            entity_list.append(SectionListEntry(subsection_version=subsection_version, pinned=True))
-        else:
-            # Unpinned subsection - figure out what its latest published version was.
-            # This is not optimized. It could be done in one query per section rather than one query per subsection.
-            pub_entity_version = publishing_api.get_published_version_as_of(row.entity_id, publish_log_id)
-            if pub_entity_version:
-                entity_list.append(SectionListEntry(
-                    subsection_version=pub_entity_version.containerversion.subsectionversion, pinned=False
-                ))
-    return entity_list
+    return [_section_list_entry(entry) for entry in entries]
@@ -17,9 +17,14 @@ class SectionsConfig(AppConfig):
 
     def ready(self):
         """
-        Register Section and SectionVersion.
+        Register Section and SectionVersion, and the type of children Sections hold.
         """
-        from ..publishing.api import register_publishable_models  # pylint: disable=import-outside-toplevel
+        from ..publishing.api import (  # pylint: disable=import-outside-toplevel
+            register_container_type,
+            register_publishable_models,
+        )
+        from ..subsections.models import Subsection  # pylint: disable=import-outside-toplevel
         from .models import Section, SectionVersion  # pylint: disable=import-outside-toplevel
 
         register_publishable_models(Section, SectionVersion)
+        register_container_type(Section, [Subsection])
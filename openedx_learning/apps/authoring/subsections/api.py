@@ -5,8 +5,6 @@ This module provides functions to manage subsections.
 from dataclasses import dataclass
 from datetime import datetime
 
-from django.db.transaction import atomic
-
 from openedx_learning.apps.authoring.units.models import Unit, UnitVersion
 
 from ..publishing import api as publishing_api
@@ -91,37 +89,6 @@ def create_subsection_version(
     )
 
 
-def _pub_entities_for_units(
-    units: list[Unit | UnitVersion] | None,
-) -> list[publishing_api.ContainerEntityRow] | None:
-    """
-    Helper method: given a list of Unit | UnitVersion, return the
-    list of ContainerEntityRows needed for the base container APIs.
-
-    UnitVersion is passed when we want to pin a specific version, otherwise
-    Unit is used for unpinned.
-    """
-    if units is None:
-        # When these are None, that means don't change the entities in the list.
-        return None
-    for u in units:
-        if not isinstance(u, (Unit, UnitVersion)):
-            raise TypeError("Subsection units must be either Unit or UnitVersion.")
-    return [
-        (
-            publishing_api.ContainerEntityRow(
-                entity_pk=u.container.publishable_entity_id,
-                version_pk=None,
-            ) if isinstance(u, Unit)
-            else publishing_api.ContainerEntityRow(
-                entity_pk=u.unit.container.publishable_entity_id,
-                version_pk=u.container_version.publishable_entity_version_id,
-            )
-        )
-        for u in units
-    ]
-
-
 def create_next_subsection_version(
     subsection: Subsection,
     *,
@@ -158,7 +125,7 @@ def create_next_subsection_version(
     Why not use create_component_version?
         The main reason is that we want to reuse the logic for adding entities to this container.
     """
-    entity_rows = _pub_entities_for_units(units)
+    entity_rows = publishing_api.get_entity_rows_for_children(Subsection, units)
     subsection_version = publishing_api.create_next_container_version(
         subsection.pk,
         title=title,
@@ -192,24 +159,17 @@ def create_subsection_and_version(
         created_by: The user who created the subsection.
         can_stand_alone: Set to False when created as part of containers
     """
-    entity_rows = _pub_entities_for_units(units)
-    with atomic():
-        subsection = create_subsection(
-            learning_package_id,
-            key,
-            created,
-            created_by,
-            can_stand_alone=can_stand_alone,
-        )
-        subsection_version = create_subsection_version(
-            subsection,
-            1,
-            title=title,
-            entity_rows=entity_rows or [],
-            created=created,
-            created_by=created_by,
-        )
-    return subsection, subsection_version
+    return publishing_api.create_container_and_version(
+        learning_package_id,
+        key,
+        title=title,
+        entity_rows=publishing_api.get_entity_rows_for_children(Subsection, units),
+        created=created,
+        created_by=created_by,
+        can_stand_alone=can_stand_alone,
+        container_cls=Subsection,
+        container_version_cls=SubsectionVersion,
+    )
 
 
 def get_subsection(subsection_pk: int) -> Subsection:
@@ -256,6 +216,18 @@ class SubsectionListEntry:
         return self.unit_version.unit
 
 
+def _subsection_list_entry(entry: publishing_api.ContainerEntityListEntry) -> SubsectionListEntry:
+    """
+    Convert from a generic ContainerEntityListEntry to a SubsectionListEntry.
+
+    The UnitVersion is preloaded by the publishing API, because Subsections are
+    registered as holding Units (see apps.py).
+    """
+    unit_version = entry.entity_version.containerversion.unitversion
+    assert isinstance(unit_version, UnitVersion)
+    return SubsectionListEntry(unit_version=unit_version, pinned=entry.pinned)
+
+
 def get_units_in_subsection(
     subsection: Subsection,
     *,
@@ -272,18 +244,8 @@ def get_units_in_subsection(
             `False` for the draft version.
     """
     assert isinstance(subsection, Subsection)
-    units = []
-    entries = publishing_api.get_entities_in_container(
-        subsection,
-        published=published,
-        select_related_version="containerversion__unitversion",
-    )
-    for entry in entries:
-        # Convert from generic PublishableEntityVersion to UnitVersion:
-        unit_version = entry.entity_version.containerversion.unitversion
-        assert isinstance(unit_version, UnitVersion)
-        units.append(SubsectionListEntry(unit_version=unit_version, pinned=entry.pinned))
-    return units
+    entries = publishing_api.get_entities_in_container(subsection, published=published)
+    return [_subsection_list_entry(entry) for entry in entries]
 
 
 def get_units_in_published_subsection_as_of(
@@ -299,32 +261,11 @@ def get_units_in_published_subsection_as_of(
     TODO: This API should be updated to also return the SubsectionVersion so we can
           see the subsection title and any other metadata from that point in time.
     TODO: accept a publish log UUID, not just int ID?
-    TODO: move the implementation to be a generic 'containers' implementation
-          that this subsections function merely wraps.
     TODO: optimize, perhaps by having the publishlog store a record of all
           ancestors of every modified PublishableEntity in the publish.
     """
     assert isinstance(subsection, Subsection)
-    subsection_pub_entity_version = publishing_api.get_published_version_as_of(
-        subsection.publishable_entity_id, publish_log_id
-    )
-    if subsection_pub_entity_version is None:
+    entries = publishing_api.get_entities_in_published_container_as_of(subsection, publish_log_id)
+    if entries is None:
         return None  # This subsection was not published as of the given PublishLog ID.
-    container_version = subsection_pub_entity_version.containerversion
-
-    entity_list = []
-    rows = container_version.entity_list.entitylistrow_set.order_by("order_num")
-    for row in rows:
-        if row.entity_version is not None:
-            unit_version = row.entity_version.containerversion.unitversion
-            assert isinstance(unit_version, UnitVersion)
-            entity_list.append(SubsectionListEntry(unit_version=unit_version, pinned=True))
-        else:
-            # Unpinned unit - figure out what its latest published version was.
-            # This is not optimized. It could be done in one query per subsection rather than one query per unit.
-            pub_entity_version = publishing_api.get_published_version_as_of(row.entity_id, publish_log_id)
-            if pub_entity_version:
-                entity_list.append(
-                    SubsectionListEntry(unit_version=pub_entity_version.containerversion.unitversion, pinned=False)
-                )
-    return entity_list
+    return [_subsection_list_entry(entry) for entry in entries]
@@ -17,9 +17,14 @@ class SubsectionsConfig(AppConfig):
 
     def ready(self):
         """
-        Register Subsection and SubsectionVersion.
+        Register Subsection and SubsectionVersion, and the type of children Subsections hold.
         """
-        from ..publishing.api import register_publishable_models  # pylint: disable=import-outside-toplevel
+        from ..publishing.api import (  # pylint: disable=import-outside-toplevel
+            register_container_type,
+            register_publishable_models,
+        )
+        from ..units.models import Unit  # pylint: disable=import-outside-toplevel
         from .models import Subsection, SubsectionVersion  # pylint: disable=import-outside-toplevel
 
         register_publishable_models(Subsection, SubsectionVersion)
+        register_container_type(Subsection, [Unit])
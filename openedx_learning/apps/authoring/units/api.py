@@ -5,8 +5,6 @@ This module provides functions to manage units.
 from dataclasses import dataclass
 from datetime import datetime
 
-from django.db.transaction import atomic
-
 from openedx_learning.apps.authoring.components.models import Component, ComponentVersion
 
 from ..publishing import api as publishing_api
@@ -106,38 +104,6 @@ def create_unit_version(
     )
 
 
-def _pub_entities_for_components(
-    components: list[Component | ComponentVersion] | None,
-) -> list[publishing_api.ContainerEntityRow] | None:
-    """
-    Helper method: given a list of Component | ComponentVersion, return the
-    list of ContainerEntityRows needed for the base container APIs.
-
-    ComponentVersion is passed when we want to pin a specific version, otherwise
-    Component is used for unpinned.
-    """
-    if components is None:
-        # When these are None, that means don't change the entities in the list.
-        return None
-    for c in components:
-        if not isinstance(c, (Component, ComponentVersion)):
-            raise TypeError("Unit components must be either Component or ComponentVersion.")
-    return [
-        (
-            publishing_api.ContainerEntityRow(
-                entity_pk=c.publishable_entity_id,
-                version_pk=None,
-            ) if isinstance(c, Component)
-            else  # isinstance(c, ComponentVersion)
-            publishing_api.ContainerEntityRow(
-                entity_pk=c.component.publishable_entity_id,
-                version_pk=c.pk,
-            )
-        )
-        for c in components
-    ]
-
-
 def create_next_unit_version(
     unit: Unit,
     *,
@@ -159,7 +125,7 @@ def create_next_unit_version(
         created: The creation date.
         created_by: The user who created the unit.
     """
-    entity_rows = _pub_entities_for_components(components)
+    entity_rows = publishing_api.get_entity_rows_for_children(Unit, components)
     unit_version = publishing_api.create_next_container_version(
         unit.pk,
         title=title,
@@ -193,24 +159,17 @@ def create_unit_and_version(
         created_by: The user who created the unit.
         can_stand_alone: Set to False when created as part of containers
     """
-    entity_rows = _pub_entities_for_components(components)
-    with atomic(savepoint=False):
-        unit = create_unit(
-            learning_package_id,
-            key,
-            created,
-            created_by,
-            can_stand_alone=can_stand_alone,
-        )
-        unit_version = create_unit_version(
-            unit,
-            1,
-            title=title,
-            entity_rows=entity_rows or [],
-            created=created,
-            created_by=created_by,
-        )
-    return unit, unit_version
+    return publishing_api.create_container_and_version(
+        learning_package_id,
+        key,
+        title=title,
+        entity_rows=publishing_api.get_entity_rows_for_children(Unit, components),
+        created=created,
+        created_by=created_by,
+        can_stand_alone=can_stand_alone,
+        container_cls=Unit,
+        container_version_cls=UnitVersion,
+    )
 
 
 def get_unit(unit_pk: int) -> Unit:
@@ -257,6 +216,18 @@ class UnitListEntry:
         return self.component_version.component
 
 
+def _unit_list_entry(entry: publishing_api.ContainerEntityListEntry) -> UnitListEntry:
+    """
+    Convert from a generic ContainerEntityListEntry to a UnitListEntry.
+
+    The ComponentVersion is preloaded by the publishing API, because Units are
+    registered as holding Components (see apps.py).
+    """
+    component_version = entry.entity_version.componentversion
+    assert isinstance(component_version, ComponentVersion)
+    return UnitListEntry(component_version=component_version, pinned=entry.pinned)
+
+
 def get_components_in_unit(
     unit: Unit,
     *,
@@ -273,18 +244,8 @@ def get_components_in_unit(
             `False` for the draft version.
     """
     assert isinstance(unit, Unit)
-    components = []
-    entries = publishing_api.get_entities_in_container(
-        unit,
-        published=published,
-        select_related_version="componentversion",
-    )
-    for entry in entries:
-        # Convert from generic PublishableEntityVersion to ComponentVersion:
-        component_version = entry.entity_version.componentversion
-        assert isinstance(component_version, ComponentVersion)
-        components.append(UnitListEntry(component_version=component_version, pinned=entry.pinned))
-    return components
+    entries = publishing_api.get_entities_in_container(unit, published=published)
+    return [_unit_list_entry(entry) for entry in entries]
 
 
 def get_components_in_published_unit_as_of(
@@ -300,28 +261,11 @@ def get_components_in_published_unit_as_of(
     TODO: This API should be updated to also return the UnitVersion so we can
           see the unit title and any other metadata from that point in time.
     TODO: accept a publish log UUID, not just int ID?
-    TODO: move the implementation to be a generic 'containers' implementation
-          that this units function merely wraps.
     TODO: optimize, perhaps by having the publishlog store a record of all
           ancestors of every modified PublishableEntity in the publish.
     """
     assert isinstance(unit, Unit)
-    unit_pub_entity_version = publishing_api.get_published_version_as_of(unit.publishable_entity_id, publish_log_id)
-    if unit_pub_entity_version is None:
+    entries = publishing_api.get_entities_in_published_container_as_of(unit, publish_log_id)
+    if entries is None:
         return None  # This unit was not published as of the given PublishLog ID.
-    container_version = unit_pub_entity_version.containerversion
-
-    entity_list = []
-    rows = container_version.entity_list.entitylistrow_set.order_by("order_num")
-    for row in rows:
-        if row.entity_version is not None:
-            component_version = row.entity_version.componentversion
-            assert isinstance(component_version, ComponentVersion)
-            entity_list.append(UnitListEntry(component_version=component_version, pinned=True))
-        else:
-            # Unpinned component - figure out what its latest published version was.
-            # This is not optimized. It could be done in one query per unit rather than one query per component.
-            pub_entity_version = publishing_api.get_published_version_as_of(row.entity_id, publish_log_id)
-            if pub_entity_version:
-                entity_list.append(UnitListEntry(component_version=pub_entity_version.componentversion, pinned=False))
-    return entity_list
+    return [_unit_list_entry(entry) for entry in entries]
@@ -17,9 +17,14 @@ class UnitsConfig(AppConfig):
 
     def ready(self):
         """
-        Register Unit and UnitVersion.
+        Register Unit and UnitVersion, and the type of children Units hold.
         """
-        from ..publishing.api import register_publishable_models  # pylint: disable=import-outside-toplevel
+        from ..components.models import Component  # pylint: disable=import-outside-toplevel
+        from ..publishing.api import (  # pylint: disable=import-outside-toplevel
+            register_container_type,
+            register_publishable_models,
+        )
         from .models import Unit, UnitVersion  # pylint: disable=import-outside-toplevel
 
         register_publishable_models(Unit, UnitVersion)
+        register_container_type(Unit, [Component])
@@ -12,17 +12,18 @@ are stored in this app.
 """
 from __future__ import annotations
 
-from typing import Any
+from collections import defaultdict
+from typing import Any, Iterable
 
 from django.db import models, transaction
-from django.db.models import F, QuerySet, Value
+from django.db.models import F, Q, QuerySet, Value
 from django.db.models.functions import Coalesce, Concat, Lower
 from django.utils.text import slugify
 from django.utils.translation import gettext as _
 
 from .data import TagDataQuerySet
-from .models import ObjectTag, Tag, Taxonomy
-from .models.utils import ConcatNull, StringAgg
+from .models import ObjectTag, Tag, TagCounts, Taxonomy
+from .models.utils import BATCH_SIZE
 
 # Export this as part of the API
 TagDoesNotExist = Tag.DoesNotExist
@@ -172,6 +173,59 @@ def resync_object_tags(object_tags: QuerySet | None = None) -> int:
     return num_changed
 
 
+def _resync_object_tags_for_tag(taxonomy: Taxonomy, tag: Tag, chunk_size: int = BATCH_SIZE) -> int:
+    """
+    Reconciles the ObjectTags of a single tag after it was created or renamed.
+
+    This does the same as resync_object_tags(), but only for the object tags
+    that the change can affect: the ones that use this tag, and the ones in
+    this taxonomy that have no tag but whose value matches it (e.g. because
+    they were created before this tag existed). Rather than loading and saving
+    each one, they are updated in chunks of `chunk_size` rows, using one query
+    to find the rows and one to update them.
+
+    Returns the number of object tags updated.
+    """
+    object_tags = ObjectTag.objects.filter(taxonomy_id=taxonomy.pk).filter(
+        Q(tag_id=tag.pk) | Q(tag_id=None, _value=tag.value)
+    )
+
+    num_updated = 0
+    last_pk = 0
+    while True:
+        rows = list(object_tags.filter(pk__gt=last_pk).order_by("pk").values_list("pk", "tag_id")[:chunk_size])
+        if not rows:
+            break
+        with transaction.atomic():
+            ObjectTag.objects.filter(pk__in=[pk for pk, _tag_id in rows]).update(
+                tag_id=tag.pk,
+                _value=tag.value,
+                _export_id=taxonomy.export_id,
+            )
+            # Count the object tags that we just linked to this tag:
+            TagCounts.record_usage_changes({tag.pk: sum(1 for _pk, tag_id in rows if tag_id is None)})
+        num_updated += len(rows)
+        if len(rows) < chunk_size:
+            break
+        last_pk = rows[-1][0]
+    return num_updated
+
+
+def _filter_object_id_pattern(qs: QuerySet, object_id_pattern: str) -> QuerySet:
+    """
+    Filters the given ObjectTag queryset to the objects matching the given
+    object ID, "starts with" glob pattern like "course-v1:foo+bar+baz@*", or
+    list of "comma,separated,IDs".
+    """
+    if object_id_pattern.endswith("*"):
+        return qs.filter(object_id__startswith=object_id_pattern[0:len(object_id_pattern) - 1])
+    if "*" in object_id_pattern:
+        raise ValueError("Wildcard matches are only supported if the * is at the end.")
+    if "," in object_id_pattern:
+        return qs.filter(object_id__in=object_id_pattern.split(","))
+    return qs.filter(object_id=object_id_pattern)
+
+
 def get_object_tags(
     object_id: str,
     taxonomy_id: int | None = None,
@@ -181,12 +235,17 @@ def get_object_tags(
     """
     Returns a Queryset of object tags for a given object.
 
+    object_id can also be a "starts with" glob pattern like
+    "course-v1:foo+bar+baz@*", or a list of "comma,separated,IDs", to get the
+    tags of all the matching objects at once. The results are grouped by
+    object ID, then by taxonomy.
+
     Pass taxonomy_id to limit the returned object_tags to a specific taxonomy.
     """
     filters = {"taxonomy_id": taxonomy_id} if taxonomy_id else {}
     base_qs = (
-        object_tag_class.objects
-        .filter(object_id=object_id, **filters)
+        _filter_object_id_pattern(object_tag_class.objects.all(), object_id)
+        .filter(**filters)
         .exclude(taxonomy__enabled=False)  # Exclude if the whole taxonomy is disabled
     )
     if not include_deleted:
@@ -196,20 +255,17 @@ def get_object_tags(
         base_qs = base_qs.exclude(tag=None, taxonomy__allow_free_text=False)
     tags = (
         base_qs
-        # Preload related objects, including data for the "get_lineage" method on ObjectTag/Tag:
-        .select_related("taxonomy", "tag", "tag__parent", "tag__parent__parent")
-        # Sort the tags within each taxonomy in "tree order". See Taxonomy._get_filtered_tags_deep for details on this:
-        .annotate(sort_key=Lower(Concat(
-            ConcatNull(F("tag__parent__parent__parent__value"), Value("\t")),
-            ConcatNull(F("tag__parent__parent__value"), Value("\t")),
-            ConcatNull(F("tag__parent__value"), Value("\t")),
-            Coalesce(F("tag__value"), F("_value")),
-            Value("\t"),
-            output_field=models.CharField(),
-        )))
+        # Preload related objects, including all the ancestors needed by the "get_lineage" method on ObjectTag/Tag.
+        .select_related("taxonomy", "tag", "tag__parent", "tag__parent__parent", "tag__parent__parent__parent")
+        # Sort the tags within each taxonomy in "tree order", using the stored Tag.sort_key. Free text tags (and
+        # deleted tags) don't have a Tag, so we compute the equivalent sort key from their value.
+        .annotate(sort_key=Coalesce(
+            F("tag__sort_key"),
+            Lower(Concat(F("_value"), Value("\t"), output_field=models.CharField())),
+        ))
         .annotate(taxonomy_name=Coalesce(F("taxonomy__name"), F("_export_id")))
-        # Sort first by taxonomy name, then by tag value in tree order:
-        .order_by("taxonomy_name", "sort_key")
+        # Sort first by object (if there are several), then by taxonomy name, then by tag value in tree order:
+        .order_by("object_id", "taxonomy_name", "sort_key")
     )
     return tags
 
@@ -224,47 +280,25 @@ def get_object_tag_counts(object_id_pattern: str, count_implicit=False) -> dict[
     ObjectTag data about them is present.
     """
     # Note: in the future we may add an option to exclude system taxonomies from the count.
-    qs: Any = ObjectTag.objects
-    if object_id_pattern.endswith("*"):
-        qs = qs.filter(object_id__startswith=object_id_pattern[0:len(object_id_pattern) - 1])
-    elif "*" in object_id_pattern:
-        raise ValueError("Wildcard matches are only supported if the * is at the end.")
-    else:
-        qs = qs.filter(object_id__in=object_id_pattern.split(","))
+    qs: Any = _filter_object_id_pattern(ObjectTag.objects.all(), object_id_pattern)
     # Don't include deleted tags or disabled taxonomies:
     qs = qs.exclude(taxonomy_id=None)  # The whole taxonomy was deleted
     qs = qs.exclude(taxonomy__enabled=False)  # The whole taxonomy is disabled
     qs = qs.exclude(tag_id=None, taxonomy__allow_free_text=False)  # The taxonomy exists but the tag is deleted
     if count_implicit:
         # Counting the implicit tags is tricky, because if two "grandchild" tags have the same implicit parent tag, we
-        # need to count that parent tag only once. To do that, we collect all the ancestor tag IDs into an aggregate
-        # string, and then count the unique values using python
+        # need to count that parent tag only once. So we join each object tag to all of its tag's ancestors (including
+        # the tag itself) via the TagAncestor closure table, and count the distinct ancestors of each object.
+        # Free text tags have no Tag (so no ancestors either), so we count those separately.
         qs = qs.values("object_id").annotate(
-            num_tags=models.Count("id"),
-            tag_ids_str_1=StringAgg("tag_id"),
-            tag_ids_str_2=StringAgg("tag__parent_id"),
-            tag_ids_str_3=StringAgg("tag__parent__parent_id"),
-            tag_ids_str_4=StringAgg("tag__parent__parent__parent_id"),
-        ).order_by("object_id")
-        result = {}
-        for row in qs:
-            # ObjectTags for free text taxonomies will be included in "num_tags" count, but not "tag_ids_str_1" since
-            # they have no tag ID. We can compute how many free text tags each object has now:
-            if row["tag_ids_str_1"]:
-                num_free_text_tags = row["num_tags"] - len(row["tag_ids_str_1"].split(","))
-            else:
-                num_free_text_tags = row["num_tags"]
-            # Then we count the total number of *unique* Tags for this object, both implicit and explicit:
-            other_tag_ids = set()
-            for field in ("tag_ids_str_1", "tag_ids_str_2", "tag_ids_str_3", "tag_ids_str_4"):
-                if row[field] is not None:
-                    for tag_id in row[field].split(","):
-                        other_tag_ids.add(int(tag_id))
-            result[row["object_id"]] = num_free_text_tags + len(other_tag_ids)
-        return result
+            num_tags=(
+                models.Count("id", filter=Q(tag_id=None)) +
+                models.Count("tag__ancestor_links__ancestor_id", distinct=True)
+            ),
+        )
     else:
-        qs = qs.values("object_id").annotate(num_tags=models.Count("id")).order_by("object_id")
-        return {row["object_id"]: row["num_tags"] for row in qs}
+        qs = qs.values("object_id").annotate(num_tags=models.Count("id"))
+    return dict(qs.order_by("object_id").values_list("object_id", "num_tags"))
 
 
 def delete_object_tags(object_id: str):
@@ -379,16 +413,13 @@ def tag_object(  # pylint: disable=too-many-positional-arguments
                 updated_tags.append(object_tag)
     else:
         # Handle closed taxonomies:
+        # When export, sometimes, the value has a space at the beginning and end.
+        tags_by_value = taxonomy.tags_for_values([tag_value.strip() for tag_value in tags]) if taxonomy else {}
         for tag_value in tags:
-            tag = None
-            # When export, sometimes, the value has a space at the beginning and end.
             tag_value = tag_value.strip()
-            if taxonomy:
-                try:
-                    tag = taxonomy.tag_for_value(tag_value)  # Will raise Tag.DoesNotExist if the value is invalid.
-                except Tag.DoesNotExist as e:
-                    if not create_invalid:
-                        raise e
+            tag = tags_by_value.get(tag_value.lower())
+            if taxonomy and tag is None and not create_invalid:
+                tag = taxonomy.tag_for_value(tag_value)  # Raises Tag.DoesNotExist, with the usual error message
 
             if tag:
                 # Tag exists in the taxonomy
@@ -432,6 +463,123 @@ def tag_object(  # pylint: disable=too-many-positional-arguments
             object_tag.save()
 
 
+def _get_tags_for_values(taxonomy: Taxonomy, tag_values: list[str]) -> dict[str, Tag]:
+    """
+    Returns a dict mapping the lowercase version of each of the given values to
+    the matching Tag in the given (closed) taxonomy.
+
+    Raises Tag.DoesNotExist if any of the values are invalid for this taxonomy.
+    """
+    tags_by_value = taxonomy.tags_for_values(tag_values)
+    for value in tag_values:
+        if value.lower() not in tags_by_value:
+            raise Tag.DoesNotExist(
+                f"Tag '{value}' does not exist in taxonomy ({taxonomy.name})."
+            )
+    return tags_by_value
+
+
+def tag_objects_bulk(
+    object_ids: list[str],
+    taxonomy: Taxonomy,
+    tags: list[str],
+    object_tag_class: type[ObjectTag] = ObjectTag,
+) -> None:
+    """
+    Replaces the existing ObjectTag entries for the given taxonomy on each of
+    the given objects with the given list of tags.
+
+    This has the same effect as calling tag_object() for each object (without
+    create_invalid), but it uses the same handful of queries no matter how
+    many objects are being tagged.
+
+    tags: A list of the values of the tags from this taxonomy to apply.
+
+    object_tag_class: Optional. Use a proxy subclass of ObjectTag for additional
+        validation. (e.g. only allow tagging certain types of objects.)
+
+    Raises Tag.DoesNotExist if any of the proposed tags are invalid for this
+    taxonomy, and ValueError if any object would end up with more than 100
+    tags. In either case, no objects are changed.
+    """
+    if not isinstance(tags, list):
+        raise ValueError(_("Tags must be a list, not {type}.").format(type=type(tags).__name__))
+
+    ObjectTagClass = object_tag_class
+    taxonomy = taxonomy.cast()  # Make sure we're using the right subclass. This is a no-op if we are already.
+    object_ids = list(dict.fromkeys(object_ids))  # Remove duplicates preserving order
+    if taxonomy.allow_free_text:
+        tags = list(dict.fromkeys(tags))
+    else:
+        # When export, sometimes, the value has a space at the beginning and end.
+        tags = list(dict.fromkeys(tag_value.strip() for tag_value in tags))
+    if not taxonomy.allow_multiple and len(tags) > 1:
+        raise ValueError(_("Taxonomy ({name}) only allows one tag per object.").format(name=taxonomy.name))
+
+    # Check the tag limit of every object with one grouped count. Exclude this
+    # taxonomy to avoid counting the tags that are going to be replaced.
+    other_tag_counts = dict(
+        ObjectTag.objects
+        .filter(object_id__in=object_ids)
+        .exclude(taxonomy_id=taxonomy.id)
+        .values("object_id")
+        .annotate(num_tags=models.Count("id"))
+        .values_list("object_id", "num_tags")
+    )
+    for object_id in object_ids:
+        if other_tag_counts.get(object_id, 0) + len(tags) > 100:
+            raise ValueError(
+                _("Cannot add more than 100 tags to ({object_id}).").format(object_id=object_id)
+            )
+
+    tags_by_value = {} if taxonomy.allow_free_text else _get_tags_for_values(taxonomy, tags)
+
+    current_tags_by_object: dict[str, list[ObjectTag]] = {object_id: [] for object_id in object_ids}
+    for current_tag in ObjectTagClass.objects.filter(taxonomy=taxonomy, object_id__in=object_ids):
+        current_tags_by_object[current_tag.object_id].append(current_tag)
+
+    tags_to_delete: list[ObjectTag] = []
+    tags_to_create: list[ObjectTag] = []
+    tags_to_update: list[ObjectTag] = []
+    for object_id, current_tags in current_tags_by_object.items():
+        kept_ids = set()
+        for tag_value in tags:
+            if taxonomy.allow_free_text:
+                object_tag = next((t for t in current_tags if t.value == tag_value), None)
+                if object_tag is None:
+                    tags_to_create.append(ObjectTagClass(taxonomy=taxonomy, object_id=object_id, _value=tag_value))
+            else:
+                tag = tags_by_value[tag_value.lower()]
+                object_tag = next((t for t in current_tags if t.tag_id == tag.id), None)
+                if object_tag is None:
+                    tags_to_create.append(ObjectTagClass(taxonomy=taxonomy, object_id=object_id, tag=tag))
+                elif object_tag._value != tag.value:  # pylint: disable=protected-access
+                    # The ObjectTag's cached '_value' is out of sync with the Tag, so update it:
+                    object_tag._value = tag.value  # pylint: disable=protected-access
+                    # Reuse the objects we already have, so that validating it won't need any queries:
+                    object_tag.tag = tag
+                    object_tag.taxonomy = taxonomy
+                    tags_to_update.append(object_tag)
+            if object_tag is not None:
+                kept_ids.add(object_tag.id)
+        tags_to_delete.extend(object_tag for object_tag in current_tags if object_tag.id not in kept_ids)
+
+    for object_tag in tags_to_create + tags_to_update:
+        # Run validation. Skip the checks that would cost queries: the taxonomy and tags were just loaded from the
+        # database, and uniqueness is already guaranteed by the diff above.
+        object_tag.full_clean(exclude=["taxonomy", "tag"], validate_unique=False)
+
+    # Save all changes at once to avoid partial updates
+    with transaction.atomic():
+        # delete any omitted existing tags. We do this first to reduce chances of UNIQUE constraint edge cases
+        if tags_to_delete:
+            ObjectTag.objects.filter(id__in=[object_tag.id for object_tag in tags_to_delete]).delete()
+        if tags_to_update:
+            ObjectTag.objects.bulk_update(tags_to_update, ["_value"])
+        if tags_to_create:
+            ObjectTagClass.objects.bulk_create(tags_to_create)
+
+
 def add_tag_to_taxonomy(
     taxonomy: Taxonomy,
     tag: str,
@@ -446,11 +594,10 @@ def add_tag_to_taxonomy(
     taxonomy = taxonomy.cast()
     new_tag = taxonomy.add_tag(tag, parent_tag_value, external_id)
 
-    # Resync all related ObjectTags after creating new Tag to
+    # Resync the related ObjectTags after creating new Tag to
     # to ensure any existing ObjectTags with the same value will
     # be linked to the new Tag
-    object_tags = taxonomy.objecttag_set.all()
-    resync_object_tags(object_tags)
+    _resync_object_tags_for_tag(taxonomy, new_tag)
 
     return new_tag
 
@@ -465,9 +612,8 @@ def update_tag_in_taxonomy(taxonomy: Taxonomy, tag: str, new_value: str):
     taxonomy = taxonomy.cast()
     updated_tag = taxonomy.update_tag(tag, new_value)
 
-    # Resync all related ObjectTags to update to the new Tag value
-    object_tags = taxonomy.objecttag_set.all()
-    resync_object_tags(object_tags)
+    # Resync the related ObjectTags to update to the new Tag value
+    _resync_object_tags_for_tag(taxonomy, updated_tag)
 
     return updated_tag
 
@@ -495,28 +641,80 @@ def copy_tags(source_object_id: str, dest_object_id: str):
     If there are not-copied tags that also are in 'source_object_id',
     then they become copied.
     """
-    source_object_tags = get_object_tags(
-        source_object_id,
-    )
-    copied_tags = ObjectTag.objects.filter(
-        object_id=dest_object_id,
-        is_copied=True,
-    )
+    copy_tags_bulk([(source_object_id, dest_object_id)])
 
-    with transaction.atomic():
-        # Delete all copied tags of destination
-        copied_tags.delete()
 
-        # Copy an create object_tags in destination
-        for object_tag in source_object_tags:
-            ObjectTag.objects.update_or_create(
+def copy_tags_bulk(source_dest_pairs: Iterable[tuple[str, str]]) -> None:
+    """
+    Copy all tags from each source object to its destination object, e.g.
+    when duplicating every block of a course or library.
+
+    This works like copy_tags(), but uses the same few queries no matter how
+    many objects are being copied. If a destination object is listed more than
+    once, it gets the tags of all its source objects.
+    """
+    dest_ids_by_source_id: dict[str, list[str]] = defaultdict(list)
+    for source_object_id, dest_object_id in source_dest_pairs:
+        dest_ids_by_source_id[source_object_id].append(dest_object_id)
+    dest_ids = {dest_id for dest_ids in dest_ids_by_source_id.values() for dest_id in dest_ids}
+    if not dest_ids:
+        return
+
+    # Load the (non-deleted) tags of all the source objects in one query
+    source_tags = (
+        ObjectTag.objects.filter(object_id__in=dest_ids_by_source_id)
+        .exclude(taxonomy=None)
+        .exclude(taxonomy__enabled=False)
+        .exclude(tag=None, taxonomy__allow_free_text=False)
+        .annotate(tag_value=Coalesce(F("tag__value"), F("_value")), taxonomy_export_id=F("taxonomy__export_id"))
+        .values_list("object_id", "taxonomy_id", "tag_id", "tag_value", "taxonomy_export_id")
+    )
+    new_tags: dict[tuple[str, int, str], ObjectTag] = {}
+    for source_object_id, taxonomy_id, tag_id, value, export_id in source_tags:
+        for dest_object_id in dest_ids_by_source_id[source_object_id]:
+            # Key the tags the same way as the UNIQUE constraint on (object_id, taxonomy, _value) does
+            new_tags[(dest_object_id, taxonomy_id, value.lower())] = ObjectTag(
                 object_id=dest_object_id,
-                taxonomy_id=object_tag.taxonomy_id,
-                tag_id=object_tag.tag_id,
-                defaults={"is_copied": True},
-                # Note: _value and _export_id are set automatically
+                taxonomy_id=taxonomy_id,
+                tag_id=tag_id,
+                _value=value,
+                _export_id=export_id,
+                is_copied=True,
             )
 
+    with transaction.atomic():
+        # Delete all copied tags of the destinations
+        ObjectTag.objects.filter(object_id__in=dest_ids, is_copied=True).delete()
+
+        # Any non-copied tags that the destinations already have just get marked as copied, and the rest are created.
+        # (MySQL can't do this with a single "upsert" on the UNIQUE constraints.)
+        # They're matched on both UNIQUE constraints, so that a tag whose _value is out of date (e.g. because the tag
+        # was renamed since) is updated instead of inserted again.
+        existing_by_value: dict[tuple[str, int, str], int] = {}
+        existing_by_tag_id: dict[tuple[str, int | None, int | None], int] = {}
+        for pk, object_id, taxonomy_id, tag_id, value in ObjectTag.objects.filter(object_id__in=dest_ids).values_list(
+            "pk", "object_id", "taxonomy_id", "tag_id", "_value",
+        ):
+            existing_by_value[(object_id, taxonomy_id, value.lower())] = pk
+            if tag_id is not None:
+                existing_by_tag_id[(object_id, taxonomy_id, tag_id)] = pk
+        marked_ids = []
+        renamed_tags = []
+        added_tags = []
+        for key, object_tag in new_tags.items():
+            tag_key = (object_tag.object_id, object_tag.taxonomy_id, object_tag.tag_id)
+            if key in existing_by_value:
+                marked_ids.append(existing_by_value[key])
+            elif tag_key in existing_by_tag_id:
+                object_tag.pk = existing_by_tag_id[tag_key]
+                renamed_tags.append(object_tag)
+            else:
+                added_tags.append(object_tag)
+        if marked_ids:
+            ObjectTag.objects.filter(pk__in=marked_ids).update(is_copied=True)
+        ObjectTag.objects.bulk_update(renamed_tags, ["_value", "_export_id", "is_copied"], batch_size=BATCH_SIZE)
+        ObjectTag.objects.bulk_create(added_tags, batch_size=BATCH_SIZE)
+
 
 def unmark_copied_tags(object_id: str) -> None:
     """
@@ -9,6 +9,96 @@ from ..models import Tag, Taxonomy
 from .exceptions import ImportActionConflict, ImportActionError
 
 
+class TaxonomyTags:
+    """
+    The existing tags of a taxonomy, loaded once and indexed in memory, so that
+    an import can be planned without querying the database for every tag.
+
+    Like the `external_id` and `value` fields, the lookups are case insensitive.
+    """
+
+    def __init__(self, taxonomy: Taxonomy):
+        self.all: list[Tag] = list(taxonomy.tag_set.all())
+        self._by_external_id: dict[str | None, list[Tag]] = {}
+        self._by_value: dict[str, list[Tag]] = {}
+        self._children: dict[int, list[Tag]] = {}
+        tags_by_pk = {tag.pk: tag for tag in self.all}
+        for tag in self.all:
+            external_id = tag.external_id.lower() if tag.external_id is not None else None
+            self._by_external_id.setdefault(external_id, []).append(tag)
+            self._by_value.setdefault(tag.value.lower(), []).append(tag)
+            if tag.parent_id is not None:
+                # Link the parent in memory, so that tag.parent doesn't query the database
+                tag.parent = tags_by_pk[tag.parent_id]
+                self._children.setdefault(tag.parent_id, []).append(tag)
+
+    @staticmethod
+    def _get_one(tags: list[Tag]) -> Tag:
+        """
+        Returns the only tag in `tags`, raising the same exceptions as QuerySet.get()
+        """
+        if not tags:
+            raise Tag.DoesNotExist("Tag matching query does not exist.")
+        if len(tags) > 1:
+            raise Tag.MultipleObjectsReturned(f"get() returned more than one Tag -- it returned {len(tags)}!")
+        return tags[0]
+
+    def get_by_external_id(self, external_id: str | None) -> Tag:
+        """
+        Same as taxonomy.tag_set.get(external_id=external_id)
+        """
+        return self._get_one(self._by_external_id.get(external_id.lower() if external_id is not None else None, []))
+
+    def get_by_value(self, value: str, without_external_id: bool = False) -> Tag:
+        """
+        Same as taxonomy.tag_set.get(value=value), optionally with external_id=None
+        """
+        tags = self._by_value.get(value.lower(), [])
+        if without_external_id:
+            tags = [tag for tag in tags if tag.external_id is None]
+        return self._get_one(tags)
+
+    def children(self, tag: Tag) -> list[Tag]:
+        """
+        Same as tag.children.all()
+        """
+        return self._children.get(tag.pk, [])
+
+
+class IndexedActions(dict):
+    """
+    The actions of an import plan, grouped by name: {action name: [actions]}
+
+    It also indexes the actions by the attributes of their tags, so that
+    finding a previous action for a tag is a dict lookup instead of a scan of
+    all the previous actions. The indexes catch up with the actions appended to
+    each list whenever they are used.
+
+    `taxonomy_tags` holds the existing tags of the taxonomy, if they have been
+    loaded for planning.
+    """
+
+    def __init__(self, *args, taxonomy_tags: TaxonomyTags | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.taxonomy_tags = taxonomy_tags
+        # {(action name, attr): ({attr value: [actions]}, number of actions indexed)}
+        self._indexes: dict[tuple[str, str], tuple[dict, int]] = {}
+
+    def find_all(self, action_name: str, attr: str, search_value) -> list[ImportAction]:
+        """
+        Returns the actions named `action_name` whose TagItem has `search_value` in `attr`, in order.
+        """
+        actions = self.get(action_name, [])
+        index, num_indexed = self._indexes.get((action_name, attr), ({}, 0))
+        if num_indexed > len(actions):
+            # The list was replaced or cleared, so index it again
+            index, num_indexed = {}, 0
+        for action in actions[num_indexed:]:
+            index.setdefault(getattr(action.tag, attr), []).append(action)
+        self._indexes[(action_name, attr)] = (index, len(actions))
+        return index.get(search_value, [])
+
+
 class ImportAction:
     """
     Base class to create actions
@@ -46,12 +136,24 @@ class ImportAction:
     def __str__(self) -> str:
         return self.__repr__()
 
+    def describe(self, taxonomy_tag: Tag | None = None) -> str:  # pylint: disable=unused-argument
+        """
+        Returns the description of this action used on the plan and the logs.
+
+        Actions that change an existing tag describe `taxonomy_tag` if it's
+        given, instead of loading the tag from the database.
+        """
+        return str(self)
+
     @classmethod
-    def applies_for(cls, taxonomy: Taxonomy, tag) -> bool:
+    def applies_for(cls, taxonomy: Taxonomy, tag, taxonomy_tags: TaxonomyTags | None = None) -> bool:
         """
         Implement this to meet the conditions that a `TagItem` needs
         to have for this action. If this function returns `True` for `tag`
         then the action is created.
+
+        If `taxonomy_tags` is given, use it to look up the existing tags instead
+        of querying the database.
         """
         raise NotImplementedError
 
@@ -68,6 +170,18 @@ class ImportAction:
         """
         raise NotImplementedError
 
+    @staticmethod
+    def _get_taxonomy_tag(taxonomy: Taxonomy, external_id: str | None, taxonomy_tags: TaxonomyTags | None) -> Tag:
+        """
+        Returns the existing tag with the given external_id, from `taxonomy_tags`
+        if it was loaded, or from the database.
+
+        Raises Tag.DoesNotExist if there is no such tag.
+        """
+        if taxonomy_tags is not None:
+            return taxonomy_tags.get_by_external_id(external_id)
+        return taxonomy.tag_set.get(external_id=external_id)
+
     def _get_tag(self) -> Tag:
         """
         Returns the respective tag of this actions
@@ -79,6 +193,23 @@ class ImportAction:
                 pass
         return self.taxonomy.tag_set.get(value=self.tag.value, external_id=None)
 
+    def _search_actions(
+        self,
+        indexed_actions: dict,
+        action_name: str,
+        attr: str,
+        search_value: str,
+    ) -> list[ImportAction]:
+        """
+        Use this function to find all the actions with `search_value` in an `attr` of `TagItem`
+        """
+        if isinstance(indexed_actions, IndexedActions):
+            return indexed_actions.find_all(action_name, attr, search_value)
+        return [
+            action for action in indexed_actions.get(action_name, [])
+            if search_value == getattr(action.tag, attr)
+        ]
+
     def _search_action(
         self,
         indexed_actions: dict,
@@ -89,11 +220,8 @@ class ImportAction:
         """
         Use this function to find and action using an `attr` of `TagItem`
         """
-        for action in indexed_actions[action_name]:
-            if search_value == getattr(action.tag, attr):
-                return action
-
-        return None
+        actions = self._search_actions(indexed_actions, action_name, attr, search_value)
+        return actions[0] if actions else None
 
     def _validate_parent(self, indexed_actions) -> ImportActionError | None:
         """
@@ -101,7 +229,7 @@ class ImportAction:
         """
         try:
             # Validates that the parent exists on the taxonomy
-            self.taxonomy.tag_set.get(external_id=self.tag.parent_id)
+            self._get_taxonomy_tag(self.taxonomy, self.tag.parent_id, getattr(indexed_actions, "taxonomy_tags", None))
         except Tag.DoesNotExist:
             # Or if the parent is created on previous actions
             if not self._search_action(
@@ -122,15 +250,16 @@ class ImportAction:
         actions
         """
         try:
-            is_deleted_tag_value = any(
-                self.tag.value == action.tag.value
-                for action in indexed_actions["delete"]
-            ) if "delete" in indexed_actions else False
+            is_deleted_tag_value = bool(self._search_actions(indexed_actions, "delete", "value", self.tag.value))
 
             # If the tag will be deleted, skip the Database validation
             if not is_deleted_tag_value:
                 # Validates if exists a tag with the same value on the Taxonomy
-                taxonomy_tag = self.taxonomy.tag_set.get(value=self.tag.value)
+                taxonomy_tags = getattr(indexed_actions, "taxonomy_tags", None)
+                if taxonomy_tags is not None:
+                    taxonomy_tag = taxonomy_tags.get_by_value(self.tag.value)
+                else:
+                    taxonomy_tag = self.taxonomy.tag_set.get(value=self.tag.value)
                 return ImportActionError(
                     action=self,
                     message=_(
@@ -193,12 +322,12 @@ class CreateTag(ImportAction):
         )
 
     @classmethod
-    def applies_for(cls, taxonomy: Taxonomy, tag) -> bool:
+    def applies_for(cls, taxonomy: Taxonomy, tag, taxonomy_tags: TaxonomyTags | None = None) -> bool:
         """
         This action applies whenever the tag does not exist
         """
         try:
-            taxonomy.tag_set.get(external_id=tag.id)
+            cls._get_taxonomy_tag(taxonomy, tag.id, taxonomy_tags)
             return False
         except Tag.DoesNotExist:
             return True
@@ -267,7 +396,11 @@ class UpdateParentTag(ImportAction):
     name = "update_parent"
 
     def __str__(self) -> str:
-        taxonomy_tag = self._get_tag()
+        return self.describe()
+
+    def describe(self, taxonomy_tag: Tag | None = None) -> str:
+        if taxonomy_tag is None:
+            taxonomy_tag = self._get_tag()
 
         description_str = _("Update the parent of {tag} from parent {old_parent} to {new_parent}").format(
             tag=taxonomy_tag.display_str(),
@@ -278,12 +411,12 @@ class UpdateParentTag(ImportAction):
         return str(description_str)
 
     @classmethod
-    def applies_for(cls, taxonomy: Taxonomy, tag) -> bool:
+    def applies_for(cls, taxonomy: Taxonomy, tag, taxonomy_tags: TaxonomyTags | None = None) -> bool:
         """
         This action applies whenever there is a change on the parent
         """
         try:
-            taxonomy_tag = taxonomy.tag_set.get(external_id=tag.id)
+            taxonomy_tag = cls._get_taxonomy_tag(taxonomy, tag.id, taxonomy_tags)
             return (
                 taxonomy_tag.parent is not None
                 and taxonomy_tag.parent.external_id != tag.parent_id
@@ -331,7 +464,11 @@ class RenameTag(ImportAction):
     name = "rename"
 
     def __str__(self) -> str:
-        taxonomy_tag = self._get_tag()
+        return self.describe()
+
+    def describe(self, taxonomy_tag: Tag | None = None) -> str:
+        if taxonomy_tag is None:
+            taxonomy_tag = self._get_tag()
         description_str = _("Rename tag value of {tag} to '{new_value}'").format(
             tag=taxonomy_tag.display_str(),
             new_value=self.tag.value,
@@ -340,12 +477,12 @@ class RenameTag(ImportAction):
         return str(description_str)
 
     @classmethod
-    def applies_for(cls, taxonomy: Taxonomy, tag) -> bool:
+    def applies_for(cls, taxonomy: Taxonomy, tag, taxonomy_tags: TaxonomyTags | None = None) -> bool:
         """
         This action applies whenever there is a change on the tag value
         """
         try:
-            taxonomy_tag = taxonomy.tag_set.get(external_id=tag.id)
+            taxonomy_tag = cls._get_taxonomy_tag(taxonomy, tag.id, taxonomy_tags)
             return taxonomy_tag.value != tag.value
         except Tag.DoesNotExist:
             return False
@@ -387,7 +524,7 @@ class DeleteTag(ImportAction):
     name = "delete"
 
     @classmethod
-    def applies_for(cls, taxonomy: Taxonomy, tag) -> bool:
+    def applies_for(cls, taxonomy: Taxonomy, tag, taxonomy_tags: TaxonomyTags | None = None) -> bool:
         """
         This action is an exception.
         These actions are created in `TagImportPlan.generate_actions` if `replace=True`
@@ -424,7 +561,7 @@ class WithoutChanges(ImportAction):
         return str(_("No changes needed for {tag}").format(tag=self.tag))
 
     @classmethod
-    def applies_for(cls, taxonomy: Taxonomy, tag) -> bool:
+    def applies_for(cls, taxonomy: Taxonomy, tag, taxonomy_tags: TaxonomyTags | None = None) -> bool:
         """
         No validations necessary
         """
@@ -28,6 +28,15 @@ In the end, TagImportPlan contains all actions and possible errors.
 You can run `plan()` to see the actions and errors or you can run `execute()`
 to execute each action.
 
+Imports can also run in steps, e.g. on celery with the `run_import_task`
+task. `start_import_tags()` stores the file with a new TagImportTask, then
+each call to `run_import_task_step()` runs the next step: the first step
+parses the file and saves the plan, and the following ones execute the
+actions of the plan in batches, each in its own transaction. The task keeps
+track of how many actions have been executed, so if an import fails, or is
+stopped, `resume_import_tags()` continues it from the last batch that was
+executed.
+
 Export
 ----------
 
@@ -45,14 +54,20 @@ TODO for next versions
 from __future__ import annotations
 
 import time
-from typing import BinaryIO
+from io import BytesIO
+from typing import BinaryIO, Iterator
 
+from django.db import transaction
+from django.utils import timezone
 from django.utils.translation import gettext as _
 
 from ..models import TagImportTask, TagImportTaskState, Taxonomy
 from .import_plan import TagImportPlan, TagImportTask
 from .parsers import ParserFormat, get_parser
 
+# How many actions of the plan run_import_task_step() executes in each transaction
+IMPORT_BATCH_SIZE = 5000
+
 
 def import_tags(
     taxonomy: Taxonomy,
@@ -80,15 +95,7 @@ def import_tags(
     """
     global_start_time = time.time()
     _import_validations(taxonomy)
-
-    # Checks that exists only one task import in progress at a time per taxonomy
-    if not _check_unique_import_task(taxonomy):
-        raise ValueError(
-            _(
-                "There is an import task running. "
-                "Only one task per taxonomy can be created at a time."
-            )
-        )
+    _check_no_import_running(taxonomy)
 
     # Creating import task
     task = TagImportTask.create(taxonomy)
@@ -157,6 +164,147 @@ def import_tags(
         return False, task, None
 
 
+def start_import_tags(
+    taxonomy: Taxonomy,
+    file: BinaryIO,
+    parser_format: ParserFormat,
+    replace=False,
+) -> TagImportTask:
+    """
+    Creates a TagImportTask to import the tags from `file` in steps, with
+    `run_import_task_step()`.
+
+    The file is stored with the task, so each step can run in a different
+    process, e.g. on celery with the `run_import_task` task.
+
+    See `import_tags()` for the meaning of `replace`.
+    """
+    _import_validations(taxonomy)
+    _check_no_import_running(taxonomy)
+    return TagImportTask.create(
+        taxonomy,
+        upload=file.read(),
+        parser_format=parser_format.value,
+        replace=replace,
+    )
+
+
+def run_import_task_step(task: TagImportTask, batch_size: int | None = None) -> bool:
+    """
+    Runs the next step of an import task created with `start_import_tags()`.
+
+    The first step parses the file and saves the plan. The following steps
+    execute the next `batch_size` actions of the plan, each in a transaction,
+    and log the progress. Running a step of a task that has failed, has
+    finished, or whose step has already been run, does nothing.
+
+    Returns True if there are more steps to run.
+    """
+    try:
+        if task.status == TagImportTaskState.LOADING_DATA.value:
+            return _plan_import_task(task)
+        if task.status == TagImportTaskState.EXECUTING.value:
+            return _execute_import_batch(task, batch_size or IMPORT_BATCH_SIZE)
+    except Exception as exception:  # pylint: disable=broad-exception-caught
+        # Log any exception. The batches executed before are kept.
+        task.log_exception(exception)
+    return False
+
+
+def resume_import_tags(taxonomy: Taxonomy) -> TagImportTask:
+    """
+    Resumes the last import task of the given taxonomy, if it failed while
+    executing its plan, from the first action that wasn't executed.
+
+    Continue running it with `run_import_task_step()`.
+    """
+    task = _get_last_import_task(taxonomy)
+    if (
+        task is None
+        or task.status != TagImportTaskState.ERROR.value
+        or task.executed_actions >= task.total_actions
+    ):
+        raise ValueError(_("There is no failed import task to resume."))
+    task.add_log(
+        _("Resuming execution from action #{index}").format(index=task.executed_actions + 1),
+        save=False,
+    )
+    task.status = TagImportTaskState.EXECUTING.value
+    task.save()
+    return task
+
+
+def _plan_import_task(task: TagImportTask) -> bool:
+    """
+    Parses the file of the task, and saves the plan.
+
+    Returns True if the plan has to be executed.
+    """
+    # Once the plan is saved it has everything needed to execute the import, so the file is cleared from the start,
+    # to not save it again with every log message. If this step fails, the transaction is rolled back, and the file
+    # is kept.
+    upload, task.upload = task.upload, None
+    try:
+        with transaction.atomic():
+            start_time = time.time()
+            task.log_parser_start()
+            parser = get_parser(ParserFormat(task.parser_format))
+            tags, errors = parser.parse_import(BytesIO(upload or b""))
+            if errors:
+                task.handle_parser_errors(errors)
+                return False
+            task.log_parser_end(round(time.time() - start_time, 5))
+
+            start_time = time.time()
+            task.log_start_planning()
+            tag_import_plan = TagImportPlan(task.taxonomy)
+            tag_import_plan.generate_actions(tags, task.replace)
+            task.log_plan(tag_import_plan, round(time.time() - start_time, 5))
+            if tag_import_plan.errors:
+                task.handle_plan_errors()
+                return False
+
+            tag_import_plan.save_actions(task)
+            task.log_start_execute()
+    except Exception:
+        # Keep the file when the task is saved with the error
+        task.upload = upload
+        raise
+    return True
+
+
+def _execute_import_batch(task: TagImportTask, batch_size: int) -> bool:
+    """
+    Executes the next `batch_size` actions of the saved plan of the task.
+
+    Returns True if there are more actions to execute.
+    """
+    with transaction.atomic():
+        # Lock the task, and check that no other process has executed this batch already,
+        # e.g. if the same celery task was run twice.
+        checkpoint = TagImportTask.objects.select_for_update().values_list(
+            "status", "executed_actions",
+        ).get(pk=task.pk)
+        if checkpoint != (TagImportTaskState.EXECUTING.value, task.executed_actions):
+            return False
+
+        tag_import_plan = TagImportPlan.load_actions(
+            task,
+            start=task.executed_actions,
+            stop=task.executed_actions + batch_size,
+        )
+        tag_import_plan.execute(task)
+        task.executed_actions += len(tag_import_plan.actions)
+        task.log_executed_actions()
+        if task.executed_actions < task.total_actions:
+            task.save()
+            return True
+
+        elapsed_time = (timezone.now() - task.creation_date).total_seconds()
+        task.end_success(round(elapsed_time, 5))
+    return False
+
+
 def get_last_import_status(taxonomy: Taxonomy) -> TagImportTaskState:
     """
     Get status of the last import task of the given taxonomy
@@ -171,10 +319,18 @@ def get_last_import_log(taxonomy: Taxonomy) -> str:
     """
     Get logs of the last import task of the given taxonomy
     """
+    return "".join(iter_last_import_log(taxonomy))
+
+
+def iter_last_import_log(taxonomy: Taxonomy) -> Iterator[str]:
+    """
+    Get logs of the last import task of the given taxonomy, a chunk at a time,
+    so that long logs don't need to be loaded all at once.
+    """
     task = _get_last_import_task(taxonomy)
     if task is None:
         raise ValueError("No import task was created yet.")
-    return task.log
+    return task.iter_log()
 
 
 def export_tags(taxonomy: Taxonomy, output_format: ParserFormat) -> str:
@@ -185,6 +341,28 @@ def export_tags(taxonomy: Taxonomy, output_format: ParserFormat) -> str:
     return parser.export(taxonomy)
 
 
+def iter_export_tags(taxonomy: Taxonomy, output_format: ParserFormat) -> Iterator[str]:
+    """
+    Yields all tag data of the given taxonomy a part at a time, e.g. to
+    stream the export of a large taxonomy.
+    """
+    parser = get_parser(output_format)
+    return parser.iter_export(taxonomy)
+
+
+def _check_no_import_running(taxonomy: Taxonomy):
+    """
+    Checks that exists only one task import in progress at a time per taxonomy
+    """
+    if not _check_unique_import_task(taxonomy):
+        raise ValueError(
+            _(
+                "There is an import task running. "
+                "Only one task per taxonomy can be created at a time."
+            )
+        )
+
+
 def _check_unique_import_task(taxonomy: Taxonomy) -> bool:
     """
     Verifies if there is another in progress import task for the
@@ -0,0 +1,279 @@
+"""
+Bulk execution of the actions of a tag import plan.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+
+from ..models import Tag, TagAncestor, TagCounts, TagSearchTrigram, Taxonomy
+from ..models.utils import BATCH_SIZE, batches, get_trigrams
+from .actions import CreateTag, DeleteTag, ImportAction, RenameTag, UpdateParentTag, WithoutChanges
+
+
+class BulkExecutionNotPossible(Exception):
+    """
+    Raised when the actions can't be executed in bulk, e.g. because they would
+    make a tag its own ancestor, so they need to be executed one by one.
+    """
+
+
+class BulkImportExecutor:
+    """
+    Executes the actions of an import plan with a few bulk queries, instead of
+    one or more queries for each action.
+
+    First, `replay()` runs the actions in order on the taxonomy's tags loaded in
+    memory. This gives the same log messages, and raises the same errors, as
+    executing the actions one by one. Then `execute()` writes the result:
+
+    1. Tags that moved get their new parent, or no parent for now if their new
+       parent is a new tag, so they aren't deleted along with their old parent.
+    2. The deleted tags are deleted in batches.
+    3. The new tags are created with bulk_create(), one level of the tree at a
+       time so that every parent is created before its children.
+    4. The tags that were renamed or moved, and their descendants, are updated
+       with bulk_update(), along with their TagAncestor rows, search index, and
+       TagCounts.
+    """
+
+    def __init__(self, taxonomy: Taxonomy):
+        self.taxonomy = taxonomy
+        self.log_messages: list[str] = []
+        self._existing_tags: list[Tag] = list(taxonomy.tag_set.all())
+        # The original (value, parent_id, depth, ancestor_path, sort_key) of each existing tag
+        self._original_fields = {
+            tag.pk: (tag.value, tag.parent_id, tag.depth, tag.ancestor_path, tag.sort_key)
+            for tag in self._existing_tags
+        }
+        self._new_tags: list[Tag] = []
+        # The id() of each tag deleted by the actions. Their descendants are deleted too.
+        self._deleted: set[int] = set()
+        self._by_external_id: dict[str | None, list[Tag]] = defaultdict(list)
+        self._by_value_without_external_id: dict[str, list[Tag]] = defaultdict(list)
+        tags_by_pk = {tag.pk: tag for tag in self._existing_tags}
+        for tag in self._existing_tags:
+            if tag.parent_id is not None:
+                # Link the parent in memory, so that tag.parent doesn't query the database
+                tag.parent = tags_by_pk[tag.parent_id]
+            self._add_to_index(tag)
+
+    @staticmethod
+    def _key(value: str | None) -> str | None:
+        """
+        Lookups of tags by external_id and value are case insensitive, like on the database.
+        """
+        return value.lower() if value is not None else None
+
+    def _add_to_index(self, tag: Tag) -> None:
+        """
+        Make `tag` available to the lookups
+        """
+        self._by_external_id[self._key(tag.external_id)].append(tag)
+        if tag.external_id is None:
+            self._by_value_without_external_id[tag.value.lower()].append(tag)
+
+    def _is_deleted(self, tag: Tag) -> bool:
+        """
+        Returns True if the tag or any of its ancestors have been deleted.
+        """
+        ancestor: Tag | None = tag
+        while ancestor is not None:
+            if id(ancestor) in self._deleted:
+                return True
+            ancestor = ancestor.parent
+        return False
+
+    def _get_one(self, tags: list[Tag]) -> Tag:
+        """
+        Returns the only tag in `tags` that hasn't been deleted, raising the same exceptions as QuerySet.get()
+        """
+        tags = [tag for tag in tags if not self._is_deleted(tag)]
+        if not tags:
+            raise Tag.DoesNotExist("Tag matching query does not exist.")
+        if len(tags) > 1:
+            raise Tag.MultipleObjectsReturned(f"get() returned more than one Tag -- it returned {len(tags)}!")
+        return tags[0]
+
+    def _get_by_external_id(self, external_id: str | None) -> Tag:
+        """
+        Same as taxonomy.tag_set.get(external_id=external_id)
+        """
+        return self._get_one(self._by_external_id.get(self._key(external_id), []))
+
+    def _get_tag(self, action: ImportAction) -> Tag:
+        """
+        Same as action._get_tag()
+        """
+        if action.tag.id:
+            try:
+                return self._get_by_external_id(action.tag.id)
+            except Tag.DoesNotExist:
+                pass
+        return self._get_one(self._by_value_without_external_id.get(action.tag.value.lower(), []))
+
+    def _get_parent(self, action: ImportAction) -> Tag | None:
+        """
+        Returns the new parent of the tag of `action`, if it has one.
+        """
+        if action.tag.parent_id is None:
+            return None
+        return self._get_by_external_id(action.tag.parent_id)
+
+    def _replay_create(self, action: CreateTag) -> None:
+        """
+        Same as action.execute(), in memory
+        """
+        tag = Tag(
+            taxonomy=self.taxonomy,
+            parent=self._get_parent(action),
+            value=action.tag.value,
+            external_id=action.tag.id,
+        )
+        self._new_tags.append(tag)
+        self._add_to_index(tag)
+
+    def _replay_update_parent(self, action: UpdateParentTag, tag: Tag) -> None:
+        """
+        Same as action.execute(), in memory
+        """
+        parent = self._get_parent(action) if action.tag.parent_id else None
+        ancestor = parent
+        while ancestor is not None:
+            if ancestor is tag:
+                raise BulkExecutionNotPossible(f"{action!r} would make {tag.display_str()} its own ancestor.")
+            ancestor = ancestor.parent
+        tag.parent = parent
+
+    def _replay_rename(self, action: RenameTag, tag: Tag) -> None:
+        """
+        Same as action.execute(), in memory
+        """
+        if tag.external_id is None:
+            self._by_value_without_external_id[tag.value.lower()].remove(tag)
+            self._by_value_without_external_id[action.tag.value.lower()].append(tag)
+        tag.value = action.tag.value
+
+    def _replay_delete(self, action: DeleteTag) -> None:
+        """
+        Same as action.execute(), in memory
+        """
+        try:
+            self._deleted.add(id(self._get_tag(action)))
+        except Tag.DoesNotExist:
+            pass  # The tag may be already cascade deleted if the parent tag was deleted
+
+    def _check_no_cycles(self) -> None:
+        """
+        Check that no existing tag is (incorrectly) its own ancestor, because
+        the tree needs to be walked from the root tags down.
+        """
+        checked: set[int] = set()
+        for tag in self._existing_tags:
+            seen: set[int] = set()
+            ancestor: Tag | None = tag
+            while ancestor is not None and id(ancestor) not in checked:
+                if id(ancestor) in seen:
+                    raise BulkExecutionNotPossible(f"{ancestor.display_str()} is its own ancestor.")
+                seen.add(id(ancestor))
+                ancestor = ancestor.parent
+            checked.update(seen)
+
+    def replay(self, actions: list[ImportAction]) -> None:
+        """
+        Run the actions in memory, and record their log messages.
+
+        Raises the same exceptions as executing the actions, or
+        BulkExecutionNotPossible if they can't be executed in bulk.
+        """
+        self._check_no_cycles()
+        for action in actions:
+            if isinstance(action, CreateTag):
+                self.log_messages.append(f"#{action.index}: {action.describe()} [Started]")
+                self._replay_create(action)
+            elif isinstance(action, UpdateParentTag):
+                tag = self._get_tag(action)
+                self.log_messages.append(f"#{action.index}: {action.describe(tag)} [Started]")
+                self._replay_update_parent(action, tag)
+            elif isinstance(action, RenameTag):
+                tag = self._get_tag(action)
+                self.log_messages.append(f"#{action.index}: {action.describe(tag)} [Started]")
+                self._replay_rename(action, tag)
+            elif isinstance(action, DeleteTag):
+                self.log_messages.append(f"#{action.index}: {action.describe()} [Started]")
+                self._replay_delete(action)
+            elif isinstance(action, WithoutChanges):
+                self.log_messages.append(f"#{action.index}: {action.describe()} [Started]")
+            else:
+                raise BulkExecutionNotPossible(f"{action!r} can't be executed in bulk.")
+            self.log_messages.append("Success")
+
+    def execute(self) -> None:
+        """
+        Write the result of the replayed actions to the database.
+        """
+        live_existing = [tag for tag in self._existing_tags if not self._is_deleted(tag)]
+        deleted_pks = [tag.pk for tag in self._existing_tags if self._is_deleted(tag)]
+        moved = [
+            tag for tag in live_existing
+            if (tag.parent.pk if tag.parent is not None else None) != self._original_fields[tag.pk][1]
+            or (tag.parent is not None and tag.parent.pk is None)
+        ]
+
+        # 1. Move tags away from the tags that will be deleted. Tags moving below a new tag are moved to the root
+        # for now, and moved again once their parent has been created.
+        Tag.objects.bulk_update(
+            [tag for tag in moved if tag.parent is None or tag.parent.pk is not None],
+            ["parent"],
+            batch_size=BATCH_SIZE,
+        )
+        for batch in batches([tag.pk for tag in moved if tag.parent is not None and tag.parent.pk is None]):
+            Tag.objects.filter(pk__in=batch).update(parent=None)
+
+        # 2. Delete tags
+        for batch in batches(deleted_pks):
+            Tag.objects.filter(pk__in=batch).delete_subtrees()
+
+        # 3. Create the new tags and compute the new lineage fields of the existing tags, one level at a time
+        levels: dict[int, list[Tag]] = defaultdict(list)
+        for tag in [*live_existing, *(tag for tag in self._new_tags if not self._is_deleted(tag))]:
+            depth = 0
+            ancestor = tag.parent
+            while ancestor is not None:
+                depth += 1
+                ancestor = ancestor.parent
+            levels[depth].append(tag)
+        for depth in sorted(levels):
+            new_tags: list[Tag] = []
+            for tag in levels[depth]:
+                if tag.parent is not None:
+                    # Pick up the ID of the parent, in case it was just created
+                    tag.parent = tag.parent
+                if tag.pk is None:
+                    new_tags.append(tag)
+                else:
+                    tag.update_lineage_fields()
+            # This also adds the TagCounts, TagAncestor and TagSearchTrigram rows of the new tags
+            Tag.objects.bulk_create(new_tags, batch_size=BATCH_SIZE)
+
+        # 4. Update the existing tags that changed
+        changed = [
+            tag for tag in live_existing
+            if (tag.value, tag.parent_id, tag.depth, tag.ancestor_path, tag.sort_key) != self._original_fields[tag.pk]
+        ]
+        Tag.objects.bulk_update(
+            changed,
+            ["value", "parent", "depth", "ancestor_path", "sort_key"],
+            batch_size=BATCH_SIZE,
+        )
+        renamed = [
+            tag for tag in changed
+            if get_trigrams(tag.value) != get_trigrams(self._original_fields[tag.pk][0])
+        ]
+        for batch in batches(renamed):
+            TagSearchTrigram.record_renamed_tags(batch)
+        for batch in batches([tag for tag in changed if tag.ancestor_path != self._original_fields[tag.pk][3]]):
+            TagAncestor.objects.filter(tag_id__in=[tag.pk for tag in batch]).delete()
+            TagAncestor.record_new_tags(batch)
+        if moved:
+            # The counts of the old and new ancestors of the moved tags have changed
+            TagCounts.recompute(self.taxonomy.pk)
@@ -3,12 +3,25 @@ Classes and functions to create an import plan and execution.
 """
 from __future__ import annotations
 
+from collections import defaultdict
+from typing import Iterable, Iterator
+
 from attrs import define
 from django.db import transaction
 
-from ..models import Tag, TagImportTask, Taxonomy
-from .actions import DeleteTag, ImportAction, UpdateParentTag, WithoutChanges, available_actions
+from ..models import Tag, TagImportTask, TagImportTaskAction, Taxonomy
+from ..models.utils import BATCH_SIZE
+from .actions import (
+    DeleteTag,
+    ImportAction,
+    IndexedActions,
+    TaxonomyTags,
+    UpdateParentTag,
+    WithoutChanges,
+    available_actions,
+)
 from .exceptions import ImportActionError
+from .executor import BulkExecutionNotPossible, BulkImportExecutor
 
 
 @define
@@ -41,19 +54,21 @@ class TagImportPlan:
     indexed_actions: dict
     actions_dict: dict
     taxonomy: Taxonomy
+    taxonomy_tags: TaxonomyTags | None
 
     def __init__(self, taxonomy: Taxonomy):
         self.actions = []
         self.errors = []
         self.taxonomy = taxonomy
         self.actions_dict = {}
+        self.taxonomy_tags = None
         self._init_indexed_actions()
 
     def _init_indexed_actions(self):
         """
         Initialize the `indexed_actions` dict
         """
-        self.indexed_actions = {}
+        self.indexed_actions = IndexedActions(taxonomy_tags=self.taxonomy_tags)
         for action in available_actions:
             self.indexed_actions[action.name] = []
 
@@ -75,23 +90,6 @@ class TagImportPlan:
         # Index the actions for search
         self.indexed_actions[action.name].append(action)
 
-    def _search_parent_update(
-        self,
-        child_external_id,
-        parent_external_id,
-    ):
-        """
-        Checks if there is a parent update in a child
-        """
-        for action in self.indexed_actions["update_parent"]:
-            if (
-                child_external_id == action.tag.id
-                and parent_external_id != action.tag.parent_id
-            ):
-                return True
-
-        return False
-
     def _get_tag_id(self, tag: Tag) -> str:
         """
         Get the id used on the Tag model.
@@ -107,22 +105,30 @@ class TagImportPlan:
     def _build_delete_actions(self, tags: dict):
         """
         Adds delete actions for `tags`
+
+        The children of each deleted tag that are not deleted themselves are
+        moved to the root first. They are found with set operations on the
+        parent map of the whole taxonomy, which is loaded in one query.
         """
+        if self.taxonomy_tags is not None:
+            taxonomy_tags = [
+                (tag.pk, tag.parent_id, tag.external_id, tag.value) for tag in self.taxonomy_tags.all
+            ]
+        else:
+            taxonomy_tags = list(self.taxonomy.tag_set.values_list("pk", "parent_id", "external_id", "value"))
+        deleted_pks = {tag.pk for tag in tags.values()}
+        parent_pks = {pk: parent_pk for pk, parent_pk, _external_id, _value in taxonomy_tags}
+        # The tags that are kept, but whose parent is deleted
+        orphan_pks = {pk for pk, parent_pk in parent_pks.items() if parent_pk in deleted_pks} - deleted_pks
+        orphans_by_parent: dict[int | None, list[TagItem]] = defaultdict(list)
+        for pk, parent_pk, external_id, value in taxonomy_tags:
+            if pk in orphan_pks:
+                orphans_by_parent[parent_pk].append(TagItem(id=external_id, value=value, parent_id=None))
+
         for tag in tags.values():
-            for child in tag.children.all():
-                # Verify if there is not a parent update before
-                if not self._search_parent_update(self._get_tag_id(child), self._get_tag_id(tag)):
-                    # Change parent to avoid delete childs
-                    if self._get_tag_id(child) not in tags:
-                        # Only update parent if the child is not going to be deleted
-                        self._build_action(
-                            UpdateParentTag,
-                            TagItem(
-                                id=child.external_id,
-                                value=child.value,
-                                parent_id=None,
-                            ),
-                        )
+            # Change parent to avoid delete childs
+            for orphan in orphans_by_parent.get(tag.pk, []):
+                self._build_action(UpdateParentTag, orphan)
 
             # Delete action
             self._build_action(
@@ -135,12 +141,14 @@ class TagImportPlan:
 
     def generate_actions(
         self,
-        tags: list[TagItem],
+        tags: Iterable[TagItem],
         replace=False,
     ):
         """
         Reads each tag and generates the corresponding actions.
 
+        `tags` can be any iterable, e.g. the tags yielded by `Parser.iter_import`.
+
         Validates each action and create respective errors
         If `replace` is True, then creates the delete action for tags
         that are in the existing taxonomy but not the new tags list.
@@ -151,18 +159,21 @@ class TagImportPlan:
         """
         self.actions.clear()
         self.errors.clear()
+        # Load the existing tags once, so that planning doesn't query the database for every tag
+        self.taxonomy_tags = TaxonomyTags(self.taxonomy)
         self._init_indexed_actions()
         tags_for_delete = {}
 
         if replace:
+            # Every tag is needed before the tags to delete are known
+            tags = list(tags)
+            tag_ids = {tag.id for tag in tags}
             tags_for_delete = {
-                self._get_tag_id(tag): tag for tag in self.taxonomy.tag_set.all()
+                tag_id: tag
+                for tag_id, tag in ((self._get_tag_id(tag), tag) for tag in self.taxonomy_tags.all)
+                if tag_id not in tag_ids
             }
 
-            for tag in tags:
-                if tag.id in tags_for_delete:
-                    tags_for_delete.pop(tag.id)
-
             # Delete all not readed tags
             self._build_delete_actions(tags_for_delete)
 
@@ -171,7 +182,7 @@ class TagImportPlan:
 
             # Check all available actions and add which ones should be executed
             for action_cls in available_actions:
-                if action_cls.applies_for(self.taxonomy, tag):
+                if action_cls.applies_for(self.taxonomy, tag, self.taxonomy_tags):
                     self._build_action(action_cls, tag)
                     has_action = True
 
@@ -179,33 +190,116 @@ class TagImportPlan:
                 # If it doesn't find an action, a "without changes" is added
                 self._build_action(WithoutChanges, tag)
 
-    def plan(self) -> str:
+    def iter_plan(self) -> Iterator[str]:
         """
-        Returns an string with the plan and errors
+        Yields the lines of the plan and errors
         """
-        result = (
-            f"Import plan for {self.taxonomy.name}\n"
-            "--------------------------------\n"
-        )
+        yield f"Import plan for {self.taxonomy.name}\n"
+        yield "--------------------------------\n"
         for action in self.actions:
-            result += f"#{action.index}: {str(action)}\n"
+            yield f"#{action.index}: {str(action)}\n"
 
         if self.errors:
-            result += "\nOutput errors\n" "--------------------------------\n"
+            yield "\nOutput errors\n"
+            yield "--------------------------------\n"
             for error in self.errors:
-                result += f"{str(error)}\n"
+                yield f"{str(error)}\n"
+
+    def plan(self) -> str:
+        """
+        Returns an string with the plan and errors
+        """
+        return "".join(self.iter_plan())
 
-        return result
+    def save_actions(self, task: TagImportTask):
+        """
+        Saves the actions of the plan with `task`, so that they can be
+        executed later, a batch at a time, with `load_actions()`.
+
+        The task still needs to be saved.
+        """
+        task.total_actions = len(self.actions)
+        task.executed_actions = 0
+        TagImportTaskAction.objects.bulk_create(
+            [
+                TagImportTaskAction(
+                    task=task,
+                    index=action.index,
+                    name=action.name,
+                    tag_id=action.tag.id,
+                    tag_value=action.tag.value,
+                    tag_parent_id=action.tag.parent_id,
+                    tag_index=action.tag.index,
+                )
+                for action in self.actions
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+    @classmethod
+    def load_actions(cls, task: TagImportTask, start: int = 0, stop: int | None = None) -> TagImportPlan:
+        """
+        Returns a plan with the actions saved by `save_actions()`, from the
+        action after `start` up to the action `stop`.
+
+        The actions were validated when the plan was generated, so they are not
+        validated again.
+        """
+        plan = cls(task.taxonomy)
+        actions_by_name = {action_cls.name: action_cls for action_cls in available_actions}
+        saved_actions = task.actions.filter(index__gt=start).order_by("index")
+        if stop is not None:
+            saved_actions = saved_actions.filter(index__lte=stop)
+        for saved_action in saved_actions:
+            tag = TagItem(
+                # The tags to delete may have no external ID
+                id=saved_action.tag_id,  # type: ignore[arg-type]
+                value=saved_action.tag_value,
+                index=saved_action.tag_index,
+                parent_id=saved_action.tag_parent_id,
+            )
+            plan.actions.append(actions_by_name[saved_action.name](plan.taxonomy, tag, saved_action.index))
+        return plan
 
     @transaction.atomic()
     def execute(self, task: TagImportTask | None = None):
         """
-        Executes each action
+        Executes each action, with a few bulk queries when possible
 
         If task is set, creates logs for each action
         """
         if self.errors:
             return
+        executor = BulkImportExecutor(self.taxonomy)
+        try:
+            executor.replay(self.actions)
+        except BulkExecutionNotPossible:
+            self._execute_one_by_one(task)
+            return
+        except Exception:
+            # Log the actions up to the one that failed, like when executing them one by one
+            self._add_logs(task, executor.log_messages)
+            raise
+        self._add_logs(task, executor.log_messages)
+        executor.execute()
+        if task:
+            task.save()
+
+    def _add_logs(self, task: TagImportTask | None, messages: list[str]):
+        """
+        Adds the log messages of the executed actions to the task, if it's set.
+        """
+        if task:
+            for message in messages:
+                task.add_log(message, save=False)
+
+    def _execute_one_by_one(self, task: TagImportTask | None = None):
+        """
+        Executes each action on its own.
+
+        This is much slower than executing them in bulk, but works for any
+        actions, e.g. ones that would make a tag its own ancestor.
+        """
         for action in self.actions:
             # Avoid to save each log because it is slow and costs a lot in memory
             # It is necessary to save at the end.
@@ -7,8 +7,9 @@ import csv
 import json
 from enum import Enum
 from io import StringIO, TextIOWrapper
-from typing import BinaryIO
+from typing import BinaryIO, Iterable, Iterator, TextIO
 
+from django.db.models import F, QuerySet
 from django.utils.translation import gettext as _
 
 from ..models import Taxonomy
@@ -37,6 +38,9 @@ class Parser:
     `required_fields` or `optional_fields` depending on the field type
 
     To create a new Parser you need to implement `_load_data` and `_export_data`
+
+    Both directions work incrementally, so that large files don't need to be
+    loaded in memory all at once.
     """
 
     required_fields = ["id", "value"]
@@ -50,6 +54,8 @@ class Parser:
     empty_field_error = TagParserError
     # We can change the initial row/index
     inital_row = 1
+    # How many tags to load from the database at a time when exporting
+    export_chunk_size = 2000
 
     @classmethod
     def parse_import(cls, file: BinaryIO) -> tuple[list[TagItem], list[TagParserError]]:
@@ -59,16 +65,30 @@ class Parser:
         Top function that calls `_load_data` and `_parse_tags`.
         Handle errors returned by both functions.
         """
+        load_errors: list[TagParserError] = []
+        parse_errors: list[TagParserError] = []
         try:
-            tags_data, load_errors = cls._load_data(file)
-            if load_errors:
-                return [], load_errors
-        except Exception as error:
-            raise error
+            tags = list(cls._parse_tags(cls._load_data(file, load_errors), parse_errors))
         finally:
             file.close()
 
-        return cls._parse_tags(tags_data)
+        if load_errors:
+            return [], load_errors
+        return tags, parse_errors
+
+    @classmethod
+    def iter_import(cls, file: BinaryIO, errors: list[TagParserError]) -> Iterator[TagItem]:
+        """
+        Same as `parse_import`, but yields each tag as soon as it's parsed,
+        and adds the errors to `errors` as they are found.
+
+        The tags are only valid if there are no errors once all of them have
+        been read.
+        """
+        try:
+            yield from cls._parse_tags(cls._load_data(file, errors), errors)
+        finally:
+            file.close()
 
     @classmethod
     def export(cls, taxonomy: Taxonomy) -> str:
@@ -76,25 +96,34 @@ class Parser:
         Returns all tags in taxonomy.
         The output file can be used to recreate the taxonomy with `parse_import`
         """
+        return "".join(cls.iter_export(taxonomy))
+
+    @classmethod
+    def iter_export(cls, taxonomy: Taxonomy) -> Iterator[str]:
+        """
+        Same as `export`, but yields the output a part at a time, so that
+        large taxonomies can be streamed without holding all of it in memory.
+        """
         tags = cls._load_tags_for_export(taxonomy)
         return cls._export_data(tags, taxonomy)
 
     @classmethod
-    def _load_data(cls, file: BinaryIO) -> tuple[list[dict], list[TagParserError]]:
+    def _load_data(cls, file: BinaryIO, errors: list[TagParserError]) -> Iterator[dict]:
         """
         Each parser implements this function according to its format.
-        This function reads the file and returns a list with the values of each tag.
+        This function reads the file and yields the values of each tag.
 
         This function does not do field validations, it only does validations of the
-        file structure in the parser format. Field validations are done in `_parse_tags`
+        file structure in the parser format, and adds those errors to `errors`.
+        Field validations are done in `_parse_tags`
         """
         raise NotImplementedError
 
     @classmethod
-    def _export_data(cls, tags: list[dict], taxonomy: Taxonomy) -> str:
+    def _export_data(cls, tags: Iterable[dict], taxonomy: Taxonomy) -> Iterator[str]:
         """
         Each parser implements this function according to its format.
-        Returns a string with tags data in the parser format.
+        Yields the tags data in the parser format, a part at a time.
         Can use `taxonomy` to export taxonomy metadata.
 
         It must be implemented in such a way that the output of
@@ -104,16 +133,14 @@ class Parser:
 
     @classmethod
     def _parse_tags(
-        cls, tags_data: list[dict]
-    ) -> tuple[list[TagItem], list[TagParserError]]:
+        cls, tags_data: Iterable[dict], errors: list[TagParserError]
+    ) -> Iterator[TagItem]:
         """
         Validate the required fields of each tag.
 
-        Return a list of TagItems
-        and a list of validation errors.
+        Yields the TagItems,
+        and adds the validation errors to `errors`.
         """
-        tags = []
-        errors = []
         row = cls.inital_row
         for tag in tags_data:
             has_error = False
@@ -155,32 +182,185 @@ class Parser:
             for opt_field in cls.optional_fields:
                 tag_data[opt_field] = tag.get(opt_field) or None
 
-            tags.append(TagItem(**tag_data))
-
-        return tags, errors
+            yield TagItem(**tag_data)
 
     @classmethod
-    def _load_tags_for_export(cls, taxonomy: Taxonomy) -> list[dict]:
+    def _load_tags_for_export(cls, taxonomy: Taxonomy) -> Iterator[dict]:
         """
-        Returns a list of taxonomy's tags in the form of a dictionary
+        Yields the taxonomy's tags in the form of a dictionary
         with required and optional fields
 
         The tags are ordered by hierarchy, first, parents and then children.
         `get_filtered_tags` is in charge of returning this in a hierarchical
         way.
+
+        The tags are read with a server-side cursor where the database supports it.
         """
-        tags = taxonomy.get_filtered_tags().all()
-        result = []
-        for tag in tags:
+        tags: QuerySet = taxonomy.get_filtered_tags()
+        if not taxonomy.allow_free_text:
+            # Load the ID of each parent along with its child, instead of looking for the parent in the results
+            tags = tags.annotate(_parent_external_id=F("parent__external_id"), _parent_id=F("parent_id"))
+        for tag in tags.iterator(chunk_size=cls.export_chunk_size):
             result_tag = {
                 "id": tag["external_id"] or tag["_id"],
                 "value": tag["value"],
             }
             if tag["parent_value"]:
-                parent_tag = next(t for t in tags if t["value"] == tag["parent_value"])
-                result_tag["parent_id"] = parent_tag["external_id"] or parent_tag["_id"]
-            result.append(result_tag)
-        return result
+                result_tag["parent_id"] = tag["_parent_external_id"] or tag["_parent_id"]
+            yield result_tag
+
+
+class _IncrementalJSONReader:
+    """
+    Reads the "tags" array of a .json import file one tag at a time, so that
+    the whole document never needs to be in memory.
+
+    Only the root object and the "tags" array are parsed here. Each of their
+    values is decoded with the standard JSON decoder, and errors are raised
+    as the same json.JSONDecodeError that json.load() would raise.
+
+    A value that can't be decoded is read further in case it's just
+    incomplete, but only up to `max_value_size` characters, so that a syntax
+    error doesn't make us read the rest of the file into memory.
+    """
+
+    read_size = 64 * 1024
+    max_value_size = 4 * 1024 * 1024
+
+    def __init__(self, file: TextIO):
+        self.file = file
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.has_tags = False
+        self.decoder = json.JSONDecoder()
+        # Where the buffer starts in the document, for the position of errors
+        self.offset = 0
+        self.line = 1
+        self.line_start = 0
+
+    def _error(self, message: str, pos: int) -> json.JSONDecodeError:
+        """
+        Returns the error at `pos` in the buffer, with its position in the whole document.
+        """
+        error = json.JSONDecodeError(message, self.buffer, pos)
+        if error.lineno == 1:
+            error.colno = self.offset + pos - self.line_start + 1
+        error.lineno += self.line - 1
+        error.pos += self.offset
+        error.args = (f"{message}: line {error.lineno} column {error.colno} (char {error.pos})",)
+        return error
+
+    def _fill(self) -> bool:
+        """
+        Read more of the file into the buffer, dropping what has already been
+        parsed. Returns False at the end of the file.
+        """
+        if self.eof:
+            return False
+        # Read at least as much as is left in the buffer, so that a long value isn't copied again for every read
+        data = self.file.read(max(self.read_size, len(self.buffer) - self.pos))
+        if not data:
+            self.eof = True
+            return False
+        parsed = self.buffer[:self.pos]
+        newlines = parsed.count("\n")
+        if newlines:
+            self.line += newlines
+            self.line_start = self.offset + parsed.rfind("\n") + 1
+        self.offset += self.pos
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """
+        Skip whitespace, and return the next character, or "" at the end of the file.
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\n\r":
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def _expect(self, char: str, message: str) -> None:
+        """
+        Skip the next character, which must be `char`.
+        """
+        if self._peek() != char:
+            raise self._error(message, self.pos)
+        self.pos += 1
+
+    def _decode_value(self):
+        """
+        Decode the next JSON value, reading more of the file until it's complete.
+        """
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as error:
+                if len(self.buffer) - self.pos < self.max_value_size and self._fill():
+                    continue
+                raise self._error(error.msg, error.pos) from error
+            if end == len(self.buffer) and self._fill():
+                continue  # The value may continue, e.g. a number
+            self.pos = end
+            return value
+
+    def _iter_array(self) -> Iterator:
+        """
+        Yields the items of the array that starts at the next character.
+        """
+        self._expect("[", "Expecting value")
+        if self._peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self._decode_value()
+            char = self._peek()
+            self.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise self._error("Expecting ',' delimiter", self.pos - 1)
+
+    def iter_tags(self) -> Iterator:
+        """
+        Yields the items of the "tags" field of the root object.
+
+        Sets `has_tags` if the field was found.
+        """
+        if self._peek() != "{":
+            # This can't have tags, but check that it's valid json
+            self._decode_value()
+        else:
+            self.pos += 1
+            char = self._peek()
+            while char != "}":
+                if char != '"':
+                    raise self._error("Expecting property name enclosed in double quotes", self.pos)
+                key = self._decode_value()
+                self._expect(":", "Expecting ':' delimiter")
+                if key == "tags":
+                    self.has_tags = True
+                    if self._peek() == "[":
+                        yield from self._iter_array()
+                    else:
+                        yield from self._decode_value()
+                else:
+                    self._decode_value()
+                char = self._peek()
+                if char == ",":
+                    self.pos += 1
+                    char = self._peek()
+                    if char == "}":
+                        raise self._error("Expecting property name enclosed in double quotes", self.pos)
+                elif char != "}":
+                    raise self._error("Expecting ',' delimiter", self.pos)
+            self.pos += 1
+        if self._peek():
+            raise self._error("Extra data", self.pos)
 
 
 class JSONParser(Parser):
@@ -207,40 +387,49 @@ class JSONParser(Parser):
     inital_row = 0
 
     @classmethod
-    def _load_data(cls, file: BinaryIO) -> tuple[list[dict], list[TagParserError]]:
+    def _load_data(cls, file: BinaryIO, errors: list[TagParserError]) -> Iterator[dict]:
         """
         Read a .json file and validates the root structure of the json
+
+        The tags are decoded one at a time, as the file is read.
         """
         file.seek(0)
+        # Detect UTF-16 and UTF-32 files (with or without a BOM) like json.load() does
+        encoding = json.detect_encoding(file.read(4))
+        file.seek(0)
+        reader = _IncrementalJSONReader(TextIOWrapper(file, encoding=encoding))
         try:
-            tags_data = json.load(file)
+            yield from reader.iter_tags()
         except json.JSONDecodeError as error:
-            return [], [
-                InvalidFormat(tag=None, input_format=cls.format.value, message=str(error))
-            ]
-        if "tags" not in tags_data:
-            return [], [
+            errors.append(InvalidFormat(tag=None, input_format=cls.format.value, message=str(error)))
+            return
+        if not reader.has_tags:
+            errors.append(
                 InvalidFormat(
                     tag=None,
                     input_format=cls.format.value,
                     message=_("Missing 'tags' field on the .json file"),
                 )
-            ]
-
-        tags_data = tags_data.get("tags")
-        return tags_data, []
+            )
 
     @classmethod
-    def _export_data(cls, tags: list[dict], taxonomy: Taxonomy) -> str:
+    def _export_data(cls, tags: Iterable[dict], taxonomy: Taxonomy) -> Iterator[str]:
         """
         Export tags and taxonomy metadata in JSON format
+
+        The output is the same as `json.dumps()` of the whole document, but the
+        tags are written one at a time.
         """
-        json_result = {
+        metadata = json.dumps({
             "name": taxonomy.name,
             "description": taxonomy.description,
-            "tags": tags,
-        }
-        return json.dumps(json_result)
+        })
+        yield f"{metadata[:-1]}, \"tags\": ["
+        separator = ""
+        for tag in tags:
+            yield f"{separator}{json.dumps(tag)}"
+            separator = ", "
+        yield "]}"
 
 
 class CSVParser(Parser):
@@ -260,24 +449,29 @@ class CSVParser(Parser):
     inital_row = 2
 
     @classmethod
-    def _load_data(cls, file: BinaryIO) -> tuple[list[dict], list[TagParserError]]:
+    def _load_data(cls, file: BinaryIO, errors: list[TagParserError]) -> Iterator[dict]:
         """
         Read a .csv file and validates the header fields
+
+        The rows are read one at a time.
         """
         file.seek(0)
         text_tags = TextIOWrapper(file, encoding="utf-8")
         csv_reader = csv.DictReader(text_tags)
         header_fields = csv_reader.fieldnames
-        errors = cls._verify_header(list(header_fields or []))
-        if errors:
-            return [], errors
-        return list(csv_reader), []
+        header_errors = cls._verify_header(list(header_fields or []))
+        if header_errors:
+            errors.extend(header_errors)
+            return
+        yield from csv_reader
 
     @classmethod
-    def _export_data(cls, tags: list[dict], taxonomy: Taxonomy) -> str:
+    def _export_data(cls, tags: Iterable[dict], taxonomy: Taxonomy) -> Iterator[str]:
         """
         Export tags in CSV format
 
+        The rows are written to a small buffer, which is yielded and emptied
+        every `export_chunk_size` rows.
         """
         fields = cls.required_fields + cls.optional_fields
 
@@ -285,11 +479,14 @@ class CSVParser(Parser):
             csv_writer = csv.DictWriter(csv_buffer, fieldnames=fields)
             csv_writer.writeheader()
 
-            for tag in tags:
+            for row, tag in enumerate(tags, start=1):
                 csv_writer.writerow(tag)
+                if row % cls.export_chunk_size == 0:
+                    yield csv_buffer.getvalue()
+                    csv_buffer.seek(0)
+                    csv_buffer.truncate()
 
-            csv_string = csv_buffer.getvalue()
-            return csv_string
+            yield csv_buffer.getvalue()
 
     @classmethod
     def _verify_header(cls, header_fields: list[str]) -> list[TagParserError]:
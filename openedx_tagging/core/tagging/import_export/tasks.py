@@ -9,8 +9,8 @@ from celery import shared_task  # type: ignore[import]
 
 import openedx_tagging.core.tagging.import_export.api as import_export_api
 
-from ..models import Taxonomy
-from .import_plan import TagImportPlan, TagImportTask
+from ..models import TagImportTask, Taxonomy
+from .import_plan import TagImportPlan
 from .parsers import ParserFormat
 
 
@@ -23,6 +23,9 @@ def import_tags_task(
 ) -> tuple[bool, TagImportTask, TagImportPlan | None]:
     """
     Runs import on a celery task
+
+    The whole import runs in one step. For large files, prefer
+    `import_export_api.start_import_tags()` and `run_import_task`.
     """
     return import_export_api.import_tags(
         taxonomy,
@@ -32,6 +35,21 @@ def import_tags_task(
     )
 
 
+@shared_task(acks_late=True)
+def run_import_task(task_id: int) -> None:
+    """
+    Runs the next step of an import task created with
+    `import_export_api.start_import_tags()` or resumed with
+    `import_export_api.resume_import_tags()`, and queues the step after it.
+
+    Each step commits its progress, so running this again for a task that was
+    interrupted continues it.
+    """
+    task = TagImportTask.objects.get(pk=task_id)
+    if import_export_api.run_import_task_step(task):
+        run_import_task.delay(task_id)
+
+
 @shared_task
 def export_tags_task(
     taxonomy: Taxonomy,
@@ -0,0 +1,54 @@
+"""
+Management command to recompute the stored TagCounts (and other derived data) of tags.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ...models import Tag, TagAncestor, TagCounts, TagSearchTrigram, Taxonomy
+
+
+class Command(BaseCommand):
+    """
+    Recompute the child, descendant, and usage counts of every tag in the given
+    taxonomies (or in all taxonomies) from scratch, along with the rest of the
+    data derived from the tags: their lineage fields (depth, ancestor_path, and
+    sort_key), TagAncestor rows, and search index.
+
+    This is all normally kept up to date automatically, so this is only needed
+    to repair it if it somehow gets out of sync, e.g. after tags or object tags
+    were created using raw SQL, historical models in data migrations, or
+    "loaddata".
+    """
+
+    help = "Recompute the stored child, descendant, and usage counts, lineage, and search index of tags."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--taxonomy-id",
+            dest="taxonomy_ids",
+            action="append",
+            type=int,
+            help="ID of a taxonomy whose tag counts should be recomputed. May be repeated. Default: all taxonomies.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Recompute the tag data, one taxonomy at a time.
+        """
+        taxonomy_ids = options["taxonomy_ids"]
+        if taxonomy_ids:
+            existing_ids = Taxonomy.objects.filter(pk__in=taxonomy_ids).values_list("pk", flat=True)
+            missing_ids = set(taxonomy_ids) - set(existing_ids)
+            if missing_ids:
+                raise CommandError(f"Taxonomies not found: {sorted(missing_ids)}")
+        else:
+            taxonomy_ids = list(Tag.objects.order_by().values_list("taxonomy_id", flat=True).distinct())
+
+        for taxonomy_id in taxonomy_ids:
+            with transaction.atomic():
+                # The lineage is computed first, since everything else is derived from it
+                tags = Tag.recompute_lineage(taxonomy_id)
+                TagAncestor.recompute(taxonomy_id, tags)
+                TagSearchTrigram.recompute(taxonomy_id, tags)
+                num_tags = TagCounts.recompute(taxonomy_id)
+            self.stdout.write(f"Recomputed the counts and other data of {num_tags} tags in taxonomy {taxonomy_id}.")
@@ -0,0 +1,62 @@
+"""
+Management command to sync the tags of model-based system-defined taxonomies with their models.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import Taxonomy
+from ...models.system_defined import ModelSystemDefinedTaxonomy
+
+
+class Command(BaseCommand):
+    """
+    Update the values of the tags of the given model-based system-defined
+    taxonomies (or of all of them) from their model instances, e.g. the
+    usernames of renamed users, along with the values stored in the object
+    tags that use them.
+
+    The tags are normally only updated when they are looked up again, so this
+    can be run periodically to update the ones that aren't.
+    """
+
+    help = "Update the values of the tags of model-based system-defined taxonomies from their models."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--taxonomy-id",
+            dest="taxonomy_ids",
+            action="append",
+            type=int,
+            help="ID of a taxonomy whose tags should be synced. May be repeated. Default: all model-based taxonomies.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="How many tags to compare with their model instances at a time.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Sync the tags, one taxonomy at a time.
+        """
+        taxonomy_ids = options["taxonomy_ids"]
+        if taxonomy_ids:
+            taxonomies = [taxonomy.cast() for taxonomy in Taxonomy.objects.filter(pk__in=taxonomy_ids)]
+            missing_ids = set(taxonomy_ids) - {taxonomy.pk for taxonomy in taxonomies}
+            if missing_ids:
+                raise CommandError(f"Taxonomies not found: {sorted(missing_ids)}")
+            invalid_ids = [
+                taxonomy.pk for taxonomy in taxonomies if not isinstance(taxonomy, ModelSystemDefinedTaxonomy)
+            ]
+            if invalid_ids:
+                raise CommandError(f"Taxonomies are not model-based system-defined taxonomies: {sorted(invalid_ids)}")
+        else:
+            taxonomies = [
+                taxonomy
+                for taxonomy in (taxonomy.cast() for taxonomy in Taxonomy.objects.exclude(_taxonomy_class=None))
+                if isinstance(taxonomy, ModelSystemDefinedTaxonomy)
+            ]
+
+        for taxonomy in taxonomies:
+            num_tags = taxonomy.sync_tags(batch_size=options["batch_size"])
+            self.stdout.write(f"Updated {num_tags} tags in taxonomy {taxonomy.pk}.")
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:40
+
+from django.db import migrations, models
+
+import openedx_learning.lib.fields
+
+# Copy of Tag's TAG_SORT_KEY_MAX_LENGTH at the time of this migration
+TAG_SORT_KEY_MAX_LENGTH = 750
+
+
+def backfill_tag_lineage(apps, schema_editor):
+    """
+    Compute depth, ancestor_path, and sort_key for all existing tags.
+
+    Historical models don't have Tag.save(), so this walks the tree of each
+    taxonomy from the roots down, the same way that save() would.
+    """
+    Tag = apps.get_model("oel_tagging", "Tag")
+    children_of: dict = {}
+    for pk, parent_id, value in Tag.objects.values_list("pk", "parent_id", "value").iterator():
+        children_of.setdefault(parent_id, []).append((pk, value))
+
+    to_update = []
+    # (parent_id, depth, ancestor_path, sort_key prefix) for each level we still need to process
+    pending = [(None, 0, "", "")]
+    while pending:
+        parent_id, depth, ancestor_path, sort_key_prefix = pending.pop()
+        for pk, value in children_of.get(parent_id, []):
+            sort_key = f"{sort_key_prefix}{value.lower()}\t"[:TAG_SORT_KEY_MAX_LENGTH]
+            to_update.append(Tag(pk=pk, depth=depth, ancestor_path=ancestor_path, sort_key=sort_key))
+            pending.append((pk, depth + 1, f"{ancestor_path}{pk}/", sort_key))
+    Tag.objects.bulk_update(to_update, ["depth", "ancestor_path", "sort_key"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oel_tagging', '0018_objecttag_is_copied'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='ancestor_path',
+            field=openedx_learning.lib.fields.MultiCollationCharField(blank=True, db_collations={'mysql': 'utf8mb4_bin', 'sqlite': 'BINARY'}, default='', editable=False, help_text="IDs of this tag's ancestors, starting from the root, each followed by a '/'. Empty for root tags.", max_length=255),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='How many ancestors this tag has. Zero for root tags.'),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='sort_key',
+            field=openedx_learning.lib.fields.MultiCollationCharField(blank=True, db_collations={'mysql': 'utf8mb4_unicode_ci', 'sqlite': 'NOCASE'}, default='', editable=False, help_text="Lowercase values of this tag's lineage, each followed by a TAB character. Used to sort tags in tree order.", max_length=750),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['taxonomy', 'ancestor_path'], name='oel_tagging_taxonom_9d68f0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['taxonomy', 'sort_key'], name='oel_tagging_taxonom_1005a0_idx'),
+        ),
+        migrations.RunPython(backfill_tag_lineage, reverse_code=migrations.RunPython.noop),
+    ]
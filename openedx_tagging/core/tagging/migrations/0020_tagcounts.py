@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_tag_counts(apps, schema_editor):
+    """
+    Compute the TagCounts of all existing tags, one taxonomy at a time.
+
+    This is the same as what the "recompute_tag_counts" management command
+    does, but using the historical models.
+    """
+    Tag = apps.get_model("oel_tagging", "Tag")
+    TagCounts = apps.get_model("oel_tagging", "TagCounts")
+    ObjectTag = apps.get_model("oel_tagging", "ObjectTag")
+
+    taxonomy_ids = Tag.objects.order_by().values_list("taxonomy_id", flat=True).distinct()
+    for taxonomy_id in list(taxonomy_ids):
+        tags = list(Tag.objects.filter(taxonomy_id=taxonomy_id).values_list("pk", "parent_id", "ancestor_path"))
+        usage_counts = dict(
+            ObjectTag.objects.filter(tag__taxonomy_id=taxonomy_id).order_by().values("tag_id").annotate(
+                count=models.Count("id"),
+            ).values_list("tag_id", "count")
+        )
+        counts = {pk: TagCounts(tag_id=pk, usage_count=usage_counts.get(pk, 0)) for pk, _, _ in tags}
+        for pk, parent_id, ancestor_path in tags:
+            if parent_id in counts:
+                counts[parent_id].child_count += 1
+            ancestor_ids = [int(ancestor_id) for ancestor_id in ancestor_path.split("/") if ancestor_id]
+            for ancestor_id in ancestor_ids:
+                if ancestor_id in counts:
+                    counts[ancestor_id].descendant_count += 1
+                    counts[ancestor_id].implicit_usage_count += counts[pk].usage_count
+            counts[pk].implicit_usage_count += counts[pk].usage_count
+        TagCounts.objects.bulk_create(counts.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oel_tagging', '0019_tag_lineage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagCounts',
+            fields=[
+                ('tag', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counts', serialize=False, to='oel_tagging.tag')),
+                ('child_count', models.IntegerField(default=0, help_text='How many child tags this tag has.')),
+                ('descendant_count', models.IntegerField(default=0, help_text='How many descendant tags (children, grandchildren, etc.) this tag has.')),
+                ('usage_count', models.IntegerField(default=0, help_text='How many object tags use this tag.')),
+                ('implicit_usage_count', models.IntegerField(default=0, help_text='How many object tags use this tag or any of its descendants.')),
+            ],
+            options={
+                'verbose_name_plural': 'Tag counts',
+            },
+        ),
+        migrations.RunPython(backfill_tag_counts, reverse_code=migrations.RunPython.noop),
+    ]
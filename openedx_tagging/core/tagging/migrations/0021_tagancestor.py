@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_tag_ancestors(apps, schema_editor):
+    """
+    Create the TagAncestor rows of all existing tags, from their ancestor_path.
+    """
+    Tag = apps.get_model("oel_tagging", "Tag")
+    TagAncestor = apps.get_model("oel_tagging", "TagAncestor")
+    batch = []
+    for pk, ancestor_path in Tag.objects.values_list("pk", "ancestor_path").iterator():
+        ancestor_ids = [int(ancestor_id) for ancestor_id in ancestor_path.split("/") if ancestor_id]
+        batch.extend(TagAncestor(tag_id=pk, ancestor_id=ancestor_id) for ancestor_id in [*ancestor_ids, pk])
+        if len(batch) >= 1000:
+            TagAncestor.objects.bulk_create(batch)
+            batch = []
+    TagAncestor.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oel_tagging', '0020_tagcounts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagAncestor',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('ancestor', models.ForeignKey(help_text='An ancestor of the tag, or the tag itself.', on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='oel_tagging.tag')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='oel_tagging.tag')),
+            ],
+            options={
+                'unique_together': {('tag', 'ancestor')},
+            },
+        ),
+        migrations.RunPython(backfill_tag_ancestors, reverse_code=migrations.RunPython.noop),
+    ]
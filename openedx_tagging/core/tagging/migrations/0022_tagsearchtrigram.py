@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+import openedx_learning.lib.fields
+from openedx_tagging.core.tagging.models.utils import get_trigrams
+
+
+def backfill_tag_search_trigrams(apps, schema_editor):
+    """
+    Index the values of all existing tags.
+    """
+    Tag = apps.get_model("oel_tagging", "Tag")
+    TagSearchTrigram = apps.get_model("oel_tagging", "TagSearchTrigram")
+    batch = []
+    for pk, taxonomy_id, value in Tag.objects.values_list("pk", "taxonomy_id", "value").iterator():
+        batch.extend(
+            TagSearchTrigram(tag_id=pk, taxonomy_id=taxonomy_id, trigram=trigram)
+            for trigram in sorted(get_trigrams(value))
+        )
+        if len(batch) >= 1000:
+            TagSearchTrigram.objects.bulk_create(batch)
+            batch = []
+    TagSearchTrigram.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oel_tagging', '0021_tagancestor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagSearchTrigram',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('trigram', openedx_learning.lib.fields.MultiCollationCharField(db_collations={'mysql': 'utf8mb4_bin', 'sqlite': 'BINARY'}, max_length=3)),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_trigrams', to='oel_tagging.tag')),
+                ('taxonomy', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='oel_tagging.taxonomy')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['taxonomy', 'trigram', 'tag'], name='oel_tagging_taxonom_d5a0f2_idx')],
+                'unique_together': {('tag', 'trigram')},
+            },
+        ),
+        migrations.RunPython(backfill_tag_search_trigrams, reverse_code=migrations.RunPython.noop),
+    ]
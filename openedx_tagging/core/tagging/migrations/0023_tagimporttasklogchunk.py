@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+LOG_CHUNK_SIZE = 64 * 1024
+
+
+def move_logs_to_chunks(apps, schema_editor):
+    """
+    Split the log of each existing import task into TagImportTaskLogChunk rows.
+    """
+    TagImportTask = apps.get_model("oel_tagging", "TagImportTask")
+    TagImportTaskLogChunk = apps.get_model("oel_tagging", "TagImportTaskLogChunk")
+    for task_id, log in TagImportTask.objects.values_list("id", "log").iterator():
+        TagImportTaskLogChunk.objects.bulk_create([
+            TagImportTaskLogChunk(task_id=task_id, text=log[start:start + LOG_CHUNK_SIZE])
+            for start in range(0, len(log or ""), LOG_CHUNK_SIZE)
+        ])
+
+
+def move_chunks_to_logs(apps, schema_editor):
+    """
+    Join the TagImportTaskLogChunk rows of each import task back into its log.
+    """
+    TagImportTask = apps.get_model("oel_tagging", "TagImportTask")
+    for task in TagImportTask.objects.iterator():
+        task.log = "".join(task.log_chunks.order_by("id").values_list("text", flat=True))
+        task.save(update_fields=["log"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oel_tagging', '0022_tagsearchtrigram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagImportTaskLogChunk',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('text', models.TextField(help_text='Action execution logs')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='log_chunks', to='oel_tagging.tagimporttask')),
+            ],
+        ),
+        # So that the field can be added back to existing tasks, when migrating backwards:
+        migrations.AlterField(
+            model_name='tagimporttask',
+            name='log',
+            field=models.TextField(blank=True, default='', help_text='Action execution logs'),
+        ),
+        migrations.RunPython(move_logs_to_chunks, reverse_code=move_chunks_to_logs),
+        migrations.RemoveField(
+            model_name='tagimporttask',
+            name='log',
+        ),
+    ]
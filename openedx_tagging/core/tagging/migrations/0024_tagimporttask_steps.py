@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oel_tagging', '0023_tagimporttasklogchunk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tagimporttask',
+            name='executed_actions',
+            field=models.PositiveIntegerField(default=0, help_text='Number of actions of the import plan that have been executed'),
+        ),
+        migrations.AddField(
+            model_name='tagimporttask',
+            name='parser_format',
+            field=models.CharField(blank=True, default='', help_text='Format of the uploaded file', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='tagimporttask',
+            name='replace',
+            field=models.BooleanField(default=False, help_text='Whether the tags that are not in the uploaded file are deleted'),
+        ),
+        migrations.AddField(
+            model_name='tagimporttask',
+            name='total_actions',
+            field=models.PositiveIntegerField(default=0, help_text='Number of actions in the import plan'),
+        ),
+        migrations.AddField(
+            model_name='tagimporttask',
+            name='upload',
+            field=models.BinaryField(help_text='Uploaded file, until the import has been planned', null=True),
+        ),
+        migrations.CreateModel(
+            name='TagImportTaskAction',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('index', models.PositiveIntegerField(help_text='Position of the action in the plan, from 1')),
+                ('name', models.CharField(help_text='Name of the action', max_length=20)),
+                ('tag_id', models.TextField(null=True)),
+                ('tag_value', models.TextField()),
+                ('tag_parent_id', models.TextField(null=True)),
+                ('tag_index', models.IntegerField(null=True)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='actions', to='oel_tagging.tagimporttask')),
+            ],
+            options={
+                'unique_together': {('task', 'index')},
+            },
+        ),
+    ]
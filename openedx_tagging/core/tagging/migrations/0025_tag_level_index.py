@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oel_tagging', '0024_tagimporttask_steps'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['taxonomy', 'parent', 'value'], name='oel_tagging_taxonom_1eff46_idx'),
+        ),
+    ]
@@ -1,6 +1,6 @@
 """
 Core models for Tagging
 """
-from .base import ObjectTag, Tag, Taxonomy
-from .import_export import TagImportTask, TagImportTaskState
+from .base import ObjectTag, Tag, TagAncestor, TagCounts, TagSearchTrigram, Taxonomy
+from .import_export import TagImportTask, TagImportTaskAction, TagImportTaskLogChunk, TagImportTaskState
 from .system_defined import LanguageTaxonomy, ModelSystemDefinedTaxonomy, UserSystemDefinedTaxonomy
@@ -5,12 +5,12 @@ from __future__ import annotations
 
 import logging
 import re
-from typing import List
+from collections import Counter, defaultdict
+from typing import Iterable, List
 
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models import F, Q, Value
-from django.db.models.functions import Concat, Lower
+from django.db import models, transaction
+from django.db.models import F, Q, Value, signals
 from django.utils.functional import cached_property
 from django.utils.module_loading import import_string
 from django.utils.translation import gettext_lazy as _
@@ -19,7 +19,7 @@ from typing_extensions import Self  # Until we upgrade to python 3.11
 from openedx_learning.lib.fields import MultiCollationTextField, case_insensitive_char_field, case_sensitive_char_field
 
 from ..data import TagDataQuerySet
-from .utils import RESERVED_TAG_CHARS, ConcatNull
+from .utils import RESERVED_TAG_CHARS, batches, get_trigrams
 
 log = logging.getLogger(__name__)
 
@@ -31,6 +31,133 @@ TAXONOMY_MAX_DEPTH = 3
 # Will contain 0...TAXONOMY_MAX_DEPTH elements.
 Lineage = List[str]
 
+# Maximum length of Tag.sort_key. This is shorter than the full lineage could be (four 500-character values), because
+# we need to index it and MySQL limits index keys to 3072 bytes. Tags whose lineage is this long are very unlikely, and
+# truncating just means that they'll be sorted by the first 750 characters of their lineage only.
+TAG_SORT_KEY_MAX_LENGTH = 750
+
+
+class TagQuerySet(models.QuerySet):
+    """
+    Custom QuerySet for Tags, which keeps the lineage fields, TagCounts, and
+    TagAncestor rows up to date when tags are created or deleted in bulk.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Create the given tags, computing their lineage fields and adding their
+        TagCounts and TagAncestor rows.
+
+        The parent of each tag must already be saved. ignore_conflicts and
+        update_conflicts are not supported, because we need to know exactly
+        which tags were created.
+        """
+        if kwargs.get("ignore_conflicts") or kwargs.get("update_conflicts"):
+            raise ValueError("Tags can't be created in bulk with ignore_conflicts or update_conflicts.")
+        objs = list(objs)
+        for tag in objs:
+            tag.update_lineage_fields()
+        with transaction.atomic(savepoint=False):
+            tags = super().bulk_create(objs, *args, **kwargs)
+            without_pk = [tag for tag in tags if tag.pk is None]
+            if without_pk:
+                # Some databases (e.g. MySQL) don't return the IDs of rows inserted in bulk, so look them up.
+                pks = {
+                    (taxonomy_id, value.lower()): pk
+                    for pk, taxonomy_id, value in Tag.objects.filter(
+                        taxonomy_id__in={tag.taxonomy_id for tag in without_pk},
+                        value__in=[tag.value for tag in without_pk],
+                    ).values_list("pk", "taxonomy_id", "value")
+                }
+                for tag in without_pk:
+                    tag.pk = pks[(tag.taxonomy_id, tag.value.lower())]
+            TagCounts.record_new_tags(tags)
+            TagAncestor.record_new_tags(tags)
+            TagSearchTrigram.record_new_tags(tags)
+        return tags
+
+    def delete(self):
+        """
+        Delete these tags and all of their descendants.
+        """
+        with transaction.atomic(savepoint=False):
+            TagCounts.record_deleted_tags(self)
+            return super().delete()
+
+    def delete_subtrees(self) -> int:
+        """
+        Delete these tags and all of their descendants, like delete(), but with
+        a few set-based queries.
+
+        delete() uses Django's deletion collector, which loads every related row,
+        including every ObjectTag of the deleted tags so that it can set their
+        `tag` to NULL. Instead, this finds the descendants one level at a time,
+        sets the `tag` of their object tags to NULL with UPDATE queries (their
+        `_value` is kept, so they show as deleted), and deletes the rows of the
+        tags bottom-up, without the collector.
+
+        Falls back to delete() if other models refer to tags, or if something
+        listens to their deletion signals, because the collector is needed to
+        handle those.
+
+        Returns the number of tags deleted.
+        """
+        if not self._can_delete_without_collector():
+            _count, deleted = self.delete()
+            return deleted.get(Tag._meta.label, 0)
+
+        with transaction.atomic(savepoint=False):
+            TagCounts.record_deleted_tags(self)
+            # The tags of the subtrees, one list per level, from the top
+            levels: list[list[int]] = []
+            seen: set[int] = set()
+            level = list(self.values_list("pk", flat=True))
+            while level:
+                levels.append(level)
+                seen.update(level)
+                level = [
+                    pk
+                    for batch in batches(level)
+                    for pk in Tag.objects.filter(parent_id__in=batch).values_list("pk", flat=True)
+                    if pk not in seen  # In case a tag is (incorrectly) its own ancestor
+                ]
+
+            subtree = [pk for level in levels for pk in level]
+            for batch in batches(subtree):
+                ObjectTag.objects.filter(tag_id__in=batch).update(tag=None)
+                # These models have no dependents, so Django deletes them without loading them
+                TagAncestor.objects.filter(Q(tag_id__in=batch) | Q(ancestor_id__in=batch)).delete()
+                TagSearchTrigram.objects.filter(tag_id__in=batch).delete()
+                TagCounts.objects.filter(tag_id__in=batch).delete()
+            deleted = 0
+            for level in reversed(levels):
+                for batch in batches(level):
+                    deleted += Tag.objects.filter(pk__in=batch)._raw_delete(self.db)  # pylint: disable=protected-access
+        return deleted
+
+    @staticmethod
+    def _can_delete_without_collector() -> bool:
+        """
+        Returns True if delete_subtrees() can delete tags with raw queries: the
+        only rows that refer to tags are the ones it deletes or updates itself,
+        and no deletion signals would be missed.
+        """
+        handled = {
+            (Tag, "parent"),
+            (TagAncestor, "tag"),
+            (TagAncestor, "ancestor"),
+            (TagSearchTrigram, "tag"),
+            (TagCounts, "tag"),
+            (ObjectTag, "tag"),
+        }
+        if {(rel.related_model, rel.field.name) for rel in Tag._meta.related_objects} - handled:
+            return False
+        return not any(
+            signal.has_listeners(model)
+            for signal in (signals.pre_delete, signals.post_delete)
+            for model in (Tag, TagAncestor, TagSearchTrigram, TagCounts)
+        )
+
 
 class Tag(models.Model):
     """
@@ -74,11 +201,43 @@ class Tag(models.Model):
             "Used to link an Open edX Tag with a tag in an externally-defined taxonomy."
         ),
     )
+    # The following fields are a "materialized path" of this tag's position in the tree, computed from the parent
+    # whenever the tag is saved. They let us list, sort, and count whole (sub)trees of tags by reading this table
+    # alone, instead of joining it to itself once for every level of depth.
+    depth = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        help_text=_("How many ancestors this tag has. Zero for root tags."),
+    )
+    ancestor_path = case_sensitive_char_field(
+        max_length=255,
+        default="",
+        blank=True,
+        editable=False,
+        help_text=_(
+            "IDs of this tag's ancestors, starting from the root, each followed by a '/'. Empty for root tags."
+        ),
+    )
+    sort_key = case_insensitive_char_field(
+        max_length=TAG_SORT_KEY_MAX_LENGTH,
+        default="",
+        blank=True,
+        editable=False,
+        help_text=_(
+            "Lowercase values of this tag's lineage, each followed by a TAB character. Used to sort tags in tree order."
+        ),
+    )
+
+    objects = TagQuerySet.as_manager()
 
     class Meta:
         indexes = [
             models.Index(fields=["taxonomy", "value"]),
             models.Index(fields=["taxonomy", "external_id"]),
+            models.Index(fields=["taxonomy", "ancestor_path"]),
+            models.Index(fields=["taxonomy", "sort_key"]),
+            # Pages of a single level of tags, in order of their values
+            models.Index(fields=["taxonomy", "parent", "value"]),
         ]
         unique_together = [
             ["taxonomy", "external_id"],
@@ -112,10 +271,16 @@ class Tag(models.Model):
         The root Tag.value is first, followed by its child.value, and on down to self.value.
         """
         lineage: Lineage = [self.value]
-        next_ancestor = self.get_next_ancestor()
-        while next_ancestor:
-            lineage.insert(0, next_ancestor.value)
-            next_ancestor = next_ancestor.get_next_ancestor()
+        tag = self
+        # Use whichever ancestors are already loaded (e.g. with select_related), so we don't need any queries for them
+        while Tag.parent.is_cached(tag) and tag.parent is not None:  # pylint: disable=no-member
+            tag = tag.parent
+            lineage.insert(0, tag.value)
+        if tag.parent_id is not None:
+            # Load all the remaining ancestors in one query, using the materialized path
+            ancestor_ids = tag.ancestor_ids
+            values = dict(Tag.objects.filter(pk__in=ancestor_ids).values_list("pk", "value"))
+            lineage[0:0] = [values[pk] for pk in ancestor_ids if pk in values]
         return lineage
 
     def get_next_ancestor(self) -> Tag | None:
@@ -134,33 +299,27 @@ class Tag(models.Model):
             self.parent = Tag.objects.select_related("parent", "parent__parent").get(pk=self.parent_id)
         return self.parent
 
-    @cached_property
-    def depth(self) -> int:
+    @property
+    def ancestor_ids(self) -> list[int]:
         """
-        How many ancestors this Tag has. Zero for root tags.
+        The IDs of this tag's ancestors, starting from the root. Empty for root tags.
         """
-        depth = 0
-        tag = self
-        while tag.parent:
-            depth += 1
-            tag = tag.parent
-        return depth
+        return Tag.parse_ancestor_path(self.ancestor_path)
 
     @staticmethod
-    def annotate_depth(qs: models.QuerySet) -> models.QuerySet:
-        """
-        Given a query that loads Tag objects, annotate it with the depth of
-        each tag.
-        """
-        return qs.annotate(depth=models.Case(
-            models.When(parent_id=None, then=0),
-            models.When(parent__parent_id=None, then=1),
-            models.When(parent__parent__parent_id=None, then=2),
-            models.When(parent__parent__parent__parent_id=None, then=3),
-            # If the depth is 4 or more, currently we just "collapse" the depth
-            # to 4 in order not to add too many joins to this query in general.
-            default=4,
-        ))
+    def parse_ancestor_path(ancestor_path: str) -> list[int]:
+        """
+        Convert an ancestor_path like "1/7/" to a list of tag IDs like [1, 7].
+        """
+        return [int(pk) for pk in ancestor_path.split("/") if pk]
+
+    @property
+    def descendant_path(self) -> str:
+        """
+        The ancestor_path shared by all of this tag's children, and the prefix
+        of the ancestor_path of all its other descendants.
+        """
+        return f"{self.ancestor_path}{self.pk}/"
 
     @cached_property
     def child_count(self) -> int:
@@ -177,12 +336,118 @@ class Tag(models.Model):
         How many descendant tags this tag has in the taxonomy.
         """
         if self.taxonomy and not self.taxonomy.allow_free_text:
-            return self.taxonomy.tag_set.filter(
-                Q(parent__parent=self) |
-                Q(parent__parent__parent=self)
-            ).count() + self.child_count
+            return self.taxonomy.tag_set.filter(ancestor_path__startswith=self.descendant_path).count()
         return 0
 
+    def save(self, *args, **kwargs):
+        """
+        Save this tag, and update the materialized path of its descendants if
+        its value or position in the tree has changed.
+        """
+        old_fields = None
+        if self.pk is not None:
+            old_fields = Tag.objects.filter(pk=self.pk).values_list(
+                "ancestor_path", "sort_key", "depth", "value",
+            ).first()
+        self.update_lineage_fields()
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "depth", "ancestor_path", "sort_key"}
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+            if old_fields is None:
+                TagCounts.record_new_tags([self])
+                TagAncestor.record_new_tags([self])
+                TagSearchTrigram.record_new_tags([self])
+                return
+            old_ancestor_path, old_sort_key, old_depth, old_value = old_fields
+            if get_trigrams(old_value) != get_trigrams(self.value):
+                TagSearchTrigram.record_renamed_tags([self])
+            if (old_ancestor_path, old_sort_key, old_depth) != (self.ancestor_path, self.sort_key, self.depth):
+                descendants = self._update_descendant_lineage_fields(old_ancestor_path=old_ancestor_path)
+                if old_ancestor_path != self.ancestor_path:
+                    TagCounts.record_moved_tag(self, old_ancestor_path=old_ancestor_path)
+                    TagAncestor.record_moved_tags(
+                        [self.pk, *(tag.pk for tag in descendants)],
+                        old_ancestor_ids=Tag.parse_ancestor_path(old_ancestor_path),
+                        new_ancestor_ids=self.ancestor_ids,
+                    )
+
+    def delete(self, *args, **kwargs):
+        """
+        Delete this tag and all of its descendants.
+        """
+        with transaction.atomic(savepoint=False):
+            TagCounts.record_deleted_tags(Tag.objects.filter(pk=self.pk))
+            return super().delete(*args, **kwargs)
+
+    def update_lineage_fields(self, parent: Tag | None = None) -> None:
+        """
+        Compute the depth, ancestor_path, and sort_key of this tag from its
+        parent (which can be passed in, if it's already loaded).
+
+        This is done automatically by save(), so only needs to be called
+        directly when creating or updating tags in bulk.
+        """
+        if parent is None and self.parent_id is not None:
+            parent = self.parent
+        if parent is None:
+            self.depth = 0
+            self.ancestor_path = ""
+            sort_key_prefix = ""
+        else:
+            self.depth = parent.depth + 1
+            self.ancestor_path = parent.descendant_path
+            sort_key_prefix = parent.sort_key
+        self.sort_key = f"{sort_key_prefix}{self.value.lower()}\t"[:TAG_SORT_KEY_MAX_LENGTH]
+
+    def _update_descendant_lineage_fields(self, old_ancestor_path: str) -> list[Tag]:
+        """
+        Recompute the materialized path of all descendants of this tag, after
+        this tag was renamed or moved.
+
+        Returns the descendants.
+        """
+        descendants = list(
+            Tag.objects.filter(
+                Q(taxonomy_id=self.taxonomy_id),
+                ancestor_path__startswith=f"{old_ancestor_path}{self.pk}/",
+            ).exclude(pk=self.pk).order_by("depth")
+        )
+        # Process them from the top down, so that each tag's parent is always updated before the tag itself:
+        updated: dict[int | None, Tag] = {self.pk: self}
+        for tag in descendants:
+            tag.update_lineage_fields(parent=updated.get(tag.parent_id))
+            updated[tag.pk] = tag
+        Tag.objects.bulk_update(descendants, ["depth", "ancestor_path", "sort_key"], batch_size=1000)
+        return descendants
+
+    @staticmethod
+    def recompute_lineage(taxonomy_id: int) -> list[Tag]:
+        """
+        Recompute the depth, ancestor_path, and sort_key of all the given
+        taxonomy's tags from scratch, e.g. for tags that were created without
+        Tag.save().
+
+        Returns the tags of the taxonomy.
+        """
+        tags = list(Tag.objects.filter(taxonomy_id=taxonomy_id))
+        children_of: dict[int | None, list[Tag]] = defaultdict(list)
+        for tag in tags:
+            children_of[tag.parent_id].append(tag)
+        changed = []
+        # Process the tags from the roots down, so that each tag's parent is always updated before the tag itself:
+        pending: list[Tag | None] = [None]
+        while pending:
+            parent = pending.pop()
+            for tag in children_of.pop(parent.pk if parent else None, []):
+                old_lineage = (tag.depth, tag.ancestor_path, tag.sort_key)
+                tag.update_lineage_fields(parent=parent)
+                if (tag.depth, tag.ancestor_path, tag.sort_key) != old_lineage:
+                    changed.append(tag)
+                pending.append(tag)
+        Tag.objects.bulk_update(changed, ["depth", "ancestor_path", "sort_key"], batch_size=1000)
+        return tags
+
     def clean(self):
         """
         Validate this tag before saving
@@ -200,6 +465,349 @@ class Tag(models.Model):
             raise ValidationError("Tag external ID cannot contain a TAB character.")
 
 
+class TagAncestor(models.Model):
+    """
+    A "closure table" of the Tag tree, with one row for each tag and each of
+    its ancestors, including the tag itself.
+
+    This is the same information as Tag.ancestor_path, but in a form that can
+    be joined, e.g. to find all the tags that objects have implicitly (because
+    they have one of their descendant tags) in a single query.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name="ancestor_links",
+    )
+    ancestor = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name="descendant_links",
+        help_text=_("An ancestor of the tag, or the tag itself."),
+    )
+
+    class Meta:
+        unique_together = [
+            ["tag", "ancestor"],
+        ]
+
+    def __str__(self):
+        """
+        User-facing string representation of a TagAncestor.
+        """
+        return f"<{self.__class__.__name__}> ({self.tag_id} -> {self.ancestor_id})"
+
+    @staticmethod
+    def record_new_tags(tags: list[Tag]) -> None:
+        """
+        Add the rows for newly created tags.
+        """
+        TagAncestor.objects.bulk_create([
+            TagAncestor(tag_id=tag.pk, ancestor_id=ancestor_id)
+            for tag in tags
+            for ancestor_id in [*tag.ancestor_ids, tag.pk]
+        ], batch_size=1000)
+
+    @staticmethod
+    def recompute(taxonomy_id: int, tags: list[Tag]) -> None:
+        """
+        Replace the rows of all the given taxonomy's tags, from their
+        ancestor_path.
+        """
+        TagAncestor.objects.filter(tag__taxonomy_id=taxonomy_id).delete()
+        TagAncestor.record_new_tags(tags)
+
+    @staticmethod
+    def record_moved_tags(tag_ids: list[int], old_ancestor_ids: list[int], new_ancestor_ids: list[int]) -> None:
+        """
+        Update the rows for a subtree of tags (a tag and all its descendants)
+        that moved from below the old ancestors to below the new ancestors.
+        """
+        # In case the tag was (incorrectly) made its own ancestor, don't add the tags as their own ancestors again:
+        new_ancestor_ids = [ancestor_id for ancestor_id in new_ancestor_ids if ancestor_id not in tag_ids]
+        TagAncestor.objects.filter(tag_id__in=tag_ids, ancestor_id__in=old_ancestor_ids).delete()
+        TagAncestor.objects.bulk_create([
+            TagAncestor(tag_id=tag_id, ancestor_id=ancestor_id)
+            for tag_id in tag_ids
+            for ancestor_id in new_ancestor_ids
+        ], batch_size=1000)
+
+
+class TagSearchTrigram(models.Model):
+    """
+    A search index of tag values: one row for each trigram (3-character
+    substring) of each tag's normalized value.
+
+    To find the tags that contain a search term, we only need to look at the
+    tags which have all of the search term's trigrams, instead of scanning the
+    value of every tag in the taxonomy. So tags without these rows (e.g. ones
+    created by raw SQL, historical models in data migrations, or "loaddata")
+    can't be found until the "recompute_tag_counts" management command indexes
+    them.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name="search_trigrams",
+    )
+    # Denormalized from the tag, so the index can be searched one taxonomy at a time without a join.
+    taxonomy = models.ForeignKey(
+        "Taxonomy",
+        null=True,
+        on_delete=models.CASCADE,
+    )
+    trigram = case_sensitive_char_field(max_length=3)
+
+    class Meta:
+        unique_together = [
+            ["tag", "trigram"],
+        ]
+        indexes = [
+            models.Index(fields=["taxonomy", "trigram", "tag"]),
+        ]
+
+    def __str__(self):
+        """
+        User-facing string representation of a TagSearchTrigram.
+        """
+        return f"<{self.__class__.__name__}> ({self.tag_id}: {self.trigram})"
+
+    @staticmethod
+    def record_new_tags(tags: list[Tag]) -> None:
+        """
+        Add the rows for newly created tags.
+        """
+        TagSearchTrigram.objects.bulk_create([
+            TagSearchTrigram(tag_id=tag.pk, taxonomy_id=tag.taxonomy_id, trigram=trigram)
+            for tag in tags
+            for trigram in sorted(get_trigrams(tag.value))
+        ], batch_size=1000)
+
+    @staticmethod
+    def record_renamed_tags(tags: list[Tag]) -> None:
+        """
+        Replace the rows for tags whose value changed.
+        """
+        TagSearchTrigram.objects.filter(tag_id__in=[tag.pk for tag in tags]).delete()
+        TagSearchTrigram.record_new_tags(tags)
+
+    @staticmethod
+    def recompute(taxonomy_id: int, tags: list[Tag]) -> None:
+        """
+        Replace the rows of all the given taxonomy's tags.
+        """
+        TagSearchTrigram.objects.filter(tag__taxonomy_id=taxonomy_id).delete()
+        TagSearchTrigram.record_new_tags(tags)
+
+    @staticmethod
+    def search_filter(taxonomy_id: int, search_term: str) -> Q:
+        """
+        Returns a filter for the Tags of the given taxonomy whose value contains
+        `search_term` (case insensitive).
+
+        If the search term is long enough to have trigrams, the index narrows
+        the search down to the tags which have all of them, and only those tags'
+        values are checked.
+        """
+        value_filter = Q(value__icontains=search_term)
+        trigrams = get_trigrams(search_term)
+        if not trigrams:
+            return value_filter
+        candidate_ids = TagSearchTrigram.objects.filter(
+            taxonomy_id=taxonomy_id,
+            trigram__in=trigrams,
+        ).values("tag_id").annotate(
+            num_trigrams=models.Count("trigram"),
+        ).filter(num_trigrams=len(trigrams)).values("tag_id")
+        return Q(pk__in=candidate_ids) & value_filter
+
+
+class TagCounts(models.Model):
+    """
+    Denormalized counters for a Tag, so that listing tags doesn't need to
+    aggregate over the tree of tags and all of the ObjectTags every time.
+
+    These are kept up to date incrementally whenever tags or object tags are
+    added, moved, or deleted using the Tag/ObjectTag models and querysets
+    (but not by raw SQL, or by queryset.update() calls that change tags). If
+    they ever get out of sync, the "recompute_tag_counts" management command
+    will fix them (along with the tags' lineage fields, TagAncestor rows, and
+    TagSearchTrigram rows).
+    """
+
+    tag = models.OneToOneField(
+        Tag,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name="counts",
+    )
+    child_count = models.IntegerField(
+        default=0,
+        help_text=_("How many child tags this tag has."),
+    )
+    descendant_count = models.IntegerField(
+        default=0,
+        help_text=_("How many descendant tags (children, grandchildren, etc.) this tag has."),
+    )
+    usage_count = models.IntegerField(
+        default=0,
+        help_text=_("How many object tags use this tag."),
+    )
+    implicit_usage_count = models.IntegerField(
+        default=0,
+        help_text=_("How many object tags use this tag or any of its descendants."),
+    )
+
+    class Meta:
+        verbose_name_plural = "Tag counts"
+
+    def __str__(self):
+        """
+        User-facing string representation of a TagCounts.
+        """
+        return f"<{self.__class__.__name__}> ({self.tag_id})"
+
+    @staticmethod
+    def add(deltas: dict[int, Counter]) -> None:
+        """
+        Add the given amounts to the counters of the given tags, e.g.
+        {tag_id: Counter(usage_count=1, implicit_usage_count=1)}.
+
+        This uses one UPDATE query for every 500 tags.
+        """
+        deltas = {tag_id: changes for tag_id, changes in deltas.items() if any(changes.values())}
+        tag_ids = sorted(deltas)  # Sort to always lock the rows in the same order
+        for start in range(0, len(tag_ids), 500):
+            chunk = tag_ids[start:start + 500]
+            fields = {field for tag_id in chunk for field, delta in deltas[tag_id].items() if delta}
+            TagCounts.objects.filter(tag_id__in=chunk).update(**{
+                field: F(field) + models.Case(
+                    *[
+                        models.When(tag_id=tag_id, then=deltas[tag_id][field])
+                        for tag_id in chunk if deltas[tag_id][field]
+                    ],
+                    default=0,
+                )
+                for field in fields
+            })
+
+    @staticmethod
+    def record_new_tags(tags: list[Tag]) -> None:
+        """
+        Create the counters for newly created tags, and count them in the
+        counters of their ancestors.
+        """
+        TagCounts.objects.bulk_create([TagCounts(tag=tag) for tag in tags], batch_size=1000)
+        deltas: dict[int, Counter] = defaultdict(Counter)
+        for tag in tags:
+            for ancestor_id in tag.ancestor_ids:
+                deltas[ancestor_id]["descendant_count"] += 1
+            if tag.parent_id is not None:
+                deltas[tag.parent_id]["child_count"] += 1
+        TagCounts.add(deltas)
+
+    @staticmethod
+    def record_moved_tag(tag: Tag, old_ancestor_path: str) -> None:
+        """
+        Move the counts of a tag (and its descendants) from its old ancestors
+        to its new ancestors.
+        """
+        counts = TagCounts.objects.filter(tag_id=tag.pk).first()
+        subtree_size = 1 + (counts.descendant_count if counts else 0)
+        implicit_usage_count = counts.implicit_usage_count if counts else 0
+        deltas: dict[int, Counter] = defaultdict(Counter)
+        for ancestor_ids, sign in ((Tag.parse_ancestor_path(old_ancestor_path), -1), (tag.ancestor_ids, 1)):
+            for ancestor_id in ancestor_ids:
+                deltas[ancestor_id]["descendant_count"] += sign * subtree_size
+                deltas[ancestor_id]["implicit_usage_count"] += sign * implicit_usage_count
+            if ancestor_ids:
+                deltas[ancestor_ids[-1]]["child_count"] += sign
+        deltas.pop(tag.pk, None)  # In case the tag was (incorrectly) made its own ancestor
+        TagCounts.add(deltas)
+
+    @staticmethod
+    def record_deleted_tags(tags: models.QuerySet) -> None:
+        """
+        Remove the given tags (which are about to be deleted, along with all of
+        their descendants) from the counters of their remaining ancestors.
+        """
+        rows = list(tags.values_list(
+            "pk", "ancestor_path", "counts__descendant_count", "counts__implicit_usage_count",
+        ))
+        deleted_ids = {row[0] for row in rows}
+        deltas: dict[int, Counter] = defaultdict(Counter)
+        for _pk, ancestor_path, descendant_count, implicit_usage_count in rows:
+            ancestor_ids = Tag.parse_ancestor_path(ancestor_path)
+            if deleted_ids.intersection(ancestor_ids):
+                continue  # This tag's counts are already included in its deleted ancestor's counts
+            for ancestor_id in ancestor_ids:
+                deltas[ancestor_id]["descendant_count"] -= 1 + (descendant_count or 0)
+                deltas[ancestor_id]["implicit_usage_count"] -= implicit_usage_count or 0
+            if ancestor_ids:
+                deltas[ancestor_ids[-1]]["child_count"] -= 1
+        TagCounts.add(deltas)
+
+    @staticmethod
+    def record_usage(
+        added_tag_ids: Iterable[int | None] = (),
+        removed_tag_ids: Iterable[int | None] = (),
+    ) -> None:
+        """
+        Update the usage counts after object tags using the given tags were
+        added and/or removed. Each tag ID may be listed many times.
+        """
+        net_usage = Counter(tag_id for tag_id in added_tag_ids if tag_id is not None)
+        net_usage.subtract(tag_id for tag_id in removed_tag_ids if tag_id is not None)
+        TagCounts.record_usage_changes(net_usage)
+
+    @staticmethod
+    def record_usage_changes(net_usage: dict[int, int]) -> None:
+        """
+        Update the usage counts after the number of object tags using the given
+        tags changed by the given amounts, e.g. {tag_id: 3, other_tag_id: -1}
+        """
+        net_usage = {tag_id: count for tag_id, count in net_usage.items() if count}
+        if not net_usage:
+            return
+        deltas: dict[int, Counter] = defaultdict(Counter)
+        for tag_id, ancestor_path in Tag.objects.filter(pk__in=net_usage).values_list("pk", "ancestor_path"):
+            deltas[tag_id]["usage_count"] += net_usage[tag_id]
+            for implicit_tag_id in [*Tag.parse_ancestor_path(ancestor_path), tag_id]:
+                deltas[implicit_tag_id]["implicit_usage_count"] += net_usage[tag_id]
+        TagCounts.add(deltas)
+
+    @staticmethod
+    def recompute(taxonomy_id: int) -> int:
+        """
+        Recompute all the counters of the given taxonomy's tags from scratch.
+
+        Returns the number of tags in the taxonomy.
+        """
+        tags = list(Tag.objects.filter(taxonomy_id=taxonomy_id).values_list("pk", "parent_id", "ancestor_path"))
+        usage_counts = dict(
+            ObjectTag.objects.filter(tag__taxonomy_id=taxonomy_id).order_by().values("tag_id").annotate(
+                count=models.Count("id"),
+            ).values_list("tag_id", "count")
+        )
+        counts = {pk: TagCounts(tag_id=pk, usage_count=usage_counts.get(pk, 0)) for pk, _, _ in tags}
+        for pk, parent_id, ancestor_path in tags:
+            if parent_id in counts:
+                counts[parent_id].child_count += 1
+            for ancestor_id in Tag.parse_ancestor_path(ancestor_path):
+                if ancestor_id in counts:
+                    counts[ancestor_id].descendant_count += 1
+                    counts[ancestor_id].implicit_usage_count += counts[pk].usage_count
+            counts[pk].implicit_usage_count += counts[pk].usage_count
+        with transaction.atomic():
+            TagCounts.objects.filter(tag__taxonomy_id=taxonomy_id).delete()
+            TagCounts.objects.bulk_create(counts.values(), batch_size=1000)
+        return len(tags)
+
+
 class Taxonomy(models.Model):
     """
     Represents a namespace and rules for a group of tags.
@@ -482,35 +1090,24 @@ class Taxonomy(models.Model):
         if parent_tag_value:
             parent_tag = self.tag_for_value(parent_tag_value)
             qs: models.QuerySet = self.tag_set.filter(parent_id=parent_tag.pk)
-            qs = qs.annotate(depth=Value(parent_tag.depth + 1))
             # Use parent_tag.value not parent_tag_value because they may differ in case
             qs = qs.annotate(parent_value=Value(parent_tag.value))
         else:
-            qs = self.tag_set.filter(parent=None).annotate(depth=Value(0))  # type: ignore[no-redef]
+            qs = self.tag_set.filter(parent=None)  # type: ignore[no-redef]
             qs = qs.annotate(parent_value=Value(None, output_field=models.CharField()))
-        qs = qs.annotate(child_count=models.Count("children", distinct=True))  # type: ignore[no-redef]
-        qs = qs.annotate(grandchild_count=models.Count("children__children", distinct=True))
-        qs = qs.annotate(great_grandchild_count=models.Count("children__children__children"))
-        qs = qs.annotate(
-            descendant_count=F("child_count") + F("grandchild_count") + F("great_grandchild_count")
-        )  # type: ignore[no-redef]
+        qs = qs.annotate(  # type: ignore[no-redef]
+            child_count=F("counts__child_count"),
+            descendant_count=F("counts__descendant_count"),
+        )
         # Filter by search term:
         if search_term:
-            qs = qs.filter(value__icontains=search_term)
+            qs = qs.filter(TagSearchTrigram.search_filter(self.pk, search_term))
         qs = qs.annotate(_id=F("id"))  # ID has an underscore to encourage use of 'value' rather than this internal ID
         qs = qs.values("value", "child_count", "descendant_count", "depth", "parent_value", "external_id", "_id")
         qs = qs.order_by("value")
         if include_counts:
             # We need to include the count of how many times this tag is used to tag objects.
-            # You'd think we could just use:
-            #     qs = qs.annotate(usage_count=models.Count("objecttag__pk"))
-            # but that adds another join which starts creating a cross product and the children and usage_count become
-            # intertwined and multiplied with each other. So we use a subquery.
-            obj_tags = ObjectTag.objects.filter(tag_id=models.OuterRef("pk")).order_by().annotate(
-                # We need to use Func() to get Count() without GROUP BY - see https://stackoverflow.com/a/69031027
-                count=models.Func(F('id'), function='Count')
-            )
-            qs = qs.annotate(usage_count=models.Subquery(obj_tags.values('count')))
+            qs = qs.annotate(usage_count=F("counts__usage_count"))
         return qs  # type: ignore[return-value]
 
     def _get_filtered_tags_deep(
@@ -525,82 +1122,75 @@ class Taxonomy(models.Model):
         we're including tags from multiple levels of the hierarchy.
         """
         # All tags (possibly below a certain tag?) in the closed taxonomy, up to depth TAXONOMY_MAX_DEPTH
+        qs: models.QuerySet = self.tag_set.all()
         if parent_tag_value:
-            main_parent_id = self.tag_for_value(parent_tag_value).pk
+            main_parent = self.tag_for_value(parent_tag_value)
+            qs = qs.filter(ancestor_path__startswith=main_parent.descendant_path)
+            max_depth = main_parent.depth + TAXONOMY_MAX_DEPTH
         else:
-            main_parent_id = None
-
-        assert TAXONOMY_MAX_DEPTH == 3  # If we change TAXONOMY_MAX_DEPTH we need to change this query code:
-        qs: models.QuerySet = self.tag_set.filter(
-            Q(parent_id=main_parent_id) |
-            Q(parent__parent_id=main_parent_id) |
-            Q(parent__parent__parent_id=main_parent_id)
-        )
+            max_depth = TAXONOMY_MAX_DEPTH - 1
+        qs = qs.filter(depth__lte=max_depth)
 
         if search_term:
             # We need to do an additional query to find all the tags that match the search term, then limit the
             # search to those tags and their ancestors.
-            matching_tags = qs.filter(value__icontains=search_term).values(
-                'id', 'parent_id', 'parent__parent_id', 'parent__parent__parent_id'
-            )
+            matching_tags = qs.filter(
+                TagSearchTrigram.search_filter(self.pk, search_term),
+            ).values_list("id", "ancestor_path")
             if excluded_values:
                 matching_tags = matching_tags.exclude(value__in=excluded_values)
-            matching_ids = []
-            for row in matching_tags:
-                for pk in row.values():
-                    if pk is not None:
-                        matching_ids.append(pk)
-            qs = qs.filter(pk__in=matching_ids)
+            # The stored counts include tags that don't match the search, so we need to count the matching ones.
+            # The lineage of each matching tag is all we need to count the children/descendants among the results.
+            child_ids: dict[int, set[int]] = defaultdict(set)
+            descendant_ids: dict[int, set[int]] = defaultdict(set)
+            for pk, ancestor_path in matching_tags:
+                lineage = [*Tag.parse_ancestor_path(ancestor_path), pk]
+                for i, tag_id in enumerate(lineage):
+                    descendant_ids[tag_id].update(lineage[i + 1:])
+                    if i > 0:
+                        child_ids[lineage[i - 1]].add(tag_id)
+            qs = qs.filter(pk__in=descendant_ids.keys())
             qs = qs.annotate(
-                child_count=models.Count("children", filter=Q(children__pk__in=matching_ids), distinct=True),
-                grandchild_count=models.Count(
-                    "children__children", filter=Q(children__children__pk__in=matching_ids), distinct=True,
-                ),
-                great_grandchild_count=models.Count(
-                    "children__children__children",
-                    filter=Q(children__children__children__pk__in=matching_ids),
-                ),
+                child_count=self._count_by_tag_annotation({pk: len(ids) for pk, ids in child_ids.items()}),
+                descendant_count=self._count_by_tag_annotation({pk: len(ids) for pk, ids in descendant_ids.items()}),
             )
-            qs = qs.annotate(descendant_count=F("child_count") + F("grandchild_count") + F("great_grandchild_count"))
         elif excluded_values:
             raise NotImplementedError("Using excluded_values without search_term is not currently supported.")
             # We could implement this in the future but I'd prefer to get rid of the "excluded_values" API altogether.
             # It remains to be seen if it's useful to do that on the backend, or if we can do it better/simpler on the
             # frontend.
         else:
-            qs = qs.annotate(child_count=models.Count("children", distinct=True))
-            qs = qs.annotate(grandchild_count=models.Count("children__children", distinct=True))
-            qs = qs.annotate(great_grandchild_count=models.Count("children__children__children"))
-            qs = qs.annotate(descendant_count=F("child_count") + F("grandchild_count") + F("great_grandchild_count"))
-
-        # Add the "depth" to each tag:
-        qs = Tag.annotate_depth(qs)
-        # Add the "lineage" as a field called "sort_key" to sort them in order correctly:
-        qs = qs.annotate(sort_key=Lower(Concat(
-            # For a root tag, we want sort_key="RootValue" and for a depth=1 tag
-            # we want sort_key="RootValue\tValue". The following does that, since
-            # ConcatNull(...) returns NULL if any argument is NULL.
-            ConcatNull(F("parent__parent__parent__value"), Value("\t")),
-            ConcatNull(F("parent__parent__value"), Value("\t")),
-            ConcatNull(F("parent__value"), Value("\t")),
-            F("value"),
-            Value("\t"),  # We also need the '\t' separator character at the end, or MySQL will sort things wrong
-            output_field=models.CharField(),
-        )))
+            qs = qs.annotate(child_count=F("counts__child_count"), descendant_count=F("counts__descendant_count"))
+
         # Add the parent value
         qs = qs.annotate(parent_value=F("parent__value"))
         qs = qs.annotate(_id=F("id"))  # ID has an underscore to encourage use of 'value' rather than this internal ID
         qs = qs.values("value", "child_count", "descendant_count", "depth", "parent_value", "external_id", "_id")
+        # Sort the tags in "tree order" using the stored lineage, e.g. "rootvalue\tchildvalue\t"
         qs = qs.order_by("sort_key")
         if include_counts:
-            # Including the counts is a bit tricky; see the comment above in _get_filtered_tags_one_level()
-            obj_tags = ObjectTag.objects.filter(tag_id=models.OuterRef("pk")).order_by().annotate(
-                # We need to use Func() to get Count() without GROUP BY - see https://stackoverflow.com/a/69031027
-                count=models.Func(F('id'), function='Count')
-            )
-            qs = qs.annotate(usage_count=models.Subquery(obj_tags.values('count')))
+            qs = qs.annotate(usage_count=F("counts__usage_count"))
         return qs  # type: ignore[return-value]
 
+    @staticmethod
+    def _count_by_tag_annotation(counts: dict[int, int]) -> models.Case:
+        """
+        Returns an expression that annotates each tag in a Tag queryset with
+        its count from `counts` (or zero if it's not in there).
+
+        There are only a few distinct counts, so this groups the tags by count
+        to keep the expression small, e.g. CASE WHEN id IN (...) THEN 2 ... END
+        """
+        tag_ids_by_count: dict[int, list[int]] = defaultdict(list)
+        for tag_id, count in counts.items():
+            if count:
+                tag_ids_by_count[count].append(tag_id)
+        return models.Case(
+            *[models.When(pk__in=tag_ids, then=Value(count)) for count, tag_ids in sorted(tag_ids_by_count.items())],
+            default=Value(0),
+            output_field=models.IntegerField(),
+        )
+
     def add_tag(
         self,
         tag_value: str,
@@ -689,8 +1279,8 @@ class Taxonomy(models.Model):
             # provided that do not belong to this Taxonomy
             raise ValueError("Invalid tag id provided or tag id does not belong to taxonomy")
 
-        # Check if any Tag contains subtags (children)
-        contains_children = tags_to_delete.filter(children__isnull=False).distinct().exists()
+        # Check if any Tag contains subtags (children), with a subquery rather than a list of IDs
+        contains_children = Tag.objects.filter(parent__in=tags_to_delete).exists()
 
         if contains_children and not with_subtags:
             raise ValueError(
@@ -699,7 +1289,7 @@ class Taxonomy(models.Model):
             )
 
         # Delete the Tags with their subtags if any
-        tags_to_delete.delete()
+        tags_to_delete.delete_subtrees()
 
     def validate_value(self, value: str) -> bool:
         """
@@ -728,6 +1318,30 @@ class Taxonomy(models.Model):
             raise ValueError("tag_for_value() doesn't work for free text taxonomies. They don't use Tag instances.")
         return self.tag_set.get(value__iexact=value)
 
+    def tags_for_values(self, values: list[str]) -> dict[str, Tag]:
+        """
+        Get the Tag objects for the given values, as a dict keyed by the
+        lowercase version of each value. Values which are not valid for this
+        taxonomy are left out.
+
+        This is the batch version of tag_for_value(). Subclasses which override
+        tag_for_value() should override this too, to look up (or create) all
+        the tags at once; otherwise it calls their tag_for_value() for each value.
+        """
+        self.check_casted()
+        if self.allow_free_text:
+            raise ValueError("tags_for_values() doesn't work for free text taxonomies. They don't use Tag instances.")
+        if type(self).tag_for_value is not Taxonomy.tag_for_value:
+            tags = {}
+            for value in values:
+                try:
+                    tags[value.lower()] = self.tag_for_value(value)
+                except Tag.DoesNotExist:
+                    pass
+            return tags
+        # Tag.value is case-insensitive, so this IN query matches the same way as tag_for_value()'s iexact lookup.
+        return {tag.value.lower(): tag for tag in self.tag_set.filter(value__in=values)}
+
     def validate_external_id(self, external_id: str) -> bool:
         """
         Check if 'external_id' is part of this Taxonomy.
@@ -751,6 +1365,40 @@ class Taxonomy(models.Model):
         return self.tag_set.get(external_id__iexact=external_id)
 
 
+class ObjectTagQuerySet(models.QuerySet):
+    """
+    Custom QuerySet for ObjectTags, which keeps the TagCounts of their tags up
+    to date when object tags are created or deleted in bulk.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Create the given object tags, and count them in the usage counts of
+        their tags.
+
+        ignore_conflicts and update_conflicts are not supported, because we
+        need to know exactly which object tags were created.
+        """
+        if kwargs.get("ignore_conflicts") or kwargs.get("update_conflicts"):
+            raise ValueError("Object tags can't be created in bulk with ignore_conflicts or update_conflicts.")
+        with transaction.atomic(savepoint=False):
+            object_tags = super().bulk_create(objs, *args, **kwargs)
+            TagCounts.record_usage(added_tag_ids=[object_tag.tag_id for object_tag in object_tags])
+            for object_tag in object_tags:
+                object_tag._counted_tag_id = object_tag.tag_id  # pylint: disable=protected-access
+            return object_tags
+
+    def delete(self):
+        """
+        Delete these object tags.
+        """
+        with transaction.atomic(savepoint=False):
+            removed_tag_ids = list(self.values_list("tag_id", flat=True))
+            result = super().delete()
+            TagCounts.record_usage(removed_tag_ids=removed_tag_ids)
+            return result
+
+
 class ObjectTag(models.Model):
     """
     Represents the association between a tag and an Open edX object.
@@ -820,6 +1468,8 @@ class ObjectTag(models.Model):
         ),
     )
 
+    objects = ObjectTagQuerySet.as_manager()
+
     class Meta:
         indexes = [
             models.Index(fields=["taxonomy", "object_id"]),
@@ -838,6 +1488,8 @@ class ObjectTag(models.Model):
                 self._export_id = self.taxonomy.export_id
             if not self._value and self.tag:
                 self._value = self.tag.value
+        # The tag that this object tag is counted against in TagCounts.usage_count, i.e. the one saved in the database
+        self._counted_tag_id = self.tag_id if self.pk else None
 
     def __repr__(self):
         """
@@ -924,6 +1576,26 @@ class ObjectTag(models.Model):
             # Some APIs may use these characters to allow wildcard matches or multiple matches in the future.
             raise ValidationError("Object ID contains invalid characters")
 
+    def save(self, *args, **kwargs):
+        """
+        Save this object tag, and update the usage counts if its tag changed.
+        """
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+            if self.tag_id != self._counted_tag_id:
+                TagCounts.record_usage(added_tag_ids=[self.tag_id], removed_tag_ids=[self._counted_tag_id])
+                self._counted_tag_id = self.tag_id
+
+    def delete(self, *args, **kwargs):
+        """
+        Delete this object tag, and update the usage counts of its tag.
+        """
+        with transaction.atomic(savepoint=False):
+            result = super().delete(*args, **kwargs)
+            TagCounts.record_usage(removed_tag_ids=[self._counted_tag_id])
+            self._counted_tag_id = None
+            return result
+
     def get_lineage(self) -> Lineage:
         """
         Returns the lineage of the current tag as a list of value strings.
@@ -993,4 +1665,5 @@ class ObjectTag(models.Model):
         self.is_copied = object_tag.is_copied
         self._value = object_tag._value  # pylint: disable=protected-access
         self._export_id = object_tag._export_id  # pylint: disable=protected-access
+        self._counted_tag_id = object_tag._counted_tag_id  # pylint: disable=protected-access
         return self
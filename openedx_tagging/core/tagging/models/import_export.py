@@ -1,15 +1,21 @@
 """
 Models used by the Taxonomy import/export tasks.
 """
+from __future__ import annotations
 
 from datetime import datetime
+from typing import Iterator
 
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext as _
 from django.utils.translation import gettext_lazy
 
 from .base import Taxonomy
 
+# The log of an import task is saved in rows of up to this many characters, so that adding to the log doesn't rewrite
+# all of it, and it can be read a few rows at a time.
+LOG_CHUNK_SIZE = 64 * 1024
+
 
 class TagImportTaskState(models.TextChoices):
     """
@@ -35,10 +41,6 @@ class TagImportTask(models.Model):
         help_text=_("Taxonomy associated with this import"),
     )
 
-    log = models.TextField(
-        blank=True, default=None, help_text=gettext_lazy("Action execution logs")
-    )
-
     status = models.CharField(
         max_length=20,
         choices=TagImportTaskState.choices,
@@ -47,20 +49,150 @@ class TagImportTask(models.Model):
 
     creation_date = models.DateTimeField(auto_now_add=True)
 
+    # The following fields are only used by imports that run in steps (see `import_export.api.start_import_tags`).
+    # The uploaded file is kept until the plan has been saved as TagImportTaskActions.
+    upload = models.BinaryField(
+        null=True,
+        editable=False,
+        help_text=gettext_lazy("Uploaded file, until the import has been planned"),
+    )
+    parser_format = models.CharField(
+        max_length=10,
+        blank=True,
+        default="",
+        help_text=gettext_lazy("Format of the uploaded file"),
+    )
+    replace = models.BooleanField(
+        default=False,
+        help_text=gettext_lazy("Whether the tags that are not in the uploaded file are deleted"),
+    )
+    total_actions = models.PositiveIntegerField(
+        default=0,
+        help_text=gettext_lazy("Number of actions in the import plan"),
+    )
+    executed_actions = models.PositiveIntegerField(
+        default=0,
+        help_text=gettext_lazy("Number of actions of the import plan that have been executed"),
+    )
+
     class Meta:
         indexes = [
             models.Index(fields=["taxonomy", "-creation_date"]),
         ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Log text that has not been saved yet
+        self._log_buffer: list[str] = []
+        self._log_buffer_size = 0
+        # Log chunks that were saved inside a transaction that hasn't been committed yet, in case it's rolled back
+        self._uncommitted_log_chunks: list[TagImportTaskLogChunk] = []
+
+    def save(self, *args, **kwargs):
+        """
+        Save the task, and the log text added since it was last saved.
+        """
+        super().save(*args, **kwargs)
+        self._flush_log()
+
+    @property
+    def log(self) -> str:
+        """
+        The whole log of the task.
+
+        Use iter_log() or get_log_chunks() to read long logs a part at a time.
+        """
+        return "".join(self.iter_log())
+
+    def iter_log(self) -> Iterator[str]:
+        """
+        Yields the log of the task, a chunk at a time.
+        """
+        if self.pk is not None:
+            yield from self.log_chunks.order_by("id").values_list("text", flat=True).iterator()
+        if self._log_buffer:
+            yield "".join(self._log_buffer)
+
+    def get_log_chunks(self, after: int | None = None, limit: int = 100) -> list[TagImportTaskLogChunk]:
+        """
+        Returns up to `limit` saved chunks of the log, in order, starting after
+        the chunk with ID `after`.
+        """
+        chunks = self.log_chunks.order_by("id")
+        if after is not None:
+            chunks = chunks.filter(id__gt=after)
+        return list(chunks[:limit])
+
+    def _append_log(self, text: str) -> None:
+        """
+        Adds text to the end of the log.
+
+        The text is saved the next time the task is saved, or as soon as there
+        is enough text to fill a chunk.
+        """
+        self._log_buffer.append(text)
+        self._log_buffer_size += len(text)
+        if self._log_buffer_size >= LOG_CHUNK_SIZE and self.pk is not None:
+            self._flush_log(full_chunks_only=True)
+
+    def _flush_log(self, full_chunks_only: bool = False) -> None:
+        """
+        Save the log text added since the last flush, as new chunks.
+
+        If `full_chunks_only` is set, keep the text that doesn't fill a whole
+        chunk for the next flush.
+        """
+        text = "".join(self._log_buffer)
+        end = len(text) - len(text) % LOG_CHUNK_SIZE if full_chunks_only else len(text)
+        if not end:
+            return
+        self._log_buffer = [text[end:]] if end < len(text) else []
+        self._log_buffer_size = len(text) - end
+        chunks = [
+            TagImportTaskLogChunk.objects.create(task=self, text=text[start:min(start + LOG_CHUNK_SIZE, end)])
+            for start in range(0, end, LOG_CHUNK_SIZE)
+        ]
+        if transaction.get_connection().in_atomic_block:
+            # Keep the text until the transaction is committed
+            self._uncommitted_log_chunks.extend(chunks)
+            transaction.on_commit(lambda: self._forget_log_chunks(chunks))
+
+    def _forget_log_chunks(self, chunks: list[TagImportTaskLogChunk]) -> None:
+        """
+        Stop keeping the text of the given chunks, once they have been committed.
+        """
+        self._uncommitted_log_chunks = [chunk for chunk in self._uncommitted_log_chunks if chunk not in chunks]
+
+    def _restore_rolled_back_log(self) -> None:
+        """
+        Put the text of the log chunks that were rolled back (e.g. along with
+        the actions that failed) back in the buffer, to be saved again.
+
+        The chunks from the first one that was rolled back are saved again, so
+        that the log stays in order.
+        """
+        if not self._uncommitted_log_chunks:
+            return
+        chunk_ids = [chunk.pk for chunk in self._uncommitted_log_chunks]
+        saved_ids = set(TagImportTaskLogChunk.objects.filter(pk__in=chunk_ids).values_list("pk", flat=True))
+        first_lost = next((i for i, pk in enumerate(chunk_ids) if pk not in saved_ids), None)
+        if first_lost is None:
+            return
+        lost_chunks = self._uncommitted_log_chunks[first_lost:]
+        TagImportTaskLogChunk.objects.filter(pk__in=[chunk.pk for chunk in lost_chunks]).delete()
+        self._uncommitted_log_chunks = self._uncommitted_log_chunks[:first_lost]
+        self._log_buffer = [chunk.text for chunk in lost_chunks] + self._log_buffer
+        self._log_buffer_size += sum(len(chunk.text) for chunk in lost_chunks)
+
     @classmethod
-    def create(cls, taxonomy: Taxonomy):
+    def create(cls, taxonomy: Taxonomy, **kwargs):
         """
         Creates and logs a new TagImportTask.
         """
         task = cls(
             taxonomy=taxonomy,
             status=TagImportTaskState.LOADING_DATA.value,
-            log="",
+            **kwargs,
         )
         task.add_log(_("Import task created"), save=False)
         task.save()
@@ -71,8 +203,7 @@ class TagImportTask(models.Model):
         Appends a log message to the task.
         """
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_message = f"[{timestamp}] {message}\n"
-        self.log += log_message
+        self._append_log(f"[{timestamp}] {message}\n")
         if save:
             self.save()
 
@@ -80,6 +211,7 @@ class TagImportTask(models.Model):
         """
         Logs an exception and moves the task status to ERROR.
         """
+        self._restore_rolled_back_log()
         self.add_log(repr(exception), save=False)
         self.status = TagImportTaskState.ERROR.value
         self.save()
@@ -118,8 +250,10 @@ class TagImportTask(models.Model):
         Logs the task plan.
         """
         self.add_log(_("Plan finished. Time elapsed: ") + str(elapsed_time) + _(" seconds"))
-        plan_str = plan.plan()
-        self.log += f"\n{plan_str}\n"
+        self._append_log("\n")
+        for line in plan.iter_plan():
+            self._append_log(line)
+        self._append_log("\n")
         self.save()
 
     def handle_plan_errors(self):
@@ -138,6 +272,18 @@ class TagImportTask(models.Model):
         self.status = TagImportTaskState.EXECUTING.value
         self.save()
 
+    def log_executed_actions(self):
+        """
+        Logs how many of the actions of the plan have been executed.
+        """
+        self.add_log(
+            _("Executed {executed} of {total} actions").format(
+                executed=self.executed_actions,
+                total=self.total_actions,
+            ),
+            save=False,
+        )
+
     def log_end_execute(self, elapsed_time):
         self.add_log(_("Execute actions finished. Time elapsed: ") + str(elapsed_time) + _(" seconds"))
 
@@ -148,3 +294,60 @@ class TagImportTask(models.Model):
         self.add_log(_("Execution finished. Total time elapsed: ") + str(elapsed_time) + _("seconds"), save=False)
         self.status = TagImportTaskState.SUCCESS.value
         self.save()
+
+
+class TagImportTaskLogChunk(models.Model):
+    """
+    A part of the log of a TagImportTask.
+
+    The log is only ever added to, one chunk at a time, and the chunks are
+    read in order of their IDs.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    task = models.ForeignKey(
+        TagImportTask,
+        on_delete=models.CASCADE,
+        related_name="log_chunks",
+    )
+    text = models.TextField(help_text=gettext_lazy("Action execution logs"))
+
+    def __str__(self):
+        """
+        User-facing string representation of a TagImportTaskLogChunk.
+        """
+        return f"<{self.__class__.__name__}> ({self.task_id}: {self.id})"
+
+
+class TagImportTaskAction(models.Model):
+    """
+    An action of the plan of a TagImportTask that runs in steps.
+
+    The plan is saved once, so that its actions can be executed in batches,
+    each in its own transaction, and so that a failed import can be resumed.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    task = models.ForeignKey(
+        TagImportTask,
+        on_delete=models.CASCADE,
+        related_name="actions",
+    )
+    index = models.PositiveIntegerField(help_text=gettext_lazy("Position of the action in the plan, from 1"))
+    name = models.CharField(max_length=20, help_text=gettext_lazy("Name of the action"))
+    # The fields of the TagItem of the action
+    tag_id = models.TextField(null=True)
+    tag_value = models.TextField()
+    tag_parent_id = models.TextField(null=True)
+    tag_index = models.IntegerField(null=True)
+
+    class Meta:
+        unique_together = [
+            ["task", "index"],
+        ]
+
+    def __str__(self):
+        """
+        User-facing string representation of a TagImportTaskAction.
+        """
+        return f"<{self.__class__.__name__}> ({self.task_id}: #{self.index} {self.name})"
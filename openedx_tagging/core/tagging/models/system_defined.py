@@ -7,12 +7,13 @@ import logging
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.exceptions import ObjectDoesNotExist
-from django.db import models
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db import IntegrityError, models, transaction
+from django.db.models import OuterRef, Q, Subquery
 
 from openedx_tagging.core.tagging.models.base import Tag
 
-from .base import Tag, Taxonomy
+from .base import ObjectTag, Tag, TagSearchTrigram, Taxonomy
 
 log = logging.getLogger(__name__)
 
@@ -33,6 +34,47 @@ class SystemDefinedTaxonomy(Taxonomy):
         """
         return True
 
+    def _get_or_create_tags(self, values_by_external_id: dict[str, str]) -> dict[str, Tag]:
+        """
+        Get the Tags with the given external IDs, creating any that don't exist
+        yet and updating the value of any that are out of date.
+
+        This is the batch version of calling tag_set.get_or_create() (and then
+        updating the value) for each external ID, using one query for each of
+        those steps. Returns the tags keyed by external ID.
+        """
+        tags = {tag.external_id: tag for tag in self.tag_set.filter(external_id__in=values_by_external_id)}
+        stale_tags = []
+        for external_id, tag in tags.items():
+            value = values_by_external_id.get(external_id)
+            if value is not None and tag.value != value:
+                # Update the Tag to reflect the new cached 'value'
+                tag.value = value
+                tag.update_lineage_fields()
+                stale_tags.append(tag)
+        new_tags = [
+            Tag(taxonomy=self, external_id=external_id, value=value)
+            for external_id, value in values_by_external_id.items()
+            if external_id not in tags
+        ]
+        if stale_tags:
+            with transaction.atomic():
+                Tag.objects.bulk_update(stale_tags, ["value", "sort_key"])
+                TagSearchTrigram.record_renamed_tags(stale_tags)
+        if not new_tags:
+            return tags
+        try:
+            with transaction.atomic():
+                Tag.objects.bulk_create(new_tags)
+            tags.update((tag.external_id, tag) for tag in new_tags)
+        except IntegrityError:
+            # Some of these tags were created concurrently, so fall back to creating them one at a time.
+            for tag in new_tags:
+                tags[tag.external_id], _created = self.tag_set.get_or_create(
+                    external_id=tag.external_id, defaults={"value": tag.value},
+                )
+        return tags
+
 
 class ModelSystemDefinedTaxonomy(SystemDefinedTaxonomy):
     """
@@ -121,6 +163,30 @@ class ModelSystemDefinedTaxonomy(SystemDefinedTaxonomy):
             tag.save()
         return tag
 
+    def tags_for_values(self, values: list[str]) -> dict[str, Tag]:
+        """
+        Get the Tag objects for the given values, as a dict keyed by the
+        lowercase version of each value. Values which don't match any instance
+        are left out.
+
+        Unlike calling tag_for_value() for each value, this looks up all the
+        instances in one query, then gets, creates, and updates their Tags in bulk.
+        """
+        if not values:
+            return {}
+        # Like tag_for_value(), use 'iexact', although whether it's case sensitive on MySQL depends on the collation.
+        lookup = Q()
+        for value in values:
+            lookup |= Q(**{f"{self.tag_class_value_field}__iexact": value})
+        # See https://github.com/typeddjango/django-stubs/issues/1684 for why we need to ignore this.
+        instances = self.tag_class_model.objects.filter(lookup)  # type: ignore[attr-defined]
+        values_by_external_id = {
+            str(getattr(instance, self.tag_class_key_field)): getattr(instance, self.tag_class_value_field)
+            for instance in instances
+        }
+        tags = self._get_or_create_tags(values_by_external_id)
+        return {tag.value.lower(): tag for tag in tags.values()}
+
     def validate_external_id(self, external_id: str):
         """
         Check if 'external_id' is part of this Taxonomy.
@@ -134,6 +200,116 @@ class ModelSystemDefinedTaxonomy(SystemDefinedTaxonomy):
         except ObjectDoesNotExist:
             return False
 
+    def sync_tags(self, batch_size: int = 1000) -> int:
+        """
+        Update the value of every Tag of this taxonomy from its instance of
+        tag_class_model, and the cached `_value` of the ObjectTags that use it.
+
+        Otherwise a Tag is only updated when it's looked up again, so e.g. a
+        renamed user keeps their old username in this taxonomy until then.
+
+        The tags are compared with their instances `batch_size` at a time, in
+        order of their IDs, and the changed tags and their object tags are
+        updated with a few bulk queries for each batch. Tags whose instance no
+        longer exists are left as they are.
+
+        Returns the number of tags that were updated.
+        """
+        model = self.tag_class_model
+        key_field = (
+            model._meta.pk if self.tag_class_key_field == "pk" else model._meta.get_field(self.tag_class_key_field)
+        )
+        updated = 0
+        last_pk = 0
+        while True:
+            tags = list(self.tag_set.filter(pk__gt=last_pk).order_by("pk")[:batch_size])
+            if not tags:
+                return updated
+            last_pk = tags[-1].pk
+
+            keys = []
+            for tag in tags:
+                try:
+                    keys.append(key_field.to_python(tag.external_id))  # type: ignore[union-attr]
+                except ValidationError:
+                    pass  # Not a valid key, so there's no instance for this tag
+            # See https://github.com/typeddjango/django-stubs/issues/1684 for why we need to ignore this.
+            values_by_external_id = {
+                str(key): value
+                for key, value in model.objects.filter(  # type: ignore[attr-defined]
+                    **{f"{self.tag_class_key_field}__in": keys}
+                ).values_list(self.tag_class_key_field, self.tag_class_value_field)
+            }
+            stale_tags = []
+            for tag in tags:
+                value = values_by_external_id.get(tag.external_id)
+                if value is not None and tag.value != value:
+                    tag.value = value
+                    tag.update_lineage_fields()
+                    stale_tags.append(tag)
+            updated += self._update_tag_values(stale_tags)
+
+    @staticmethod
+    def _update_tag_values(tags: list[Tag]) -> int:
+        """
+        Save the new values of the given tags, and copy them to the `_value` of
+        their object tags. Returns the number of tags that were updated.
+        """
+        if not tags:
+            return 0
+        try:
+            with transaction.atomic():
+                ModelSystemDefinedTaxonomy._save_tag_values(tags)
+            return len(tags)
+        except IntegrityError:
+            pass
+        # Some of the new values are still used by other tags, so fall back to updating the tags one at a time, for
+        # as long as that frees up the values the other tags need.
+        remaining = tags
+        while remaining:
+            conflicting = []
+            for tag in remaining:
+                try:
+                    with transaction.atomic():
+                        ModelSystemDefinedTaxonomy._save_tag_values([tag])
+                except IntegrityError:
+                    conflicting.append(tag)
+            if len(conflicting) == len(remaining):
+                break
+            remaining = conflicting
+        if not remaining:
+            return len(tags)
+        # The remaining tags may be swapping values with each other (e.g. two users swapped usernames), so move them
+        # and their object tags out of the way with a unique placeholder value first.
+        try:
+            with transaction.atomic():
+                new_values = [tag.value for tag in remaining]
+                for tag in remaining:
+                    tag.value = f"\t{tag.pk}"
+                Tag.objects.bulk_update(remaining, ["value"])
+                ObjectTag.objects.filter(tag__in=remaining).update(
+                    _value=Subquery(Tag.objects.filter(pk=OuterRef("tag_id")).values("value")[:1]),
+                )
+                for tag, value in zip(remaining, new_values):
+                    tag.value = value
+                ModelSystemDefinedTaxonomy._save_tag_values(remaining)
+            return len(tags)
+        except IntegrityError:
+            for tag in remaining:
+                log.warning("Unable to update the value of %s: the new value is already used.", tag)
+            return len(tags) - len(remaining)
+
+    @staticmethod
+    def _save_tag_values(tags: list[Tag]) -> None:
+        """
+        Write the new values of the given tags, and of their object tags.
+        """
+        Tag.objects.bulk_update(tags, ["value", "sort_key"])
+        TagSearchTrigram.record_renamed_tags(tags)
+        ObjectTag.objects.filter(tag__in=tags).update(
+            _value=Subquery(Tag.objects.filter(pk=OuterRef("tag_id")).values("value")[:1]),
+        )
+
     def tag_for_external_id(self, external_id: str):
         """
         Get the Tag object for the given external_id.
@@ -216,6 +392,25 @@ class LanguageTaxonomy(SystemDefinedTaxonomy):
                 return self.tag_for_external_id(lang_code)
         raise Tag.DoesNotExist
 
+    def tags_for_values(self, values: list[str]) -> dict[str, Tag]:
+        """
+        Get the Tag objects for the given values, as a dict keyed by the
+        lowercase version of each value. Values which aren't language names
+        are left out.
+        """
+        lang_codes = {lang_name: lang_code.lower() for lang_code, lang_name in settings.LANGUAGES}
+        # Get settings.LANGUAGES (a list of tuples) as a dict. In LMS/CMS this is already cached as LANGUAGE_DICT
+        languages_as_dict = getattr(settings, "LANGUAGE_DICT", dict(settings.LANGUAGES))
+        lang_codes_by_value = {
+            value: lang_codes[value]
+            for value in values
+            if value in lang_codes and lang_codes[value] in languages_as_dict
+        }
+        tags = self._get_or_create_tags({
+            lang_code: languages_as_dict[lang_code] for lang_code in lang_codes_by_value.values()
+        })
+        return {value.lower(): tags[lang_code] for value, lang_code in lang_codes_by_value.items()}
+
     def validate_external_id(self, external_id: str):
         """
         Check if 'external_id' is part of this Taxonomy.
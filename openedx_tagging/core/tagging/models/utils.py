@@ -1,6 +1,8 @@
 """
 Utilities for tagging and taxonomy models
 """
+import unicodedata
+
 from django.db import connection as db_connection
 from django.db.models import Aggregate, CharField, TextField
 from django.db.models.expressions import Combinable, Func
@@ -15,6 +17,32 @@ RESERVED_TAG_CHARS = [
 ]
 TAGS_CSV_SEPARATOR = RESERVED_TAG_CHARS[2]
 
+# How many rows to write, or filter by ID, in each query when working on many tags at once
+BATCH_SIZE = 1000
+
+
+def batches(items: list, size: int = BATCH_SIZE):
+    """
+    Split `items` into lists of at most `size` items, e.g. to filter by them
+    without going over the databases' limits of query parameters.
+    """
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def get_trigrams(text: str) -> set[str]:
+    """
+    Returns the set of trigrams (3-character substrings) of the given text,
+    after normalizing it so that searches are case and accent insensitive.
+
+    If a value contains a search term, its trigrams include all of the search
+    term's trigrams. That's what the tag search index is based on.
+    """
+    normalized = "".join(
+        char for char in unicodedata.normalize("NFKD", text.casefold()) if not unicodedata.combining(char)
+    )
+    return {normalized[i:i + 3] for i in range(len(normalized) - 2)}
+
 
 class ConcatNull(Func):  # pylint: disable=abstract-method
     """
@@ -3,11 +3,13 @@ Paginators uses by the REST API
 """
 from typing import Type
 
+from django.db.models import F
 from edx_rest_framework_extensions.paginators import DefaultPagination  # type: ignore[import]
+from rest_framework.pagination import CursorPagination
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from openedx_tagging.core.tagging.models import Tag, Taxonomy
+from openedx_tagging.core.tagging.models import ObjectTag, Tag, Taxonomy
 
 from .utils import UserPermissionsHelper
 
@@ -87,3 +89,69 @@ class DisabledTagsPagination(CanAddPermissionMixin, DefaultPagination):
         Returns the model that is being paginated.
         """
         return Tag
+
+
+class TagsCursorPagination(CanAddPermissionMixin, CursorPagination):
+    """
+    Keyset pagination for the get tags API view, used instead of
+    TagsPagination when requested with ?pagination=cursor.
+
+    Each page is found by filtering on the sort order of the results (the tag
+    value, or the sort_key for tags in tree order) from the last tag of the
+    previous page, so every page costs the same as the first one, instead of
+    scanning all the tags before it.
+    """
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 300
+    # Annotation holding the value of the ordering field, if it isn't in the results
+    position_field = "cursor_position"
+
+    @property
+    def _model(self) -> Type:
+        """
+        Returns the model that is being paginated.
+        """
+        return Tag
+
+    def get_ordering(self, request, queryset, view) -> tuple:
+        """
+        Keep the ordering of the queryset, which depends on the kind of results.
+        """
+        return tuple(queryset.query.order_by)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Include the value of the ordering field in the results, to compute the cursors from them.
+        """
+        field = queryset.query.order_by[0].lstrip("-")
+        if field not in queryset.query.values_select and field not in queryset.query.annotation_select:
+            queryset = queryset.annotate(**{self.position_field: F(field)})
+        return super().paginate_queryset(queryset, request, view)
+
+    def _get_position_from_instance(self, instance, ordering):
+        """
+        Read the position from the annotation added by paginate_queryset(), if any.
+        """
+        if self.position_field in instance:
+            return str(instance[self.position_field])
+        return super()._get_position_from_instance(instance, ordering)
+
+
+class ObjectTagsCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the object tags API view, when requested with
+    ?pagination=cursor. Each page has the object tags of `page_size` objects,
+    in order of their object IDs.
+    """
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = "object_id"
+
+    def paginate_object_tags(self, queryset, request, view=None) -> list[ObjectTag]:
+        """
+        Returns the object tags of the objects in the current page, in the same order as `queryset`.
+        """
+        object_ids = self.paginate_queryset(queryset.order_by().values("object_id").distinct(), request, view)
+        return list(queryset.filter(object_id__in=[row["object_id"] for row in object_ids or []]))
@@ -9,6 +9,8 @@ from edx_rest_framework_extensions.auth.session.authentication import (  # type:
 )
 from rest_framework.request import Request
 
+from ..rules import cached_has_perm
+
 
 def view_auth_classes(func_or_class):
     """
@@ -73,10 +75,12 @@ class UserPermissionsHelper:
         Returns None if no permissions were requested.
         Returns True if they may.
         Returns False if they may not.
+
+        Uses the request's permission cache, if the view has enabled it (see rules.permission_cache).
         """
         request = self._request
         assert request and request.user
-        return request.user.has_perm(perm_name, instance)
+        return cached_has_perm(request.user, perm_name, instance)
 
     def get_can_add(self, _instance=None) -> Optional[bool]:
         """
@@ -128,6 +128,7 @@ class ObjectTagListQueryParamsSerializer(serializers.Serializer):  # pylint: dis
     taxonomy = serializers.PrimaryKeyRelatedField(
         queryset=Taxonomy.objects.all(), required=False
     )
+    pagination = serializers.ChoiceField(choices=["cursor"], required=False)
 
 
 class ObjectTagMinimalSerializer(UserPermissionsSerializerMixin, serializers.ModelSerializer):
@@ -365,6 +366,8 @@ class TagImportTaskSerializer(serializers.ModelSerializer):
             "log",
             "status",
             "creation_date",
+            "total_actions",
+            "executed_actions",
         ]
 
 
@@ -3,13 +3,16 @@ Tagging API Views
 """
 from __future__ import annotations
 
+from typing import Iterable
+
 from django.core import exceptions
 from django.db import models
-from django.http import Http404, HttpResponse
+from django.http import Http404, StreamingHttpResponse
 from rest_framework import mixins, status
 from rest_framework.decorators import action
 from rest_framework.exceptions import MethodNotAllowed, PermissionDenied, ValidationError
 from rest_framework.generics import ListAPIView, RetrieveUpdateDestroyAPIView
+from rest_framework.pagination import BasePagination
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
@@ -28,11 +31,18 @@ from ...api import (
     update_tag_in_taxonomy,
 )
 from ...data import TagDataQuerySet
-from ...import_export.api import export_tags, import_tags
+from ...import_export.api import import_tags, iter_export_tags
 from ...import_export.parsers import ParserFormat
 from ...models import Tag, Taxonomy
-from ...rules import ObjectTagPermissionItem
-from ..paginators import MAX_FULL_DEPTH_THRESHOLD, DisabledTagsPagination, TagsPagination, TaxonomyPagination
+from ...rules import ObjectTagPermissionItem, cached_has_perm, permission_cache
+from ..paginators import (
+    MAX_FULL_DEPTH_THRESHOLD,
+    DisabledTagsPagination,
+    ObjectTagsCursorPagination,
+    TagsCursorPagination,
+    TagsPagination,
+    TaxonomyPagination,
+)
 from ..utils import view_auth_classes
 from .permissions import ObjectTagObjectPermissions, TaxonomyObjectPermissions, TaxonomyTagsObjectPermissions
 from .serializers import (
@@ -267,7 +277,7 @@ class TaxonomyView(ModelViewSet):
             raise ValidationError() from e
 
     @action(detail=True, methods=["get"])
-    def export(self, request, **_kwargs) -> HttpResponse:
+    def export(self, request, **_kwargs) -> StreamingHttpResponse:
         """
         Export a taxonomy.
         """
@@ -288,13 +298,10 @@ class TaxonomyView(ModelViewSet):
             else:
                 content_type = "text"
 
-        tags = export_tags(taxonomy, parser_format)
+        response = StreamingHttpResponse(iter_export_tags(taxonomy, parser_format), content_type=content_type)
         if query_params.data.get("download"):
-            response = HttpResponse(tags.encode('utf-8'), content_type=content_type)
             response["Content-Disposition"] = f'attachment; filename="{taxonomy.name}{parser_format.value}"'
-            return response
-
-        return HttpResponse(tags, content_type=content_type)
+        return response
 
     @action(detail=False, url_path="import", methods=["post"])
     def create_import(self, request: Request, **_kwargs) -> Response:
@@ -326,8 +333,10 @@ class TaxonomyView(ModelViewSet):
                 resync_object_tags()
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             else:
+                # Read the log before it's deleted along with the taxonomy
+                log = task.log
                 taxonomy.delete()
-                return Response(task.log, status=status.HTTP_400_BAD_REQUEST)
+                return Response(log, status=status.HTTP_400_BAD_REQUEST)
         except ValueError as e:
             return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
 
@@ -395,12 +404,21 @@ class ObjectTagView(
     View to retrieve ObjectTags for a provided Object ID (object_id).
 
     **Retrieve Parameters**
-        * object_id (required): - The Object ID to retrieve ObjectTags for.
+        * object_id (required): - The Object ID to retrieve ObjectTags for. Can contain '*' at the end
+          for wildcard matching, or use ',' to separate multiple object IDs. A wildcard pattern must have a prefix,
+          and unless ?pagination=cursor is used, it can match up to 10,000 ObjectTags of up to 1,000 objects.
         * taxonomy (optional) - PK of taxonomy to filter ObjectTags for.
+        * pagination (optional) - Set to "cursor" to return the ObjectTags of only `page_size` objects at a time,
+          in order of their object IDs. The response is then wrapped in {next, previous, results}, where "next" and
+          "previous" are the URLs of the adjacent pages, if any, and objects without tags are left out.
+        * page_size (optional) - Number of objects per page with ?pagination=cursor (default: 100).
 
     **Retrieve Example Requests**
         GET api/tagging/v1/object_tags/:object_id
         GET api/tagging/v1/object_tags/:object_id?taxonomy=1
+        GET api/tagging/v1/object_tags/:object_id_1,:object_id_2
+        GET api/tagging/v1/object_tags/:object_id_prefix*
+        GET api/tagging/v1/object_tags/:object_id_prefix*?pagination=cursor
 
     **Retrieve Query Returns**
         * 200 - Success
@@ -450,11 +468,20 @@ class ObjectTagView(
     minimal_serializer_class = ObjectTagMinimalSerializer
     permission_classes = [ObjectTagObjectPermissions]
     lookup_field = "object_id"
-    lookup_value_regex = r'[\w\.\+\-@:]+'
+    lookup_value_regex = r'[\w\.\+\-@:*,]+'
+    # The taxonomy that the object tags are being filtered by, if any. Set by get_queryset().
+    taxonomy_filter: Taxonomy | None = None
+    # Whether the object tags are returned a page of objects at a time. Set by get_queryset().
+    cursor_pagination = False
+    # Without ?pagination=cursor, wildcard requests that match more object tags than this are rejected
+    max_wildcard_object_tags = 10_000
+    # Requests for the object tags of more objects than this are rejected, to bound the permission checks
+    max_checked_objects = 1_000
 
     def get_queryset(self) -> models.QuerySet:
         """
-        Return a queryset of object tags for a given object.
+        Return a queryset of object tags for a given object, or for all the
+        objects matching the given pattern.
 
         If a taxonomy is passed in, object tags are limited to that taxonomy.
         """
@@ -464,27 +491,46 @@ class ObjectTagView(
         )
         query_params.is_valid(raise_exception=True)
         taxonomy = query_params.validated_data.get("taxonomy", None)
+        self.cursor_pagination = query_params.validated_data.get("pagination", None) == "cursor"
         taxonomy_id = None
         if taxonomy:
             taxonomy = taxonomy.cast()
             taxonomy_id = taxonomy.id
 
-        if object_id.endswith("*") or "," in object_id:  # pylint: disable=no-else-raise
-            raise ValidationError("Retrieving tags from multiple objects is not yet supported.")
-            # Note: This API is actually designed so that in the future it can be extended to return tags for multiple
-            # objects, e.g. if object_id.endswith("*") then it results in a object_id__startswith query. However, for
-            # now we have no use case for that so we retrieve tags for one object at a time.
-        else:
-            if not self.request.user.has_perm(
-                "oel_tagging.view_objecttag",
-                # The obj arg expects a model, but we are passing an object
-                ObjectTagPermissionItem(taxonomy=taxonomy, object_id=object_id),  # type: ignore[arg-type]
-            ):
-                raise PermissionDenied(
-                    "You do not have permission to view object tags for this taxonomy or object_id."
-                )
+        self.taxonomy_filter = taxonomy
+        if object_id == "*":
+            raise ValidationError("The object ID pattern must have a prefix before the '*'.")
+        if not object_id.endswith("*"):
+            # With a wildcard, we only know which objects match once the object tags are loaded, so the permissions
+            # are checked in retrieve() instead.
+            self._check_view_permissions(object_id.split(","))
+
+        try:
+            return get_object_tags(object_id, taxonomy_id)
+        except ValueError as err:
+            raise ValidationError(err.args[0]) from err
 
-        return get_object_tags(object_id, taxonomy_id)
+    def _check_view_permissions(self, object_ids: Iterable[str]) -> None:
+        """
+        Raise PermissionDenied unless the user can view the object tags of all the given objects.
+
+        The taxonomy being filtered on (if any) is checked once, and then all the objects are checked together by the
+        "view_objecttag_objectids" rule, not one ObjectTag at a time.
+        """
+        object_ids = tuple(dict.fromkeys(object_ids))
+        if len(object_ids) > self.max_checked_objects:
+            raise ValidationError(
+                f"The object tags of at most {self.max_checked_objects} objects can be retrieved at once. "
+                "Use ?pagination=cursor to get them a page at a time."
+            )
+        user = self.request.user
+        if not (
+            cached_has_perm(user, "oel_tagging.view_objecttag_taxonomy", self.taxonomy_filter)
+            and cached_has_perm(user, "oel_tagging.view_objecttag_objectids", object_ids)
+        ):
+            raise PermissionDenied(
+                "You do not have permission to view object tags for this taxonomy or object_id."
+            )
 
     def retrieve(self, request, *args, **kwargs) -> Response:
         """
@@ -496,14 +542,37 @@ class ObjectTagView(
         By default retrieve would expect an ObjectTag ID to be passed in the
         path and returns a it as a single result however that is not
         behavior we want.
-        """
-        object_tags = self.filter_queryset(self.get_queryset())
-        serializer = ObjectTagsByTaxonomySerializer(list(object_tags), context=self.get_serializer_context())
-        response_data = serializer.data
-        if self.kwargs["object_id"] not in response_data:
-            # For consistency, the key with the object_id should always be present in the response, even if there
-            # are no tags at all applied to this object.
-            response_data[self.kwargs["object_id"]] = {"taxonomies": []}
+
+        The permissions are the same for every ObjectTag with the same taxonomy and object_id, so they are cached
+        while building the response, rather than evaluating the rules again for every ObjectTag.
+        """
+        with permission_cache(request.user):
+            queryset = self.filter_queryset(self.get_queryset())
+            paginator = ObjectTagsCursorPagination() if self.cursor_pagination else None
+            object_id_pattern = self.kwargs["object_id"]
+            if paginator:
+                object_tags = paginator.paginate_object_tags(queryset, request, view=self)
+            elif object_id_pattern.endswith("*"):
+                object_tags = list(queryset[:self.max_wildcard_object_tags + 1])
+                if len(object_tags) > self.max_wildcard_object_tags:
+                    raise ValidationError(
+                        f"The object ID pattern matches more than {self.max_wildcard_object_tags} object tags. "
+                        "Use ?pagination=cursor to get them a page at a time."
+                    )
+            else:
+                object_tags = list(queryset)
+            if object_id_pattern.endswith("*"):
+                self._check_view_permissions(dict.fromkeys(object_tag.object_id for object_tag in object_tags))
+            serializer = ObjectTagsByTaxonomySerializer(object_tags, context=self.get_serializer_context())
+            response_data = serializer.data
+        if paginator:
+            return paginator.get_paginated_response(response_data)
+        if not object_id_pattern.endswith("*"):
+            for object_id in object_id_pattern.split(","):
+                if object_id not in response_data:
+                    # For consistency, the key with the object_id should always be present in the response, even if
+                    # there are no tags at all applied to this object.
+                    response_data[object_id] = {"taxonomies": []}
         return Response(response_data)
 
     def update(self, request, *args, **kwargs) -> Response:
@@ -554,6 +623,8 @@ class ObjectTagView(
             raise MethodNotAllowed("PATCH", detail="PATCH not allowed")
 
         object_id = kwargs.pop('object_id')
+        if object_id.endswith("*") or "," in object_id:
+            raise ValidationError("Updating tags of multiple objects at once is not supported.")
         perm = "oel_tagging.can_tag_object"
         body = ObjectTagUpdateBodySerializer(data=request.data)
         body.is_valid(raise_exception=True)
@@ -666,10 +737,14 @@ class TaxonomyTagsView(ListAPIView, RetrieveUpdateDestroyAPIView):
         * page (optional) - Page number (default: 1)
         * page_size (optional) - Number of items per page (default: 30). Ignored when there are fewer tags than
           specified by ?full_depth_threshold.
+        * pagination (optional) - Set to "cursor" to page through the results with the "next" and "previous" URLs
+          of the response (which have a ?cursor parameter) instead of page numbers. Every page then takes the same
+          time to load, however deep into the results it is, but the response has no count of pages or results.
 
     **List Example Requests**
         GET api/tagging/v1/taxonomy/:id/tags                                        - Get tags of taxonomy
         GET api/tagging/v1/taxonomy/:id/tags?parent_tag=Physics&include_counts      - Get child tags of tag
+        GET api/tagging/v1/taxonomy/:id/tags?pagination=cursor                      - Get tags of taxonomy by cursor
 
     **List Query Returns**
         * 200 - Success
@@ -765,7 +840,7 @@ class TaxonomyTagsView(ListAPIView, RetrieveUpdateDestroyAPIView):
     """
 
     permission_classes = [TaxonomyTagsObjectPermissions]
-    pagination_class = TagsPagination
+    pagination_class: type[BasePagination] = TagsPagination
     serializer_class = TagDataSerializer
 
     def __init__(self, *args, **kwargs):
@@ -821,6 +896,11 @@ class TaxonomyTagsView(ListAPIView, RetrieveUpdateDestroyAPIView):
             # queryset just for schema generation metadata
             return Taxonomy.objects.none()  # type: ignore[return-value]
         taxonomy = self.get_taxonomy()
+        pagination = self.request.query_params.get("pagination", None)
+        if pagination == "cursor":
+            self.pagination_class = TagsCursorPagination
+        elif pagination is not None:
+            raise ValidationError("Invalid pagination")
         parent_tag_value = self.request.query_params.get("parent_tag", None)
         include_counts = "include_counts" in self.request.query_params
         search_term = self.request.query_params.get("search_term", None)
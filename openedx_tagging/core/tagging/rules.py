@@ -3,13 +3,14 @@ Django rules-based permissions for tagging
 """
 from __future__ import annotations
 
-from typing import Callable, Union
+from contextlib import contextmanager
+from typing import Callable, Iterator, Union
 
 import django.contrib.auth.models
 import rules
 from attrs import define
 
-from .models import Tag, Taxonomy
+from .models import ObjectTag, Tag, Taxonomy
 
 UserType = Union[
     django.contrib.auth.models.User, django.contrib.auth.models.AnonymousUser
@@ -31,6 +32,65 @@ class ObjectTagPermissionItem:
     object_id: str
 
 
+# Name of the attribute of the user object that holds the permission cache, while it is enabled
+_PERMISSION_CACHE_ATTR = "_oel_tagging_permission_cache"
+
+
+@contextmanager
+def permission_cache(user: UserType) -> Iterator[None]:
+    """
+    Cache the results of the object tag permission checks made for this user
+    while the context is active (e.g. while serializing one response).
+
+    Results are cached by (user, perm, taxonomy_id, object_id), so that when
+    serializing many ObjectTags, the rules run once per taxonomy and per object
+    instead of once per ObjectTag.
+    """
+    if hasattr(user, _PERMISSION_CACHE_ATTR):
+        # The cache is already enabled, e.g. update() calling retrieve()
+        yield
+        return
+    setattr(user, _PERMISSION_CACHE_ATTR, {})
+    try:
+        yield
+    finally:
+        delattr(user, _PERMISSION_CACHE_ATTR)
+
+
+def _permission_cache_key(
+    user: UserType, perm: str, obj: object,
+) -> tuple[int | None, str, int | None, str | None] | None:
+    """
+    Returns the key used to cache the result of checking `perm` on `obj`, or
+    None if permission checks on this kind of object are not cached.
+    """
+    if obj is None:
+        return (user.pk, perm, None, None)
+    if isinstance(obj, str):
+        return (user.pk, perm, None, obj)
+    if isinstance(obj, Taxonomy):
+        return (user.pk, perm, obj.pk, None)
+    if isinstance(obj, ObjectTagPermissionItem):
+        return (user.pk, perm, obj.taxonomy.pk if obj.taxonomy else None, obj.object_id)
+    if isinstance(obj, ObjectTag):
+        return (user.pk, perm, obj.taxonomy_id, obj.object_id)
+    return None
+
+
+def cached_has_perm(user: UserType, perm: str, obj: object = None) -> bool:
+    """
+    Same as user.has_perm(perm, obj), but uses the permission cache if it is
+    enabled for this user (see permission_cache()).
+    """
+    cache = getattr(user, _PERMISSION_CACHE_ATTR, None)
+    key = _permission_cache_key(user, perm, obj)
+    if cache is None or key is None:
+        return user.has_perm(perm, obj)  # type: ignore[arg-type]
+    if key not in cache:
+        cache[key] = user.has_perm(perm, obj)  # type: ignore[arg-type]
+    return cache[key]
+
+
 @rules.predicate
 def can_view_taxonomy(user: UserType, taxonomy: Taxonomy | None = None) -> bool:
     """
@@ -98,6 +158,19 @@ def can_view_object_tag_objectid(_user: UserType, _object_id: str) -> bool:
     return True
 
 
+@rules.predicate
+def can_view_object_tag_objectids(user: UserType, object_ids: tuple[str, ...]) -> bool:
+    """
+    Checks if the user can view the object tags of all the given objects, e.g.
+    all the objects matched by a wildcard.
+
+    By default this checks the "view_objecttag_objectid" rule of each object.
+    Other apps can replace it with a rule that checks many objects at once
+    (e.g. once per course), which is faster.
+    """
+    return all(cached_has_perm(user, "oel_tagging.view_objecttag_objectid", object_id) for object_id in object_ids)
+
+
 @rules.predicate
 def can_view_object_tag(
     user: UserType, perm_obj: ObjectTagPermissionItem | None = None
@@ -111,18 +184,12 @@ def can_view_object_tag(
         return True
 
     # Checks the permission for the taxonomy
-    taxonomy_perm = user.has_perm(
-        "oel_tagging.view_objecttag_taxonomy", perm_obj.taxonomy  # type: ignore[arg-type]
-    )
+    taxonomy_perm = cached_has_perm(user, "oel_tagging.view_objecttag_taxonomy", perm_obj.taxonomy)
     if not taxonomy_perm:
         return False
 
     # Checks the permission for the object_id
-    objectid_perm = user.has_perm(
-        "oel_tagging.view_objecttag_objectid",
-        # The obj arg expects an object, but we are passing a string
-        perm_obj.object_id,  # type: ignore[arg-type]
-    )
+    objectid_perm = cached_has_perm(user, "oel_tagging.view_objecttag_objectid", perm_obj.object_id)
     return objectid_perm
 
 
@@ -159,18 +226,12 @@ def can_change_object_tag(
         return True
 
     # Checks the permission for the taxonomy
-    taxonomy_perm = user.has_perm(
-        "oel_tagging.change_objecttag_taxonomy", perm_obj.taxonomy  # type: ignore[arg-type]
-    )
+    taxonomy_perm = cached_has_perm(user, "oel_tagging.change_objecttag_taxonomy", perm_obj.taxonomy)
     if not taxonomy_perm:
         return False
 
     # Checks the permission for the object_id
-    objectid_perm = user.has_perm(
-        "oel_tagging.change_objecttag_objectid",
-        # The obj arg expects an object, but we are passing a string
-        perm_obj.object_id,  # type: ignore[arg-type]
-    )
+    objectid_perm = cached_has_perm(user, "oel_tagging.change_objecttag_objectid", perm_obj.object_id)
 
     return objectid_perm
 
@@ -200,6 +261,7 @@ rules.add_perm("oel_tagging.can_tag_object", can_change_object_tag)
 
 # Users can tag objects using tags from any taxonomy that they have permission to view
 rules.add_perm("oel_tagging.view_objecttag_objectid", can_view_object_tag_objectid)
+rules.add_perm("oel_tagging.view_objecttag_objectids", can_view_object_tag_objectids)
 rules.add_perm("oel_tagging.view_objecttag_taxonomy", can_view_object_tag_taxonomy)
 rules.add_perm("oel_tagging.change_objecttag_taxonomy", can_view_object_tag_taxonomy)
 rules.add_perm("oel_tagging.change_objecttag_objectid", can_change_object_tag_objectid)
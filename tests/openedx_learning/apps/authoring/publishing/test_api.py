@@ -9,6 +9,8 @@ from uuid import UUID
 import pytest
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from openedx_learning.apps.authoring.publishing import api as publishing_api
 from openedx_learning.apps.authoring.publishing.models import (
@@ -1344,6 +1346,299 @@ class ContainerTestCase(TestCase):
         # Even though we didn't pass any rows, it should copy the previous version's rows
         assert v2.entity_list.entitylistrow_set.count() == 1
 
+    def test_latest_version_num(self):
+        """Test that latest_version_num tracks versions and reserves new ones."""
+        entity = publishing_api.create_publishable_entity(
+            self.learning_package.id,
+            "entity",
+            created=self.now,
+            created_by=None,
+        )
+        container = publishing_api.create_container(
+            self.learning_package.id,
+            "my_container",
+            created=self.now,
+            created_by=None,
+        )
+        assert entity.latest_version_num == 0
+
+        # Explicitly numbered versions move the counter forward, never back.
+        for version_num in [1, 5, 3]:
+            publishing_api.create_publishable_entity_version(
+                entity.id,
+                version_num=version_num,
+                title=f"Entity v{version_num}",
+                created=self.now,
+                created_by=None,
+            )
+        entity.refresh_from_db()
+        assert entity.latest_version_num == 5
+
+        # Reserving bumps every counter with a single UPDATE (+ one SELECT).
+        with self.assertNumQueries(2):
+            reserved = publishing_api.reserve_next_version_nums([entity.id, container.pk, -1])
+        assert reserved == {entity.id: 6, container.pk: 1}
+
+        # The next container version picks up after the reserved number, and
+        # still carries the title over from the last version that exists.
+        publishing_api.create_next_container_version(
+            container.pk,
+            title="My Container",
+            entity_rows=None,
+            created=self.now,
+            created_by=None,
+            force_version_num=1,
+        )
+        with CaptureQueriesContext(connection) as queries:
+            v2 = publishing_api.create_next_container_version(
+                container.pk,
+                title=None,
+                entity_rows=None,
+                created=self.now,
+                created_by=None,
+            )
+        assert v2.version_num == 2
+        # The reservation is the only query that updates the counter
+        assert len([
+            query for query in queries.captured_queries
+            if query["sql"].startswith("UPDATE") and "latest_version_num" in query["sql"]
+        ]) == 1
+        assert v2.title == "My Container"
+        container.publishable_entity.refresh_from_db()
+        assert container.publishable_entity.latest_version_num == 2
+
+    def test_create_entity_lists_bulk(self):
+        """Test that many entity lists can be validated and created at once."""
+        entities = []
+        versions = []
+        for i in range(2):
+            entity = publishing_api.create_publishable_entity(
+                self.learning_package.id,
+                f"child_{i}",
+                created=self.now,
+                created_by=None,
+            )
+            versions.append(publishing_api.create_publishable_entity_version(
+                entity.id,
+                version_num=1,
+                title=f"Child {i} 🌴",
+                created=self.now,
+                created_by=None,
+            ))
+            entities.append(entity)
+        Row = publishing_api.ContainerEntityRow
+        entity_rows_lists = [
+            [Row(entity_pk=entities[0].pk), Row(entity_pk=entities[1].pk, version_pk=versions[1].pk)],
+            [],
+            [Row(entity_pk=entities[1].pk)],
+        ]
+        # 1 query for each check, 1 to create the lists, 1 to create the rows
+        with self.assertNumQueries(4):
+            entity_lists = publishing_api.create_entity_lists_bulk(
+                entity_rows_lists,
+                learning_package_id=self.learning_package.id,
+            )
+        assert len(entity_lists) == 3
+        assert [
+            [(row.entity_id, row.entity_version_id) for row in entity_list.rows]
+            for entity_list in entity_lists
+        ] == [
+            [(entities[0].pk, None), (entities[1].pk, versions[1].pk)],
+            [],
+            [(entities[1].pk, None)],
+        ]
+
+        # A version pinned to the wrong entity in any of the lists is rejected:
+        with pytest.raises(ValidationError):
+            publishing_api.create_entity_lists_bulk(
+                [[Row(entity_pk=entities[0].pk)], [Row(entity_pk=entities[0].pk, version_pk=versions[1].pk)]],
+                learning_package_id=self.learning_package.id,
+            )
+
+        # So is an entity from a different learning package:
+        other_package = publishing_api.create_learning_package("other_package", "Other Package")
+        other_entity = publishing_api.create_publishable_entity(
+            other_package.id,
+            "other_child",
+            created=self.now,
+            created_by=None,
+        )
+        with pytest.raises(ValidationError):
+            publishing_api.create_entity_lists_bulk(
+                [[Row(entity_pk=entities[0].pk)], [Row(entity_pk=other_entity.pk)]],
+                learning_package_id=self.learning_package.id,
+            )
+
+    def test_contains_unpublished_changes_bulk(self):
+        """Test that we can check many containers for unpublished changes at once."""
+        child = publishing_api.create_publishable_entity(
+            self.learning_package.id,
+            "child",
+            created=self.now,
+            created_by=None,
+        )
+        publishing_api.create_publishable_entity_version(
+            child.id,
+            version_num=1,
+            title="Child 🌴",
+            created=self.now,
+            created_by=None,
+        )
+        containers = []
+        for i in range(3):
+            container = publishing_api.create_container(
+                self.learning_package.id,
+                f"container_{i}",
+                created=self.now,
+                created_by=None,
+            )
+            publishing_api.create_container_version(
+                container.pk,
+                1,
+                title=f"Container {i}",
+                # Only the first container holds the child
+                entity_rows=[publishing_api.ContainerEntityRow(entity_pk=child.pk)] if i == 0 else [],
+                created=self.now,
+                created_by=None,
+            )
+            containers.append(container)
+        # An empty container that was never drafted or published:
+        never_drafted = publishing_api.create_container(
+            self.learning_package.id,
+            "never_drafted",
+            created=self.now,
+            created_by=None,
+        )
+        container_ids = [c.pk for c in containers] + [never_drafted.pk]
+
+        # Nothing has been published yet:
+        with self.assertNumQueries(1):
+            result = publishing_api.contains_unpublished_changes_bulk(container_ids)
+        assert result == {
+            containers[0].pk: True,
+            containers[1].pk: True,
+            containers[2].pk: True,
+            never_drafted.pk: False,
+        }
+
+        publishing_api.publish_all_drafts(self.learning_package.id)
+        # Edit the child (a change in a descendant) and the title of container 2
+        publishing_api.create_publishable_entity_version(
+            child.id,
+            version_num=2,
+            title="Child v2",
+            created=self.now,
+            created_by=None,
+        )
+        publishing_api.create_next_container_version(
+            containers[2].pk,
+            title="Container 2 v2",
+            entity_rows=None,
+            created=self.now,
+            created_by=None,
+        )
+        expected = {
+            containers[0].pk: True,
+            containers[1].pk: False,
+            containers[2].pk: True,
+            never_drafted.pk: False,
+        }
+        with self.assertNumQueries(1):
+            assert publishing_api.contains_unpublished_changes_bulk(container_ids) == expected
+        for container_id, has_changes in expected.items():
+            assert publishing_api.contains_unpublished_changes(container_id) is has_changes
+
+        # The same check can be done on a QuerySet, and used for filtering:
+        qset = Container.objects.filter(pk__in=container_ids)
+        assert publishing_api.contains_unpublished_changes_bulk(qset) == expected
+        changed = publishing_api.annotate_unpublished_changes(qset).filter(contains_unpublished_changes=True)
+        assert sorted(c.pk for c in changed) == [containers[0].pk, containers[2].pk]
+
+    def test_container_children_bulk(self):
+        """Test that we can get children counts and keys for many containers at once."""
+        children = []
+        for i in range(3):
+            child = publishing_api.create_publishable_entity(
+                self.learning_package.id,
+                f"child_{i}",
+                created=self.now,
+                created_by=None,
+            )
+            publishing_api.create_publishable_entity_version(
+                child.id,
+                version_num=1,
+                title=f"Child {i} 🌴",
+                created=self.now,
+                created_by=None,
+            )
+            children.append(child)
+        rows = [publishing_api.ContainerEntityRow(entity_pk=child.pk) for child in children]
+        containers = []
+        container_versions = []
+        for i, entity_rows in enumerate([rows, list(reversed(rows[:2])), []]):
+            container = publishing_api.create_container(
+                self.learning_package.id,
+                f"container_{i}",
+                created=self.now,
+                created_by=None,
+            )
+            container_versions.append(publishing_api.create_container_version(
+                container.pk,
+                1,
+                title=f"Container {i}",
+                entity_rows=entity_rows,
+                created=self.now,
+                created_by=None,
+            ))
+            containers.append(container)
+        never_drafted = publishing_api.create_container(
+            self.learning_package.id,
+            "never_drafted",
+            created=self.now,
+            created_by=None,
+        )
+        container_ids = [c.pk for c in containers] + [never_drafted.pk]
+        publishing_api.publish_all_drafts(self.learning_package.id)
+        # Soft-delete a child in the draft:
+        publishing_api.soft_delete_draft(children[0].pk)
+
+        with self.assertNumQueries(1):
+            draft_counts = publishing_api.get_container_children_count_bulk(container_ids, published=False)
+        assert draft_counts == {
+            containers[0].pk: 2,
+            containers[1].pk: 1,
+            containers[2].pk: 0,
+            never_drafted.pk: None,
+        }
+        with self.assertNumQueries(1):
+            published_counts = publishing_api.get_container_children_count_bulk(
+                Container.objects.filter(pk__in=container_ids),
+                published=True,
+            )
+        assert published_counts == {
+            containers[0].pk: 3,
+            containers[1].pk: 2,
+            containers[2].pk: 0,
+            never_drafted.pk: None,
+        }
+        # The results match the one-by-one version:
+        for container in containers:
+            container = publishing_api.get_container(container.pk)
+            draft_count = publishing_api.get_container_children_count(container, published=False)
+            published_count = publishing_api.get_container_children_count(container, published=True)
+            assert draft_count == draft_counts[container.pk]
+            assert published_count == published_counts[container.pk]
+
+        with self.assertNumQueries(1):
+            keys = publishing_api.get_container_children_entities_keys_bulk(container_versions)
+        assert keys == {
+            container_versions[0].pk: ["child_0", "child_1", "child_2"],
+            container_versions[1].pk: ["child_1", "child_0"],
+            container_versions[2].pk: [],
+        }
+        for container_version in container_versions:
+            assert publishing_api.get_container_children_entities_keys(container_version) == keys[container_version.pk]
+
 
 class EntitiesQueryTestCase(TestCase):
     """
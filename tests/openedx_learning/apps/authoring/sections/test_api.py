@@ -214,9 +214,9 @@ class SectionTestCase(SubSectionTestCase):  # pylint: disable=test-inherits-test
         Test how many database queries are required to create a section
         """
         # The exact numbers here aren't too important - this is just to alert us if anything significant changes.
-        with self.assertNumQueries(28):
+        with self.assertNumQueries(27):
             _empty_section = self.create_section_with_subsections([])
-        with self.assertNumQueries(35):
+        with self.assertNumQueries(33):
             # And try with a non-empty section:
             self.create_section_with_subsections([self.subsection_1, self.subsection_2_v1], key="u2")
 
@@ -1024,7 +1024,7 @@ class SectionTestCase(SubSectionTestCase):  # pylint: disable=test-inherits-test
             self.subsection_2,
             self.subsection_2_v1,
         ])
-        with self.assertNumQueries(4):
+        with self.assertNumQueries(2):
             result = authoring_api.get_subsections_in_section(section, published=False)
         assert result == [
             Entry(self.subsection_1.versioning.draft),
@@ -1032,7 +1032,7 @@ class SectionTestCase(SubSectionTestCase):  # pylint: disable=test-inherits-test
             Entry(self.subsection_2.versioning.draft, pinned=True),
         ]
         authoring_api.publish_all_drafts(self.learning_package.id)
-        with self.assertNumQueries(4):
+        with self.assertNumQueries(2):
             result = authoring_api.get_subsections_in_section(section, published=True)
         assert result == [
             Entry(self.subsection_1.versioning.draft),
@@ -197,9 +197,9 @@ class SubSectionTestCase(UnitTestCase):  # pylint: disable=test-inherits-tests
         Test how many database queries are required to create a subsection
         """
         # The exact numbers here aren't too important - this is just to alert us if anything significant changes.
-        with self.assertNumQueries(28):
+        with self.assertNumQueries(27):
             _empty_subsection = self.create_subsection_with_units([])
-        with self.assertNumQueries(35):
+        with self.assertNumQueries(33):
             # And try with a non-empty subsection:
             self.create_subsection_with_units([self.unit_1, self.unit_2_v1], key="u2")
 
@@ -262,7 +262,7 @@ class SubSectionTestCase(UnitTestCase):  # pylint: disable=test-inherits-tests
                 created_by=None,
             )
 
-    @patch('openedx_learning.apps.authoring.subsections.api._pub_entities_for_units')
+    @patch('openedx_learning.apps.authoring.publishing.api.get_entity_rows_for_children')
     def test_adding_mismatched_versions(self, mock_entities_for_units):  # pylint: disable=arguments-renamed
         """
         Test that versioned units must match their entities.
@@ -1055,7 +1055,7 @@ class SubSectionTestCase(UnitTestCase):  # pylint: disable=test-inherits-tests
             self.unit_2,
             self.unit_2_v1,
         ])
-        with self.assertNumQueries(4):
+        with self.assertNumQueries(2):
             result = authoring_api.get_units_in_subsection(subsection, published=False)
         assert result == [
             Entry(self.unit_1.versioning.draft),
@@ -1063,7 +1063,7 @@ class SubSectionTestCase(UnitTestCase):  # pylint: disable=test-inherits-tests
             Entry(self.unit_2.versioning.draft, pinned=True),
         ]
         authoring_api.publish_all_drafts(self.learning_package.id)
-        with self.assertNumQueries(4):
+        with self.assertNumQueries(2):
             result = authoring_api.get_units_in_subsection(subsection, published=True)
         assert result == [
             Entry(self.unit_1.versioning.draft),
@@ -185,9 +185,9 @@ class UnitTestCase(ComponentTestCase):
         Test how many database queries are required to create a unit
         """
         # The exact numbers here aren't too important - this is just to alert us if anything significant changes.
-        with self.assertNumQueries(26):
+        with self.assertNumQueries(27):
             _empty_unit = self.create_unit_with_components([])
-        with self.assertNumQueries(32):
+        with self.assertNumQueries(33):
             # And try with a non-empty unit:
             self.create_unit_with_components([self.component_1, self.component_2_v1], key="u2")
 
@@ -250,7 +250,7 @@ class UnitTestCase(ComponentTestCase):
                 created_by=None,
             )
 
-    @patch('openedx_learning.apps.authoring.units.api._pub_entities_for_components')
+    @patch('openedx_learning.apps.authoring.publishing.api.get_entity_rows_for_children')
     def test_adding_mismatched_versions(self, mock_entities_for_components):
         """
         Test that versioned components must match their entities.
@@ -1043,7 +1043,7 @@ class UnitTestCase(ComponentTestCase):
             self.component_2,
             self.component_2_v1,
         ])
-        with self.assertNumQueries(3):
+        with self.assertNumQueries(2):
             result = authoring_api.get_components_in_unit(unit, published=False)
         assert result == [
             Entry(self.component_1.versioning.draft),
@@ -1051,7 +1051,7 @@ class UnitTestCase(ComponentTestCase):
             Entry(self.component_2.versioning.draft, pinned=True),
         ]
         authoring_api.publish_all_drafts(self.learning_package.id)
-        with self.assertNumQueries(3):
+        with self.assertNumQueries(2):
             result = authoring_api.get_components_in_unit(unit, published=True)
         assert result == [
             Entry(self.component_1.versioning.draft),
@@ -1059,6 +1059,32 @@ class UnitTestCase(ComponentTestCase):
             Entry(self.component_2.versioning.draft, pinned=True),
         ]
 
+    def test_get_entities_in_containers_queries(self):
+        """
+        Test that the children of many units can be loaded at once, with their
+        ComponentVersions preloaded, in a fixed number of queries.
+        """
+        unit_1 = self.create_unit_with_components([self.component_1, self.component_2_v1], key="u1")
+        unit_2 = self.create_unit_with_components([self.component_2], key="u2")
+        unit_3 = self.create_unit_with_components([], key="u3")
+        units = [
+            authoring_api.get_unit(unit.pk) for unit in (unit_1, unit_2, unit_3)
+        ]
+        expected = {
+            unit_1.pk: [(self.component_1_v1, False), (self.component_2_v1, True)],
+            unit_2.pk: [(self.component_2.versioning.draft, False)],
+            unit_3.pk: [],
+        }
+        with self.assertNumQueries(2):
+            result = authoring_api.get_entities_in_containers(units, published=False)
+        with self.assertNumQueries(0):
+            assert {
+                unit_pk: [(entry.entity_version.componentversion, entry.pinned) for entry in entries]
+                for unit_pk, entries in result.items()
+            } == expected
+        # Nothing has been published yet:
+        assert not authoring_api.get_entities_in_containers(units, published=True)
+
     def test_add_remove_container_children(self):
         """
         Test adding and removing children components from containers.
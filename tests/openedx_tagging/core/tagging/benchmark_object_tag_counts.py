@@ -0,0 +1,128 @@
+"""
+Benchmark get_object_tag_counts() on synthetic data.
+
+This creates a synthetic taxonomy and a large number of object tags, then times
+how long get_object_tag_counts() takes to count the tags (with and without
+implicit tags) of every block in one "course".
+
+All the synthetic data is created in a transaction which is rolled back at the
+end, so this can be run against a development database, but it should never be
+run in production. It isn't part of the installed package. Run it from the root
+of the repository with:
+
+    python -m tests.openedx_tagging.core.tagging.benchmark_object_tag_counts --help
+"""
+import argparse
+import os
+import sys
+import time
+from typing import TextIO
+
+import django
+from django.db import transaction
+
+
+class _Rollback(Exception):
+    """
+    Raised to roll back the synthetic data once the benchmark is done.
+    """
+
+
+def benchmark_object_tag_counts(
+    stdout: TextIO,
+    num_object_tags: int = 1_000_000,
+    blocks_per_course: int = 20_000,
+    tags_per_block: int = 5,
+    repeat: int = 3,
+) -> None:
+    """
+    Create the data, run the benchmark, write the results to `stdout`, and roll back.
+    """
+    try:
+        with transaction.atomic():
+            _run_benchmark(stdout, num_object_tags, blocks_per_course, tags_per_block, repeat)
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+def _run_benchmark(
+    stdout: TextIO,
+    num_object_tags: int,
+    blocks_per_course: int,
+    tags_per_block: int,
+    repeat: int,
+) -> None:
+    """
+    Create the data and time the queries.
+    """
+    # pylint: disable=import-outside-toplevel
+    from openedx_tagging.core.tagging import api
+    from openedx_tagging.core.tagging.models import ObjectTag, Tag
+
+    start = time.perf_counter()
+    taxonomy = api.create_taxonomy("Benchmark Taxonomy", allow_multiple=True)
+    # A tree of 10 root tags, each with 10 children, each with 10 grandchildren:
+    leaf_tags = []
+    for i in range(10):
+        root = Tag.objects.create(taxonomy=taxonomy, value=f"Tag {i}")
+        for j in range(10):
+            child = Tag.objects.create(taxonomy=taxonomy, value=f"Tag {i}.{j}", parent=root)
+            for k in range(10):
+                leaf_tags.append(Tag.objects.create(taxonomy=taxonomy, value=f"Tag {i}.{j}.{k}", parent=child))
+
+    num_blocks = max(num_object_tags // tags_per_block, 1)
+    batch = []
+    for block_num in range(num_blocks):
+        course_num, block_in_course = divmod(block_num, blocks_per_course)
+        object_id = f"block-v1:Bench+C{course_num}+run+type@html+block@{block_in_course}"
+        for tag_num in range(tags_per_block):
+            tag = leaf_tags[(block_num * 7 + tag_num * 131) % len(leaf_tags)]
+            batch.append(ObjectTag(
+                object_id=object_id,
+                taxonomy=taxonomy,
+                tag=tag,
+                _value=tag.value,
+                _export_id=taxonomy.export_id,
+            ))
+        if len(batch) >= 10_000:
+            ObjectTag.objects.bulk_create(batch)
+            batch = []
+    ObjectTag.objects.bulk_create(batch)
+    stdout.write(
+        f"Created {len(leaf_tags)} leaf tags and {num_blocks * tags_per_block} object tags "
+        f"in {time.perf_counter() - start:.1f}s.\n"
+    )
+
+    pattern = "block-v1:Bench+C0+run+type@html+block@*"
+    for count_implicit in (False, True):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = api.get_object_tag_counts(pattern, count_implicit=count_implicit)
+            timings.append(time.perf_counter() - start)
+        stdout.write(
+            f"get_object_tag_counts(count_implicit={count_implicit}) counted the tags of {len(result)} objects "
+            f"in {min(timings) * 1000:.1f}ms.\n"
+        )
+
+
+def main() -> None:
+    """
+    Run the benchmark with the options from the command line, on the database of DJANGO_SETTINGS_MODULE.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--num-object-tags", type=int, default=1_000_000, help="Total number of object tags to create.")
+    parser.add_argument("--blocks-per-course", type=int, default=20_000, help="Number of objects (blocks) per course.")
+    parser.add_argument("--tags-per-block", type=int, default=5, help="Number of tags applied to each block.")
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="How many times to run each query. The fastest time is reported.",
+    )
+    args = parser.parse_args()
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "projects.dev")
+    django.setup()
+    benchmark_object_tag_counts(sys.stdout, **vars(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,15 @@ Test for import/export API
 """
 import json
 from io import BytesIO
+from unittest.mock import patch
 
 from django.test.testcases import TestCase
 
 import openedx_tagging.core.tagging.import_export.api as import_export_api
 from openedx_tagging.core.tagging.import_export import ParserFormat
+from openedx_tagging.core.tagging.import_export.executor import BulkImportExecutor
 from openedx_tagging.core.tagging.models import LanguageTaxonomy, Tag, TagImportTask, TagImportTaskState, Taxonomy
+from openedx_tagging.core.tagging.models.import_export import LOG_CHUNK_SIZE
 
 from .mixins import TestImportExportMixin
 
@@ -62,6 +65,44 @@ class TestImportExportApi(TestImportExportMixin, TestCase):
         log = import_export_api.get_last_import_log(self.taxonomy)
         assert "Import task created" in log
 
+    def test_log_chunks(self) -> None:
+        task = TagImportTask.create(self.taxonomy)
+        message = "x" * 1000
+        for _ in range(200):
+            task.add_log(message, save=False)
+        # Adding to the log only inserts the new text, it doesn't rewrite the whole log
+        with self.assertNumQueries(2):
+            task.add_log(message)
+
+        chunks = list(import_export_api.iter_last_import_log(self.taxonomy))
+        assert len(chunks) == 5
+        assert "".join(chunks) == task.log == import_export_api.get_last_import_log(self.taxonomy)
+        assert task.log.count(message) == 201
+
+        # The log can also be read a few chunks at a time
+        first_chunks = task.get_log_chunks(limit=3)
+        last_chunks = task.get_log_chunks(after=first_chunks[-1].id)
+        assert [chunk.text for chunk in first_chunks + last_chunks] == chunks
+
+    def test_log_of_failed_execute(self) -> None:
+        """
+        The log of an import that fails while executing is kept in full, even
+        if part of it was saved in the transaction that was rolled back.
+        """
+        tags = [{"id": f"new_tag_{i}", "value": f"New tag {i}"} for i in range(1000)]
+        file = BytesIO(json.dumps({"tags": tags}).encode())
+        with patch.object(BulkImportExecutor, "execute", side_effect=RuntimeError("Execution failed")):
+            result, task, _plan = import_export_api.import_tags(self.taxonomy, file, self.parser_format)
+        assert not result
+        assert not self.taxonomy.tag_set.filter(external_id="new_tag_0").exists()
+        log = import_export_api.get_last_import_log(self.taxonomy)
+        assert len(log) > LOG_CHUNK_SIZE
+        assert log == task.log
+        assert log.count(" [Started]\n") == 1000
+        assert log.index("Starting execute actions") < log.index("] #1: Create a new tag")
+        assert "#1000: Create a new tag with values (external_id=new_tag_999" in log
+        assert log.endswith("RuntimeError('Execution failed')\n")
+
     def test_invalid_import_tags(self) -> None:
         TagImportTask.create(self.taxonomy)
         with self.assertRaises(ValueError):
@@ -2,11 +2,13 @@
 Test for import_plan functions
 """
 import ddt  # type: ignore[import]
+from django.db import transaction
 from django.test.testcases import TestCase
 
 from openedx_tagging.core.tagging.import_export.actions import CreateTag
 from openedx_tagging.core.tagging.import_export.exceptions import TagImportError
 from openedx_tagging.core.tagging.import_export.import_plan import TagImportPlan, TagItem
+from openedx_tagging.core.tagging.models import ObjectTag, TagAncestor, TagImportTask, TagSearchTrigram
 
 from .test_actions import TestImportActionMixin
 
@@ -70,6 +72,25 @@ class TestTagImportPlan(TestImportActionMixin, TestCase):
         assert self.import_plan.actions[2].name == 'delete'
         assert self.import_plan.actions[2].tag.id == 'tag_3'
 
+    def test_build_delete_actions_orphans(self) -> None:
+        # Delete tag_1 and tag_3, but keep tag_4, the child of tag_3
+        tags = {
+            tag.external_id: tag
+            for tag in self.taxonomy.tag_set.filter(external_id__in=["tag_1", "tag_2", "tag_3"])
+        }
+        self.import_plan.actions.clear()
+
+        # The parent map of the taxonomy is loaded in one query
+        with self.assertNumQueries(1):
+            self.import_plan._build_delete_actions(tags)  # pylint: disable=protected-access
+        assert len(self.import_plan.errors) == 0
+        assert [(action.name, action.tag.id, action.tag.parent_id) for action in self.import_plan.actions] == [
+            ('delete', 'tag_1', None),
+            ('delete', 'tag_2', None),
+            ('update_parent', 'tag_4', None),
+            ('delete', 'tag_3', None),
+        ]
+
     @ddt.data(
         # Test valid actions
         (
@@ -423,3 +444,122 @@ class TestTagImportPlan(TestImportActionMixin, TestCase):
         assert not self.taxonomy.tag_set.filter(external_id=created_tag).exists()
         assert not self.import_plan.execute()
         assert not self.taxonomy.tag_set.filter(external_id=created_tag).exists()
+
+    @ddt.data(False, True)
+    def test_generate_actions_num_queries(self, replace):
+        """
+        Planning loads the existing tags once, however many tags are imported
+        """
+        tags = [
+            TagItem(id=f"tag_{i}", value=f"Tag {i} v2", parent_id="tag_1" if i > 1 else None)
+            for i in range(1, 300)
+        ]
+        with self.assertNumQueries(1):
+            self.import_plan.generate_actions(tags=tags, replace=replace)
+        assert self.import_plan.actions
+
+    def _get_state(self) -> tuple[list, list, list]:
+        """
+        Returns the tags of the taxonomy, with their lineage fields and counts,
+        and their TagAncestor and TagSearchTrigram rows, without the tag IDs.
+        """
+        tags = sorted(self.taxonomy.tag_set.values_list(
+            "external_id",
+            "value",
+            "parent__external_id",
+            "depth",
+            "sort_key",
+            "counts__child_count",
+            "counts__descendant_count",
+            "counts__usage_count",
+            "counts__implicit_usage_count",
+        ))
+        ancestors = sorted(TagAncestor.objects.filter(tag__taxonomy=self.taxonomy).values_list(
+            "tag__external_id", "ancestor__external_id",
+        ))
+        trigrams = sorted(TagSearchTrigram.objects.filter(tag__taxonomy=self.taxonomy).values_list(
+            "tag__external_id", "trigram",
+        ))
+        return tags, ancestors, trigrams
+
+    @staticmethod
+    def _get_log_messages(task: TagImportTask) -> list[str]:
+        """
+        Returns the log messages of the task, without their timestamps.
+        """
+        return [line.split("] ", 1)[1] for line in task.log.splitlines()]
+
+    @ddt.data(
+        # All actions
+        (
+            [
+                {'id': 'tag_31', 'value': 'Tag 31'},
+                {'id': 'tag_32', 'value': 'Tag 32', 'parent_id': 'tag_1'},
+                {'id': 'tag_2', 'value': 'Tag 2 v2', 'parent_id': 'tag_1'},
+                {'id': 'tag_4', 'value': 'Tag 4 v2', 'parent_id': 'tag_1'},
+                {'id': 'tag_1', 'value': 'Tag 1'},
+            ],
+            False,
+        ),
+        # Deletes, with the children of a deleted tag moved below new tags, and the value of a deleted tag reused
+        (
+            [
+                {'id': 'tag_3', 'value': 'Tag 3 v2'},
+                {'id': 'tag_5', 'value': 'Tag 5', 'parent_id': 'tag_3'},
+                {'id': 'tag_6', 'value': 'Tag 6', 'parent_id': 'tag_5'},
+                {'id': 'tag_4', 'value': 'Tag 4 v2', 'parent_id': 'tag_6'},
+                {'id': 'tag_2', 'value': 'Tag 2', 'parent_id': 'tag_5'},
+                {'id': 'tag_7', 'value': 'Tag 1'},
+            ],
+            True,
+        ),
+        # Deletes only
+        (
+            [
+                {'id': 'tag_4', 'value': 'Tag 4', 'parent_id': 'tag_3'},
+            ],
+            True,
+        ),
+    )
+    @ddt.unpack
+    def test_execute_in_bulk(self, tags, replace):
+        """
+        Executing the actions in bulk gives the same tags, counts, search index
+        and logs as executing them one by one.
+        """
+        ObjectTag.objects.create(
+            object_id="object:1",
+            taxonomy=self.taxonomy,
+            tag=self.taxonomy.tag_set.get(external_id="tag_4"),
+        )
+        self.import_plan.generate_actions(tags=[TagItem(**tag) for tag in tags], replace=replace)
+        assert not self.import_plan.errors
+
+        bulk_task = TagImportTask.create(self.taxonomy)
+        with transaction.atomic():
+            self.import_plan.execute(bulk_task)
+            bulk_state = self._get_state()
+            bulk_log_messages = self._get_log_messages(bulk_task)
+            transaction.set_rollback(True)
+
+        task = TagImportTask.create(self.taxonomy)
+        self.import_plan._execute_one_by_one(task)  # pylint: disable=protected-access
+
+        assert bulk_state == self._get_state()
+        assert bulk_log_messages == self._get_log_messages(task)
+
+    def test_execute_num_queries(self):
+        """
+        Executing an import uses a few queries for every thousand tags, instead of several queries for each tag
+        """
+        tags = []
+        for i in range(10):
+            tags.append(TagItem(id=f"new_{i}", value=f"New {i}"))
+            for j in range(10):
+                tags.append(TagItem(id=f"new_{i}_{j}", value=f"New {i}.{j}", parent_id=f"new_{i}"))
+                for k in range(10):
+                    tags.append(TagItem(id=f"new_{i}_{j}_{k}", value=f"New {i}.{j}.{k}", parent_id=f"new_{i}_{j}"))
+        self.import_plan.generate_actions(tags=tags)
+        with self.assertNumQueries(56):
+            self.import_plan.execute()
+        assert self.taxonomy.tag_set.count() == 4 + 1110
@@ -5,12 +5,20 @@ from __future__ import annotations
 
 import json
 from io import BytesIO
+from unittest.mock import patch
 
 import ddt  # type: ignore[import]
 from django.test.testcases import TestCase
 
 from openedx_tagging.core.tagging.import_export.exceptions import TagParserError
-from openedx_tagging.core.tagging.import_export.parsers import CSVParser, JSONParser, Parser, ParserFormat, get_parser
+from openedx_tagging.core.tagging.import_export.parsers import (
+    CSVParser,
+    JSONParser,
+    Parser,
+    ParserFormat,
+    _IncrementalJSONReader,
+    get_parser,
+)
 from openedx_tagging.core.tagging.models import Taxonomy
 
 from .mixins import TestImportExportMixin
@@ -76,6 +84,57 @@ class TestJSONParser(TestImportExportMixin, TestCase):
             "Invalid '.json' format: Missing 'tags' field on the .json file"
         )
 
+    @ddt.data(
+        '{"tags": [{"id": "tag_1", "value": "tag 1"} {"id": "tag_2", "value": "tag 2"}]}',
+        '{"name": "Taxonomy",\n "tags": [{"id": "tag_1",\n  "value": "tag 1"}, ]}',
+        '{"size": 1234567,\n\n "tags": [{"id": "tag_1" "value": "tag 1"}]}',
+        '{"tags": [{"id": "tag_1", "value": "tag 1"}],\n}',
+        '{"tags": []}\n{"tags": []}',
+        '{"tags": [{"id": "tag_1", "value": "tag 1"}',
+        '',
+    )
+    def test_incremental_decode_errors(self, json_data: str) -> None:
+        # The file is read a few characters at a time, but the errors are the same as json.loads()
+        with self.assertRaises(json.JSONDecodeError) as context:
+            json.loads(json_data)
+        json_file = BytesIO(json_data.encode())
+        with patch.object(_IncrementalJSONReader, "read_size", 3):
+            tags, errors = JSONParser.parse_import(json_file)
+        assert not tags
+        assert [str(error) for error in errors] == [f"Invalid '.json' format: {context.exception}"]
+
+    def test_incremental_decode_error_size_limit(self) -> None:
+        # A syntax error is reported without reading the rest of the file to look for the end of the value
+        json_data = '{"tags": [{"id": "tag_1" "value": "' + "a" * 100_000 + '"}]}'
+        with self.assertRaises(json.JSONDecodeError) as context:
+            json.loads(json_data)
+        json_file = BytesIO(json_data.encode())
+        with patch.object(_IncrementalJSONReader, "read_size", 100):
+            with patch.object(_IncrementalJSONReader, "max_value_size", 1000):
+                with patch.object(json_file, "close"):  # To check how much of it was read
+                    tags, errors = JSONParser.parse_import(json_file)
+        assert json_file.tell() < 10_000
+        assert not tags
+        assert [str(error) for error in errors] == [f"Invalid '.json' format: {context.exception}"]
+
+    def test_iter_import(self) -> None:
+        json_data = {
+            "name": "Taxonomy",
+            "tags": [{"id": f"tag_{i}", "value": f"tag {i}"} for i in range(1000)] + [{"id": "tag_1000"}],
+            "size": 1234567,
+        }
+        json_file = BytesIO(json.dumps(json_data).encode())
+        errors: list = []
+        with patch.object(_IncrementalJSONReader, "read_size", 100):
+            tags = JSONParser.iter_import(json_file, errors)
+            first = next(tags)
+            # The tags are yielded as soon as they are read, before the whole file is read
+            assert first.id == "tag_0"
+            assert json_file.tell() < len(json_file.getvalue())
+            assert [tag.id for tag in tags] == [f"tag_{i}" for i in range(1, 1000)]
+        assert [str(error) for error in errors] == ["Missing 'value' field on {'id': 'tag_1000'}"]
+        assert json_file.closed
+
     @ddt.data(
         (
             {"tags": [
@@ -158,6 +217,16 @@ class TestJSONParser(TestImportExportMixin, TestCase):
                 index + JSONParser.inital_row
             )
 
+    @ddt.data("utf-8", "utf-8-sig", "utf-16", "utf-16-le", "utf-16-be", "utf-32", "utf-32-le", "utf-32-be")
+    def test_parse_tags_encodings(self, encoding: str) -> None:
+        # Like json.load(), the parser detects the encoding of the file
+        json_data = {"tags": [{"id": "tag_1", "value": "Étiquette 1"}, {"id": "tag_2", "value": "标签 2"}]}
+        json_file = BytesIO(json.dumps(json_data, ensure_ascii=False).encode(encoding))
+        with patch.object(_IncrementalJSONReader, "read_size", 3):
+            tags, errors = JSONParser.parse_import(json_file)
+        assert not errors
+        assert [(tag.id, tag.value) for tag in tags] == [("tag_1", "Étiquette 1"), ("tag_2", "标签 2")]
+
     def test_export_data(self) -> None:
         result = JSONParser.export(self.taxonomy)
         tags = json.loads(result).get("tags")
@@ -168,6 +237,15 @@ class TestJSONParser(TestImportExportMixin, TestCase):
             if tag.get("parent_id"):
                 assert tag.get("parent_id") == taxonomy_tag.parent.external_id
 
+    def test_iter_export(self) -> None:
+        with self.assertNumQueries(1):
+            parts = list(JSONParser.iter_export(self.taxonomy))
+        output = "".join(parts)
+        assert len(parts) == self.taxonomy.tag_set.count() + 2
+        # The output is the same as dumping the whole document at once
+        assert output == json.dumps(json.loads(output))
+        assert output == JSONParser.export(self.taxonomy)
+
     def test_import_with_export_output(self) -> None:
         output = JSONParser.export(self.taxonomy)
         json_file = BytesIO(output.encode())
@@ -313,3 +391,16 @@ class TestCSVParser(TestImportExportMixin, TestCase):
             assert tag.value == taxonomy_tag.value
             if tag.parent_id:
                 assert tag.parent_id == taxonomy_tag.parent.external_id
+
+    @patch.object(CSVParser, "export_chunk_size", 2)
+    def test_iter_export(self) -> None:
+        with self.assertNumQueries(1):
+            parts = list(CSVParser.iter_export(self.taxonomy))
+        assert len(parts) == 3
+        assert "".join(parts) == CSVParser.export(self.taxonomy) == (
+            "id,value,parent_id\r\n"
+            "tag_1,Tag 1,\r\n"
+            "tag_2,Tag 2,tag_1\r\n"
+            "tag_3,Tag 3,\r\n"
+            "tag_4,Tag 4,tag_3\r\n"
+        )
@@ -1,13 +1,19 @@
 """
 Test import/export celery tasks
 """
+import json
 from io import BytesIO
 from unittest.mock import patch
 
+from celery import current_app  # type: ignore[import]
 from django.test.testcases import TestCase
 
+import openedx_tagging.core.tagging.import_export.api as import_export_api
 import openedx_tagging.core.tagging.import_export.tasks as import_export_tasks
 from openedx_tagging.core.tagging.import_export import ParserFormat
+from openedx_tagging.core.tagging.import_export.executor import BulkImportExecutor
+from openedx_tagging.core.tagging.import_export.import_plan import TagImportPlan
+from openedx_tagging.core.tagging.models import TagImportTaskState
 
 from .mixins import TestImportExportMixin
 
@@ -42,3 +48,119 @@ class TestImportExportCeleryTasks(TestImportExportMixin, TestCase):
 
             self.assertEqual(result, "exported_data")
             mock_export_tags.assert_called_once_with(self.taxonomy, output_format)
+
+
+class TestRunImportTask(TestImportExportMixin, TestCase):
+    """
+    Test the import task that runs in steps, with celery in eager mode.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.tags = [
+            {"id": "tag_5", "value": "Tag 5"},
+            {"id": "tag_1", "value": "Tag 1 renamed"},
+            {"id": "tag_2", "value": "Tag 2", "parent_id": "tag_5"},
+            *({"id": f"new_{i}", "value": f"New {i}", "parent_id": "tag_1"} for i in range(5)),
+        ]
+        self.file = BytesIO(json.dumps({"tags": self.tags}).encode())
+        # Run the celery tasks right away, without a broker
+        current_app.conf.task_always_eager = True
+        self.addCleanup(setattr, current_app.conf, "task_always_eager", False)
+
+    def _get_tags(self):
+        return sorted(
+            (tag.external_id, tag.value, tag.parent.external_id if tag.parent else None)
+            for tag in self.taxonomy.tag_set.all()
+        )
+
+    def _expected_tags(self):
+        return sorted((tag["id"], tag["value"], tag.get("parent_id")) for tag in self.tags)
+
+    def test_run_import_task(self):
+        task = import_export_api.start_import_tags(self.taxonomy, self.file, ParserFormat.JSON, replace=True)
+        assert task.status == TagImportTaskState.LOADING_DATA
+        with patch.object(import_export_api, "IMPORT_BATCH_SIZE", 3):
+            import_export_tasks.run_import_task.delay(task.pk)
+
+        task.refresh_from_db()
+        assert task.status == TagImportTaskState.SUCCESS
+        assert task.upload is None
+        # Rename tag_1, move tag_2, create 6 tags, delete tag_3 and tag_4
+        assert (task.executed_actions, task.total_actions) == (10, 10)
+        assert "Executed 3 of 10 actions" in task.log
+        assert "Executed 9 of 10 actions" in task.log
+        assert "Executed 10 of 10 actions" in task.log
+        assert self._get_tags() == self._expected_tags()
+
+    def test_resume_import_task(self):
+        task = import_export_api.start_import_tags(self.taxonomy, self.file, ParserFormat.JSON, replace=True)
+        execute = BulkImportExecutor.execute
+        calls = []
+
+        def fail_second_batch(executor):
+            calls.append(executor)
+            if len(calls) == 2:
+                raise ValueError("Connection lost")
+            execute(executor)
+
+        with (
+            patch.object(import_export_api, "IMPORT_BATCH_SIZE", 3),
+            patch.object(BulkImportExecutor, "execute", fail_second_batch),
+        ):
+            import_export_tasks.run_import_task.delay(task.pk)
+
+        task.refresh_from_db()
+        assert task.status == TagImportTaskState.ERROR
+        # The first batch is kept
+        assert task.executed_actions == 3
+        assert "ValueError('Connection lost')" in task.log
+
+        task = import_export_api.resume_import_tags(self.taxonomy)
+        with patch.object(import_export_api, "IMPORT_BATCH_SIZE", 3):
+            import_export_tasks.run_import_task.delay(task.pk)
+
+        task.refresh_from_db()
+        assert task.status == TagImportTaskState.SUCCESS
+        assert "Resuming execution from action #4" in task.log
+        assert self._get_tags() == self._expected_tags()
+        with self.assertRaises(ValueError):
+            import_export_api.resume_import_tags(self.taxonomy)
+
+    def test_run_step_twice(self):
+        task = import_export_api.start_import_tags(self.taxonomy, self.file, ParserFormat.JSON)
+        assert import_export_api.run_import_task_step(task)
+        # Another process executes the first batch...
+        other_task = type(task).objects.get(pk=task.pk)
+        assert import_export_api.run_import_task_step(other_task, batch_size=3)
+        # ... so it isn't executed again
+        assert not import_export_api.run_import_task_step(task, batch_size=3)
+        task.refresh_from_db()
+        assert task.executed_actions == 3
+        assert task.status == TagImportTaskState.EXECUTING
+
+    def test_run_import_task_errors(self):
+        file = BytesIO(json.dumps({"tags": [{"id": "tag_1"}]}).encode())
+        task = import_export_api.start_import_tags(self.taxonomy, file, ParserFormat.JSON)
+        with self.assertRaises(ValueError):
+            import_export_api.start_import_tags(self.taxonomy, file, ParserFormat.JSON)
+        import_export_tasks.run_import_task.delay(task.pk)
+        task.refresh_from_db()
+        assert task.status == TagImportTaskState.ERROR
+        assert "Missing 'value' field on {'id': 'tag_1'}" in task.log
+        assert task.total_actions == 0
+        # Running it again does nothing
+        assert not import_export_api.run_import_task_step(task)
+
+    def test_planning_fails(self):
+        task = import_export_api.start_import_tags(self.taxonomy, self.file, ParserFormat.JSON)
+        with patch.object(TagImportPlan, "save_actions", side_effect=ValueError("Connection lost")):
+            assert not import_export_api.run_import_task_step(task)
+        task.refresh_from_db()
+        assert task.status == TagImportTaskState.ERROR
+        assert "ValueError('Connection lost')" in task.log
+        # The file is kept, along with the log of the planning that was rolled back
+        assert bytes(task.upload) == self.file.getvalue()
+        assert "Starting plan actions" in task.log
+        assert task.total_actions == 0
+        assert not task.actions.exists()
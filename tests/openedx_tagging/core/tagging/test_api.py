@@ -3,6 +3,7 @@ Test the tagging APIs
 """
 from __future__ import annotations
 
+from io import StringIO
 from typing import Any
 
 import ddt  # type: ignore[import]
@@ -10,8 +11,9 @@ import pytest
 from django.test import TestCase, override_settings
 
 import openedx_tagging.core.tagging.api as tagging_api
-from openedx_tagging.core.tagging.models import ObjectTag, Tag, Taxonomy
+from openedx_tagging.core.tagging.models import ObjectTag, Tag, TagCounts, Taxonomy
 
+from .benchmark_object_tag_counts import benchmark_object_tag_counts
 from .test_models import TestTagTaxonomyMixin, get_tag
 from .utils import pretty_format_tags
 
@@ -396,6 +398,34 @@ class TestApiTagging(TestTagTaxonomyMixin, TestCase):
         assert object_tag.taxonomy == new_taxonomy
         assert object_tag.tag == tag
 
+    def test_add_and_rename_tag_resync(self) -> None:
+        """
+        Test that adding or renaming a tag updates just the affected object tags
+        """
+        for object_id in ["obj1", "obj2", "obj3"]:
+            tagging_api.tag_object(object_id, self.taxonomy, ["Primates"], create_invalid=True)
+        tagging_api.tag_object("obj4", self.taxonomy, ["Mammalia"])
+
+        # Adding the tag links it to the existing object tags with the same value:
+        # 10 queries to validate and add the tag, then 1 to find the object tags and 5 to update them and the counts
+        with self.assertNumQueries(10 + 6):
+            primates = tagging_api.add_tag_to_taxonomy(self.taxonomy, "Primates", parent_tag_value="Mammalia")
+        assert [t.tag for t in tagging_api.get_object_tags("obj*")] == [primates, primates, primates, self.mammalia]
+        assert TagCounts.objects.get(tag=primates).usage_count == 3
+        assert TagCounts.objects.get(tag=self.mammalia).implicit_usage_count == 4
+
+        # Renaming it updates their values, in chunks:
+        tagging_api.update_tag_in_taxonomy(self.taxonomy, "Primates", "Apes")
+        primates.value = "Hominidae"
+        primates.save()
+        assert tagging_api._resync_object_tags_for_tag(  # pylint: disable=protected-access
+            self.taxonomy, primates, chunk_size=2,
+        ) == 3
+        for object_tag in tagging_api.get_object_tags("obj*"):
+            object_tag.full_clean()  # Should not raise any ValidationErrors
+        assert [t.value for t in tagging_api.get_object_tags("obj*")] == ["Hominidae"] * 3 + ["Mammalia"]
+        assert TagCounts.objects.get(tag=primates).usage_count == 3
+
     def test_tag_object(self):
         self.taxonomy.allow_multiple = True
 
@@ -710,6 +740,59 @@ class TestApiTagging(TestTagTaxonomyMixin, TestCase):
             assert exc.exception
             assert "Cannot add more than 100 tags to" in str(exc.exception)
 
+    def test_tag_objects_bulk(self) -> None:
+        """
+        Test tagging many objects at once
+        """
+        self.taxonomy.allow_multiple = True
+        object_ids = [f"block{i}" for i in range(50)]
+        tagging_api.tag_object("block0", self.taxonomy, ["Archaea", "Chordata"])
+        tagging_api.tag_object("block1", self.free_text_taxonomy, ["Keep me"])
+
+        # Counts (1), tags (1), existing object tags (1), savepoint (2), delete (2) and insert (1),
+        # plus updating the TagCounts of the deleted and inserted tags (2 each)
+        with self.assertNumQueries(12):
+            tagging_api.tag_objects_bulk(object_ids, self.taxonomy, ["eubacteria", "Archaea"])
+
+        for object_id in object_ids:
+            object_tags = tagging_api.get_object_tags(object_id, taxonomy_id=self.taxonomy.id)
+            assert [object_tag.value for object_tag in object_tags] == ["Archaea", "Eubacteria"]
+            for object_tag in object_tags:
+                object_tag.full_clean()  # Should not raise any ValidationErrors
+        # Tags from other taxonomies are untouched:
+        assert [t.value for t in tagging_api.get_object_tags("block1")] == ["Keep me", "Archaea", "Eubacteria"]
+
+        # Free text taxonomies replace the existing values too:
+        tagging_api.tag_objects_bulk(["block1", "block2"], self.free_text_taxonomy, ["New", "Keep me"])
+        for object_id in ["block1", "block2"]:
+            object_tags = tagging_api.get_object_tags(object_id, taxonomy_id=self.free_text_taxonomy.id)
+            assert sorted(object_tag.value for object_tag in object_tags) == ["Keep me", "New"]
+
+        # Taxonomies that create tags on demand are supported:
+        tagging_api.tag_objects_bulk(["block1", "block2"], self.user_taxonomy, [self.user_1.username])
+        object_tags = tagging_api.get_object_tags("block2", taxonomy_id=self.user_taxonomy.id)
+        assert [object_tag.value for object_tag in object_tags] == [self.user_1.username]
+
+    def test_tag_objects_bulk_invalid(self) -> None:
+        """
+        Test that tag_objects_bulk doesn't change anything if it can't tag all the objects
+        """
+        tagging_api.tag_object("block0", self.taxonomy, ["Archaea"])
+        with pytest.raises(ValueError) as excinfo:
+            tagging_api.tag_objects_bulk(["block0", "block1"], self.taxonomy, ["Eubacteria", "Chordata"])
+        assert "only allows one tag per object" in str(excinfo.value)
+        self.taxonomy.allow_multiple = True
+        with pytest.raises(tagging_api.TagDoesNotExist):
+            tagging_api.tag_objects_bulk(["block0", "block1"], self.taxonomy, ["Eubacteria", "Xenomorph"])
+
+        for taxonomy in self.create_100_taxonomies():
+            tagging_api.tag_object("block1", taxonomy, ["Dummy Tag"])
+        with pytest.raises(ValueError) as excinfo:
+            tagging_api.tag_objects_bulk(["block0", "block1"], self.taxonomy, ["Eubacteria"])
+        assert "Cannot add more than 100 tags to (block1)" in str(excinfo.value)
+
+        assert [t.value for t in tagging_api.get_object_tags("block0")] == ["Archaea"]
+
     def test_get_object_tags_deleted_disabled(self) -> None:
         """
         Test that get_object_tags doesn't return tags from disabled taxonomies
@@ -748,6 +831,33 @@ class TestApiTagging(TestTagTaxonomyMixin, TestCase):
             "life_on_earth: Eukaryota>Animalia>Chordata",
         ]
 
+    def test_get_object_tags_multiple(self) -> None:
+        """
+        Test getting the tags of several objects at once, by wildcard or by list
+        """
+        tagging_api.tag_object("block:b", self.taxonomy, ["Mammalia"])
+        tagging_api.tag_object("block:a", self.taxonomy, ["Eubacteria"])
+        tagging_api.tag_object("block:a", self.free_text_taxonomy, ["Zebra"])
+        tagging_api.tag_object("other", self.taxonomy, ["Fungi"])
+
+        def get_object_tags(object_id_pattern: str) -> list[tuple[str, str, list[str]]]:
+            return [
+                (object_tag.object_id, object_tag.export_id, object_tag.get_lineage())
+                for object_tag in tagging_api.get_object_tags(object_id_pattern)
+            ]
+
+        expected = [
+            # Grouped by object ID, then by taxonomy:
+            ("block:a", self.free_text_taxonomy.export_id, ["Zebra"]),
+            ("block:a", "life_on_earth", ["Bacteria", "Eubacteria"]),
+            ("block:b", "life_on_earth", ["Eukaryota", "Animalia", "Chordata", "Mammalia"]),
+        ]
+        with self.assertNumQueries(1):  # Including the lineage of the deepest tags
+            assert get_object_tags("block:*") == expected
+        assert get_object_tags("block:b,block:a,block:c") == expected
+        with pytest.raises(ValueError):
+            get_object_tags("block:*:b")
+
     @ddt.data(
         ("ChA", [
             "Archaea (used: 1, children: 2)",
@@ -881,6 +991,21 @@ class TestApiTagging(TestTagTaxonomyMixin, TestCase):
         }
         assert tagging_api.get_object_tag_counts(other, count_implicit=True) == {other: 1}
 
+    def test_benchmark_object_tag_counts(self) -> None:
+        """
+        Test a small run of the get_object_tag_counts() benchmark, and that the
+        data it creates is rolled back.
+        """
+        num_object_tags = ObjectTag.objects.count()
+        out = StringIO()
+        benchmark_object_tag_counts(out, num_object_tags=50, blocks_per_course=4, tags_per_block=5, repeat=1)
+        lines = out.getvalue().splitlines()
+        assert lines[0].startswith("Created 1000 leaf tags and 50 object tags in ")
+        assert lines[1].startswith("get_object_tag_counts(count_implicit=False) counted the tags of 4 objects in ")
+        assert lines[2].startswith("get_object_tag_counts(count_implicit=True) counted the tags of 4 objects in ")
+        assert ObjectTag.objects.count() == num_object_tags
+        assert not Taxonomy.objects.filter(name="Benchmark Taxonomy").exists()
+
     def test_get_object_tag_counts_deleted_disabled(self) -> None:
         """
         Test that get_object_tag_counts doesn't "count" disabled taxonomies or
@@ -1047,6 +1172,53 @@ class TestApiTagging(TestTagTaxonomyMixin, TestCase):
             assert object_tag.object_id == obj2
             assert object_tag.is_copied == expected_tags[index]["copied"]
 
+    def test_copy_tags_bulk(self) -> None:
+        """
+        Test copying the tags of many objects at once
+        """
+        self.taxonomy.allow_multiple = True
+        sources = [f"block{i}" for i in range(20)]
+        tagging_api.tag_objects_bulk(sources, self.taxonomy, ["Mammalia", "Archaea"])
+        tagging_api.tag_objects_bulk(sources, self.free_text_taxonomy, ["Keep me"])
+        tagging_api.tag_object("copy0", self.taxonomy, ["Archaea"])  # Not copied; will be marked as copied
+        tagging_api.tag_object("copy1", self.language_taxonomy, ["English"])  # Not copied; will be kept
+        tagging_api.copy_tags("block0", "copy2")  # Copied; will be replaced
+
+        pairs = [(source, source.replace("block", "copy")) for source in sources]
+        # Source tags (1), savepoint (2), delete old copies and update their counts (4), existing tags (1),
+        # mark them as copied (1), insert (1), and update the new tags' counts (2)
+        with self.assertNumQueries(12):
+            tagging_api.copy_tags_bulk(pairs)
+
+        for source, dest in pairs:
+            source_tags = [(t.taxonomy_id, t.value) for t in tagging_api.get_object_tags(source)]
+            dest_tags = tagging_api.get_object_tags(dest)
+            for object_tag in dest_tags:
+                object_tag.full_clean()  # Should not raise any ValidationErrors
+            assert [(t.taxonomy_id, t.value) for t in dest_tags if t.is_copied] == source_tags
+        assert [(t.value, t.is_copied) for t in tagging_api.get_object_tags("copy1")] == [
+            ("Keep me", True), ("English", False), ("Archaea", True), ("Mammalia", True),
+        ]
+        assert TagCounts.objects.get(tag=self.mammalia).usage_count == 40
+        assert TagCounts.objects.get(tag=self.archaea).usage_count == 40
+
+    def test_copy_tags_with_outdated_value(self) -> None:
+        """
+        Test copying a tag to an object that already has it, but with an out of
+        date value
+        """
+        tagging_api.tag_object("block0", self.taxonomy, ["Mammalia"])
+        tagging_api.tag_object("copy0", self.taxonomy, ["Mammalia"])
+        # e.g. the tag was renamed, and the object tag wasn't resynced yet
+        ObjectTag.objects.filter(object_id="copy0").update(_value="Mammals")
+
+        tagging_api.copy_tags("block0", "copy0")
+
+        dest_tags = list(tagging_api.get_object_tags("copy0"))
+        assert [(t.tag, t.value, t.is_copied) for t in dest_tags] == [(self.mammalia, "Mammalia", True)]
+        assert dest_tags[0]._value == "Mammalia"  # pylint: disable=protected-access
+        assert TagCounts.objects.get(tag=self.mammalia).usage_count == 2
+
     def test_unmark_copied_tags(self) -> None:
         obj1 = "object_id1"
         obj2 = "object_id2"
@@ -3,19 +3,33 @@ Test the tagging base models
 """
 from __future__ import annotations
 
+from io import StringIO
+
 import ddt  # type: ignore[import]
 import pytest
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.db import transaction
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.db.models import Q, signals
 from django.db.utils import IntegrityError
 from django.test.testcases import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from openedx_tagging.core.tagging import api
-from openedx_tagging.core.tagging.models import LanguageTaxonomy, ObjectTag, Tag, Taxonomy
-from openedx_tagging.core.tagging.models.utils import RESERVED_TAG_CHARS
+from openedx_tagging.core.tagging.models import (
+    LanguageTaxonomy,
+    ObjectTag,
+    Tag,
+    TagAncestor,
+    TagCounts,
+    TagSearchTrigram,
+    Taxonomy,
+)
+from openedx_tagging.core.tagging.models.utils import RESERVED_TAG_CHARS, get_trigrams
 
-from .utils import pretty_format_tags
+from .utils import TaggingFixtureMixin, pretty_format_tags
 
 
 def get_tag(value):
@@ -25,13 +39,11 @@ def get_tag(value):
     return Tag.objects.get(value=value)
 
 
-class TestTagTaxonomyMixin:
+class TestTagTaxonomyMixin(TaggingFixtureMixin):
     """
     Base class that uses the taxonomy fixture to load a base taxonomy and tags for testing.
     """
 
-    fixtures = ["tests/openedx_tagging/core/fixtures/tagging.yaml"]
-
     def setUp(self):
         super().setUp()
         # Core pre-defined taxonomies for testing:
@@ -249,6 +261,48 @@ class TestTagTaxonomy(TestTagTaxonomyMixin, TestCase):
     def test_get_lineage(self, tag_attr, lineage):
         assert getattr(self, tag_attr).get_lineage() == lineage
 
+    def test_get_lineage_queries(self):
+        """
+        Test that get_lineage() loads any ancestors that aren't cached in a
+        single query, no matter how deep the tag is.
+        """
+        mammalia = get_tag("Mammalia")
+        with self.assertNumQueries(1):
+            assert mammalia.get_lineage() == ["Eukaryota", "Animalia", "Chordata", "Mammalia"]
+        mammalia = Tag.objects.select_related("parent__parent__parent").get(value="Mammalia")
+        with self.assertNumQueries(0):
+            assert mammalia.get_lineage() == ["Eukaryota", "Animalia", "Chordata", "Mammalia"]
+
+    def test_lineage_fields(self):
+        """
+        Test that depth, ancestor_path, and sort_key are computed when tags are
+        created, and kept up to date when tags are renamed or moved.
+        """
+        eukaryota = get_tag("Eukaryota")
+        assert self.mammalia.depth == 3
+        assert self.mammalia.ancestor_ids == [eukaryota.pk, self.animalia.pk, self.chordata.pk]
+        assert self.mammalia.sort_key == "eukaryota\tanimalia\tchordata\tmammalia\t"
+
+        primate = self.taxonomy.add_tag("Primate", parent_tag_value="Mammalia")
+        assert primate.depth == 4
+        assert primate.ancestor_path == f"{self.mammalia.ancestor_path}{self.mammalia.pk}/"
+        assert primate.sort_key == "eukaryota\tanimalia\tchordata\tmammalia\tprimate\t"
+
+        # Renaming a tag updates its descendants' sort keys:
+        self.taxonomy.update_tag("Animalia", "Animals")
+        assert get_tag("Primate").sort_key == "eukaryota\tanimals\tchordata\tmammalia\tprimate\t"
+
+        # Moving a tag updates all of its descendants:
+        self.chordata.parent = self.bacteria
+        self.chordata.save()
+        primate = get_tag("Primate")
+        assert primate.depth == 3
+        assert primate.ancestor_ids == [self.bacteria.pk, self.chordata.pk, self.mammalia.pk]
+        assert primate.get_lineage() == ["Bacteria", "Chordata", "Mammalia", "Primate"]
+        assert primate.sort_key == "bacteria\tchordata\tmammalia\tprimate\t"
+        assert get_tag("Bacteria").descendant_count == 5
+        assert get_tag("Animals").descendant_count == 6
+
     def test_trailing_whitespace(self):
         """
         Test that tags automatically strip out trailing/leading whitespace
@@ -313,6 +367,194 @@ class TestTagTaxonomy(TestTagTaxonomyMixin, TestCase):
 
 
 @ddt.ddt
+class TestTagCounts(TestTagTaxonomyMixin, TestCase):
+    """
+    Test that the stored TagCounts are kept up to date.
+    """
+
+    def get_counts(self) -> dict[str, tuple[int, int, int, int]]:
+        """
+        Get the stored counts of every tag in the taxonomy, keyed by tag value
+        """
+        return {
+            counts.tag.value: (
+                counts.child_count, counts.descendant_count, counts.usage_count, counts.implicit_usage_count,
+            )
+            for counts in TagCounts.objects.filter(tag__taxonomy=self.taxonomy).select_related("tag")
+        }
+
+    def assert_counts_correct(self) -> None:
+        """
+        Check that the counts which were updated incrementally match the ones
+        computed from scratch by the recompute_tag_counts command.
+        """
+        counts = self.get_counts()
+        out = StringIO()
+        call_command("recompute_tag_counts", taxonomy_ids=[self.taxonomy.pk], stdout=out)
+        assert out.getvalue() == (
+            f"Recomputed the counts and other data of {len(counts)} tags in taxonomy {self.taxonomy.pk}.\n"
+        )
+        assert self.get_counts() == counts
+        # The closure table links every tag to itself and to each of its ancestors:
+        for tag in Tag.objects.filter(taxonomy=self.taxonomy):
+            ancestor_ids = TagAncestor.objects.filter(tag=tag).values_list("ancestor_id", flat=True)
+            assert sorted(ancestor_ids) == sorted([*tag.ancestor_ids, tag.pk])
+
+    def test_counts(self) -> None:
+        self.taxonomy.allow_multiple = True
+        api.tag_object("obj1", self.taxonomy, ["Mammalia", "Archaea"])
+        api.tag_object("obj2", self.taxonomy, ["Mammalia", "Animalia"])
+        api.tag_objects_bulk(["obj3", "obj4"], self.taxonomy, ["Chordata"])
+        counts = self.get_counts()
+        assert counts["Mammalia"] == (0, 0, 2, 2)
+        assert counts["Chordata"] == (1, 1, 2, 4)
+        assert counts["Animalia"] == (7, 8, 1, 5)
+        assert counts["Eukaryota"] == (5, 13, 0, 5)
+        self.assert_counts_correct()
+
+        # Adding and moving tags
+        self.taxonomy.add_tag("Primate", parent_tag_value="Mammalia")
+        api.tag_object("obj1", self.taxonomy, ["Primate"])  # Replaces obj1's tags
+        self.chordata.parent = self.bacteria
+        self.chordata.save()
+        counts = self.get_counts()
+        assert counts["Bacteria"] == (3, 5, 0, 4)
+        assert counts["Chordata"] == (1, 2, 2, 4)
+        assert counts["Animalia"] == (6, 6, 1, 1)
+        self.assert_counts_correct()
+
+        # Deleting object tags and tags
+        ObjectTag.objects.filter(object_id="obj3").delete()
+        self.taxonomy.delete_tags(["Mammalia", "Primate"], with_subtags=True)
+        api.delete_object_tags("obj2")
+        counts = self.get_counts()
+        assert "Mammalia" not in counts
+        assert counts["Bacteria"] == (3, 3, 0, 1)
+        assert counts["Chordata"] == (0, 0, 1, 1)
+        self.assert_counts_correct()
+
+    def test_bulk_create_object_tags(self) -> None:
+        object_tags = ObjectTag.objects.bulk_create([
+            ObjectTag(object_id=f"obj{i}", taxonomy=self.taxonomy, tag=tag, _value=tag.value)
+            for i, tag in enumerate([self.mammalia, self.mammalia, self.archaea])
+        ])
+        counts = self.get_counts()
+        assert counts["Mammalia"] == (0, 0, 2, 2)
+        assert counts["Eukaryota"] == (5, 13, 0, 2)
+        assert counts["Archaea"] == (3, 3, 1, 1)
+        self.assert_counts_correct()
+
+        # Saving them again doesn't count them twice
+        object_tags[0].tag = self.chordata
+        object_tags[0]._value = "Chordata"  # pylint: disable=protected-access
+        object_tags[0].save()
+        assert self.get_counts()["Mammalia"] == (0, 0, 1, 1)
+        self.assert_counts_correct()
+
+        with pytest.raises(ValueError):
+            ObjectTag.objects.bulk_create(object_tags, ignore_conflicts=True)
+
+    def test_delete_subtrees(self) -> None:
+        for i in range(20):
+            api.tag_object(f"obj{i}", self.taxonomy, [["Bacteria", "Eubacteria", "Archaebacteria", "Chordata"][i % 4]])
+        subtree_ids = [self.bacteria.pk, self.eubacteria.pk, self.archaebacteria.pk]
+
+        with CaptureQueriesContext(connection) as queries:
+            deleted = Tag.objects.filter(pk=self.bacteria.pk).delete_subtrees()
+
+        assert deleted == 3
+        assert not Tag.objects.filter(pk__in=subtree_ids).exists()
+        # The object tags are not loaded, but updated in bulk
+        assert not [query for query in queries if query["sql"].startswith("SELECT") and "objecttag" in query["sql"]]
+        # The object tags of the deleted tags keep their value
+        assert sorted(
+            ObjectTag.objects.filter(tag=None, taxonomy=self.taxonomy).values_list("_value", flat=True).distinct()
+        ) == ["Archaebacteria", "Bacteria", "Eubacteria"]
+        assert ObjectTag.objects.filter(tag=self.chordata).count() == 5
+        assert not TagAncestor.objects.filter(Q(tag_id__in=subtree_ids) | Q(ancestor_id__in=subtree_ids)).exists()
+        assert not TagSearchTrigram.objects.filter(tag_id__in=subtree_ids).exists()
+        self.assert_counts_correct()
+
+    def test_delete_subtrees_signals(self) -> None:
+        deleted_values = []
+
+        def receiver(instance, **_kwargs):
+            deleted_values.append(instance.value)
+
+        # If something listens to the deletion of tags, the tags are deleted with Django's collector
+        signals.post_delete.connect(receiver, sender=Tag)
+        self.addCleanup(signals.post_delete.disconnect, receiver, sender=Tag)
+        assert Tag.objects.filter(pk=self.bacteria.pk).delete_subtrees() == 3
+        assert sorted(deleted_values) == ["Archaebacteria", "Bacteria", "Eubacteria"]
+        self.assert_counts_correct()
+
+    def test_recompute_tag_data(self) -> None:
+        """
+        Test that the command rebuilds the lineage, ancestors, and search index
+        of tags that were created without the Tag model's methods.
+        """
+        # Like "loaddata" does:
+        primates = Tag(taxonomy=self.taxonomy, parent=self.mammalia, value="Primates")
+        primates.save_base(raw=True)
+        Tag.objects.filter(pk=self.mammalia.pk).update(depth=0, ancestor_path="", sort_key="")
+        TagAncestor.objects.filter(tag=self.chordata).delete()
+        search_filter = TagSearchTrigram.search_filter(self.taxonomy.pk, "primates")
+        assert not self.taxonomy.tag_set.filter(search_filter)
+
+        call_command("recompute_tag_counts", taxonomy_ids=[self.taxonomy.pk], stdout=StringIO())
+
+        primates.refresh_from_db()
+        eukaryota = get_tag("Eukaryota")
+        assert primates.depth == 4
+        assert primates.ancestor_ids == [eukaryota.pk, self.animalia.pk, self.chordata.pk, self.mammalia.pk]
+        assert primates.sort_key == "eukaryota\tanimalia\tchordata\tmammalia\tprimates\t"
+        assert list(self.taxonomy.tag_set.filter(search_filter)) == [primates]
+        self.assert_counts_correct()
+
+    def test_recompute_tag_counts_invalid(self) -> None:
+        with pytest.raises(CommandError, match=r"Taxonomies not found: \[12345\]"):
+            call_command("recompute_tag_counts", taxonomy_ids=[12345])
+
+
+class TestTagSearchTrigram(TestTagTaxonomyMixin, TestCase):
+    """
+    Test the tag search index.
+    """
+
+    def test_get_trigrams(self) -> None:
+        assert get_trigrams("Ab") == set()
+        assert get_trigrams("Abc Ab") == {"abc", "bc ", "c a", " ab"}
+        # Case and accents are ignored:
+        assert get_trigrams("ÉCOLE") == get_trigrams("école") == {"eco", "col", "ole"}
+
+    def test_index_updated(self) -> None:
+        """
+        The index is updated when tags are created or renamed
+        """
+        tag = self.taxonomy.add_tag("Primates", parent_tag_value="Mammalia")
+        assert set(tag.search_trigrams.values_list("trigram", flat=True)) == {"pri", "rim", "ima", "mat", "ate", "tes"}
+        self.taxonomy.update_tag("Primates", "Apes")
+        assert set(tag.search_trigrams.values_list("trigram", flat=True)) == {"ape", "pes"}
+        assert list(tag.search_trigrams.values_list("taxonomy_id", flat=True).distinct()) == [self.taxonomy.pk]
+
+    def test_search(self) -> None:
+        """
+        Searches with and without trigrams find the same tags
+        """
+        self.taxonomy.add_tag("Primates", parent_tag_value="Mammalia")
+        for search_term in ("ATE", "at", "rimat", "primates", "imax"):
+            expected = sorted(self.taxonomy.tag_set.filter(value__icontains=search_term).values_list("pk", flat=True))
+            found = self.taxonomy.tag_set.filter(TagSearchTrigram.search_filter(self.taxonomy.pk, search_term))
+            assert sorted(found.values_list("pk", flat=True)) == expected
+        assert [tag["value"] for tag in self.taxonomy.get_filtered_tags(search_term="ARCHAE")] == [
+            "Archaea",
+            "Euryarchaeida",
+            "Proteoarchaeota",
+            "Bacteria",
+            "Archaebacteria",
+        ]
+
+
 class TestFilteredTagsClosedTaxonomy(TestTagTaxonomyMixin, TestCase):
     """
     Test the the get_filtered_tags() method of closed taxonomies
@@ -417,12 +659,13 @@ class TestFilteredTagsClosedTaxonomy(TestTagTaxonomyMixin, TestCase):
             self.test_get_root()
         with self.assertNumQueries(1):
             self.test_get_depth_1_search_term()
-        # When listing the tags below a specific tag, there is one additional query to load each ancestor tag:
+        # When listing the tags below a specific tag, there is one additional query to load that tag.
+        # Its depth is stored, so no matter how deep it is, we don't need to load any of its ancestors.
         with self.assertNumQueries(2):
             self.test_get_child_tags_one_level()
         with self.assertNumQueries(2):
             self.test_get_depth_1_child_search_term()
-        with self.assertNumQueries(3):
+        with self.assertNumQueries(2):
             self.test_get_grandchild_tags_one_level()
 
     ##################
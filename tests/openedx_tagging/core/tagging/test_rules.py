@@ -7,7 +7,12 @@ from django.contrib.auth import get_user_model
 from django.test.testcases import TestCase
 
 from openedx_tagging.core.tagging.models import ObjectTag
-from openedx_tagging.core.tagging.rules import ObjectTagPermissionItem
+from openedx_tagging.core.tagging.rules import (
+    ObjectTagPermissionItem,
+    cached_has_perm,
+    can_view_object_tag_objectid,
+    permission_cache,
+)
 
 from .test_models import TestTagTaxonomyMixin
 
@@ -247,3 +252,43 @@ class TestRulesTagging(TestTagTaxonomyMixin, TestCase):
         assert self.staff.has_perm("oel_tagging.view_objecttag", self.object_tag)
         assert self.learner.has_perm("oel_tagging.view_objecttag")
         assert self.learner.has_perm("oel_tagging.view_objecttag", self.object_tag)
+
+    def test_view_object_tag_objectids(self):
+        """
+        By default, a user can view the ObjectTags of several objects if they can view those of each object
+        """
+
+        def _object_permission(_user, object_id: str) -> bool:
+            return object_id != "secret"
+
+        rules.set_perm("oel_tagging.view_objecttag_objectid", _object_permission)
+        self.addCleanup(rules.set_perm, "oel_tagging.view_objecttag_objectid", can_view_object_tag_objectid)
+        assert self.learner.has_perm("oel_tagging.view_objecttag_objectids", ("abc", "xyz"))
+        assert not self.learner.has_perm("oel_tagging.view_objecttag_objectids", ("abc", "secret"))
+
+    def test_permission_cache(self):
+        """
+        While the permission cache is enabled, the rules are only evaluated once
+        for each taxonomy and object_id, and not once per ObjectTag.
+        """
+        checked_object_ids = []
+
+        def _object_permission(_user, object_id: str) -> bool:
+            checked_object_ids.append(object_id)
+            return object_id == "abc"
+
+        rules.set_perm("oel_tagging.change_objecttag_objectid", _object_permission)
+        other_object_tag = ObjectTag.objects.create(taxonomy=self.taxonomy, tag=self.archaea, object_id="abc")
+        with permission_cache(self.staff):
+            for object_tag in (self.object_tag, other_object_tag, self.object_tag):
+                assert cached_has_perm(self.staff, "oel_tagging.can_tag_object", object_tag)
+            assert not cached_has_perm(
+                self.staff,
+                "oel_tagging.can_tag_object",
+                ObjectTagPermissionItem(taxonomy=self.taxonomy, object_id="not abc"),
+            )
+        assert checked_object_ids == ["abc", "not abc"]
+
+        # Outside of the context, the rules are evaluated every time:
+        assert cached_has_perm(self.staff, "oel_tagging.can_tag_object", self.object_tag)
+        assert checked_object_ids == ["abc", "not abc", "abc"]
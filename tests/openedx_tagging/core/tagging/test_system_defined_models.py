@@ -4,14 +4,17 @@ Test the tagging system-defined taxonomy models
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from io import StringIO
 
 import ddt  # type: ignore[import]
 import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
 from django.test import TestCase, override_settings
 
 from openedx_learning.apps.authoring.publishing.models import LearningPackage
 from openedx_tagging.core.tagging import api
-from openedx_tagging.core.tagging.models import Taxonomy
+from openedx_tagging.core.tagging.models import Tag, Taxonomy
 from openedx_tagging.core.tagging.models.system_defined import ModelSystemDefinedTaxonomy, UserSystemDefinedTaxonomy
 
 from .test_models import TestTagTaxonomyMixin
@@ -235,6 +238,37 @@ class TestModelSystemDefinedTaxonomy(TestTagTaxonomyMixin, TestCase):
         # And just to make sure there are no other random changes to other objects:
         assert not list(api.get_object_tags(other_obj_id))
 
+    def test_tags_for_values(self):
+        """
+        tags_for_values() gets, creates, and updates the Tags for many values
+        using a fixed number of queries.
+        """
+        api.tag_object("obj1", self.author_taxonomy, [self.user_1.username, self.user_2.username])
+        user_3 = get_user_model().objects.create(username="test_user_3")
+        self.user_1.username = "new_username"
+        self.user_1.save()
+        # 1 query to find the users, 1 to find their tags, 5 to update the stale tag (in a savepoint, with its search
+        # index rows), and 6 to create the new one (in a savepoint, with its counts, closure table, and index rows)
+        with self.assertNumQueries(13):
+            tags = self.author_taxonomy.tags_for_values(["NEW_USERNAME", "test_user_2", "test_user_3", "nobody"])
+        assert list(tags) == ["new_username", "test_user_2", "test_user_3"]
+        assert [(tag.value, tag.external_id) for tag in tags.values()] == [
+            ("new_username", "1"),
+            ("test_user_2", "2"),
+            ("test_user_3", str(user_3.pk)),
+        ]
+        assert self.author_taxonomy.tag_set.get(external_id="1").value == "new_username"
+        new_tag = self.author_taxonomy.tag_set.get(external_id=str(user_3.pk))
+        assert new_tag == tags["test_user_3"]
+        assert new_tag.counts.usage_count == 0
+        assert list(new_tag.ancestor_links.values_list("ancestor_id", flat=True)) == [new_tag.pk]
+        # Looking up the same values again doesn't change anything:
+        with self.assertNumQueries(2):
+            assert self.author_taxonomy.tags_for_values(["new_username", "test_user_3"]) == {
+                "new_username": tags["new_username"],
+                "test_user_3": tags["test_user_3"],
+            }
+
     def test_tag_object_delete_user(self):
         """
         Using a deleted model instance as a tag will raise TagDoesNotExist
@@ -248,6 +282,78 @@ class TestModelSystemDefinedTaxonomy(TestTagTaxonomyMixin, TestCase):
         with self.assertRaises(api.TagDoesNotExist):
             api.tag_object(object_id, self.author_taxonomy, [self.user_1.username])
 
+    def test_sync_tags(self):
+        """
+        sync_tags() updates the values of the tags whose instances were renamed,
+        and of the object tags that use them, a batch at a time.
+        """
+        api.tag_object("obj1", self.lp_taxonomy, ["p1", "p2"])
+        api.tag_object("obj2", self.lp_taxonomy, ["p1"])
+        api.tag_object("obj3", self.author_taxonomy, [self.user_1.username])
+        # Rename without going through the taxonomy, e.g. from another app:
+        LearningPackage.objects.filter(pk=self.learning_pkg_1.pk).update(key="p1-renamed")
+        get_user_model().objects.filter(pk=self.user_1.pk).update(username="new_username")
+
+        assert self.lp_taxonomy.sync_tags(batch_size=1) == 1
+        assert [t.value for t in api.get_object_tags("obj1")] == ["p1-renamed", "p2"]
+        assert [t.value for t in api.get_object_tags("obj2")] == ["p1-renamed"]
+        assert list(self.lp_taxonomy.tag_set.order_by("sort_key").values_list("value", flat=True)) == [
+            "p1-renamed",
+            "p2",
+        ]
+        assert list(api.search_tags(self.lp_taxonomy, "renamed").values_list("value", flat=True)) == ["p1-renamed"]
+        # The other taxonomy isn't changed:
+        assert [t.value for t in api.get_object_tags("obj3")] == ["test_user_1"]
+        # Syncing again does nothing:
+        assert self.lp_taxonomy.sync_tags() == 0
+
+        out = StringIO()
+        call_command("sync_system_defined_tags", stdout=out)
+        assert f"Updated 1 tags in taxonomy {self.author_taxonomy.pk}.\n" in out.getvalue()
+        assert f"Updated 0 tags in taxonomy {self.lp_taxonomy.pk}.\n" in out.getvalue()
+        assert [t.value for t in api.get_object_tags("obj3")] == ["new_username"]
+
+    def test_sync_tags_swapped_values(self):
+        """
+        If two instances swap values, sync_tags() still updates their tags.
+        """
+        api.tag_object("obj1", self.author_taxonomy, [self.user_1.username, self.user_2.username])
+        user_model = get_user_model()
+        user_model.objects.filter(pk=self.user_1.pk).update(username="tmp")
+        user_model.objects.filter(pk=self.user_2.pk).update(username="test_user_1")
+        user_model.objects.filter(pk=self.user_1.pk).update(username="test_user_2")
+
+        assert self.author_taxonomy.sync_tags() == 2
+        assert dict(self.author_taxonomy.tag_set.values_list("external_id", "value")) == {
+            str(self.user_1.pk): "test_user_2",
+            str(self.user_2.pk): "test_user_1",
+        }
+        assert sorted(
+            (object_tag.tag.external_id, object_tag.value) for object_tag in api.get_object_tags("obj1")
+        ) == [(str(self.user_1.pk), "test_user_2"), (str(self.user_2.pk), "test_user_1")]
+
+    def test_sync_tags_value_in_use(self):
+        """
+        A tag whose new value is still used by another tag is left as it is.
+        """
+        api.tag_object("obj1", self.author_taxonomy, [self.user_1.username, self.user_2.username])
+        # e.g. the tag of a deleted user:
+        Tag.objects.create(taxonomy=self.author_taxonomy, value="taken", external_id="99999")
+        user_model = get_user_model()
+        user_model.objects.filter(pk=self.user_1.pk).update(username="taken")
+        user_model.objects.filter(pk=self.user_2.pk).update(username="new_username")
+
+        with self.assertLogs("openedx_tagging.core.tagging.models.system_defined", level="WARNING") as logs:
+            assert self.author_taxonomy.sync_tags() == 1
+        assert len(logs.output) == 1
+        assert [t.value for t in api.get_object_tags("obj1")] == ["new_username", "test_user_1"]
+
+    def test_sync_tags_command_invalid(self):
+        with pytest.raises(CommandError, match=r"Taxonomies not found: \[12345\]"):
+            call_command("sync_system_defined_tags", taxonomy_ids=[12345])
+        with pytest.raises(CommandError, match="not model-based system-defined taxonomies"):
+            call_command("sync_system_defined_tags", taxonomy_ids=[self.taxonomy.pk])
+
 
 @ddt.ddt
 @override_settings(LANGUAGES=test_languages)
@@ -269,6 +375,17 @@ class TestLanguageTaxonomy(TestTagTaxonomyMixin, TestCase):
         with pytest.raises(api.TagDoesNotExist):
             self.language_taxonomy.tag_for_external_id("xx")
 
+    def test_tags_for_values(self):
+        """
+        tags_for_values() gets or creates the Tags for many languages at once
+        """
+        tags = self.language_taxonomy.tags_for_values(["English", "Zulu", "Klingon", "en"])
+        assert {value: (tag.external_id, tag.value) for value, tag in tags.items()} == {
+            "english": ("en", "English"),
+            "zulu": ("zu", "Zulu"),
+        }
+        assert tags["english"] == self.english_tag
+
     @override_settings(LANGUAGES=[("fr", "Français")])
     def test_minimal_languages(self):
         """
@@ -4,6 +4,7 @@ Tests tagging rest api views
 from __future__ import annotations
 
 import json
+from unittest.mock import patch
 from urllib.parse import parse_qs, quote_plus, urlparse
 
 import ddt  # type: ignore[import]
@@ -19,10 +20,15 @@ from openedx_tagging.core.tagging.import_export.parsers import ParserFormat
 from openedx_tagging.core.tagging.models import ObjectTag, Tag, Taxonomy
 from openedx_tagging.core.tagging.models.system_defined import SystemDefinedTaxonomy
 from openedx_tagging.core.tagging.rest_api.paginators import TagsPagination
-from openedx_tagging.core.tagging.rules import can_change_object_tag_objectid, can_view_object_tag_objectid
+from openedx_tagging.core.tagging.rest_api.v1.views import ObjectTagView
+from openedx_tagging.core.tagging.rules import (
+    can_change_object_tag_objectid,
+    can_view_object_tag_objectid,
+    can_view_object_tag_objectids,
+)
 
 from .test_models import TestTagTaxonomyMixin
-from .utils import pretty_format_tags
+from .utils import TaggingFixtureMixin, pretty_format_tags
 
 User = get_user_model()
 
@@ -618,7 +624,7 @@ class TestTaxonomyViewSet(TestTaxonomyViewMixin):
             expected_data = import_export_api.export_tags(taxonomy, ParserFormat.CSV)
 
         assert response.headers['Content-Type'] == content_type
-        assert response.content == expected_data.encode("utf-8")
+        assert response.getvalue() == expected_data.encode("utf-8")
 
     @ddt.data(
         ("csv", "text/csv"),
@@ -645,7 +651,7 @@ class TestTaxonomyViewSet(TestTaxonomyViewMixin):
 
         assert response.headers['Content-Type'] == content_type
         assert response.headers['Content-Disposition'] == f'attachment; filename="{taxonomy.name}.{output_format}"'
-        assert response.content == expected_data.encode("utf-8")
+        assert response.getvalue() == expected_data.encode("utf-8")
 
     def test_export_taxonomy_invalid_param_output_format(self):
         """
@@ -754,8 +760,7 @@ class TestObjectTagViewSet(TestTagTaxonomyMixin, APITestCase):
         if status.is_success(expected_status):
             # Check the response, first converting from OrderedDict to regular dicts for simplicity.
             assert response.data == {
-                # In the future, this API may allow retrieving tags for multiple objects at once, so it's grouped by
-                # object ID.
+                # This API can also retrieve tags for multiple objects at once, so it's grouped by object ID.
                 object_id: {
                     "taxonomies": [
                         {
@@ -897,6 +902,138 @@ class TestObjectTagViewSet(TestTagTaxonomyMixin, APITestCase):
         response = self.client.get(url)
         assert response.status_code == status.HTTP_403_FORBIDDEN
 
+    def test_retrieve_object_tags_multiple(self):
+        """
+        Test retrieving the object tags of several objects at once, by list or by wildcard
+        """
+        api.tag_object(object_id="problem1", taxonomy=self.taxonomy, tags=["Mammalia", "Fungi"])
+        api.tag_object(object_id="problem2", taxonomy=self.user_taxonomy, tags=[self.user_1.username])
+        api.tag_object(object_id="problem2", taxonomy=self.taxonomy, tags=["Fungi"])
+        api.tag_object(object_id="html1", taxonomy=self.taxonomy, tags=["Fungi"])
+        self.client.force_authenticate(user=self.user_1)
+
+        def summarize(data):
+            return {
+                object_id: [
+                    (taxonomy["name"], [tag["value"] for tag in taxonomy["tags"]])
+                    for taxonomy in object_data["taxonomies"]
+                ]
+                for object_id, object_data in data.items()
+            }
+
+        response = self.client.get(OBJECT_TAGS_RETRIEVE_URL.format(object_id="problem2,problem1,problem3"))
+        assert response.status_code == status.HTTP_200_OK
+        assert summarize(response.data) == {
+            "problem1": [("Life on Earth", ["Mammalia", "Fungi"])],
+            "problem2": [("Life on Earth", ["Fungi"]), ("User Authors", ["test_user_1"])],
+            "problem3": [],  # Listed objects are always present in the response, even without tags
+        }
+
+        with self.assertNumQueries(1):
+            response = self.client.get(OBJECT_TAGS_RETRIEVE_URL.format(object_id="problem*"))
+        assert response.status_code == status.HTTP_200_OK
+        assert list(response.data) == ["problem1", "problem2"]
+
+        response = self.client.get(
+            OBJECT_TAGS_RETRIEVE_URL.format(object_id="problem*"), {"taxonomy": self.user_taxonomy.pk},
+        )
+        assert summarize(response.data) == {"problem2": [("User Authors", ["test_user_1"])]}
+
+    def test_retrieve_object_tags_cursor_paged(self):
+        """
+        Test retrieving the object tags of many objects a page of objects at a time
+        """
+        for object_id in ["problem3", "problem1", "problem2", "problem4", "html1"]:
+            api.tag_object(object_id=object_id, taxonomy=self.taxonomy, tags=["Mammalia", "Fungi"])
+        self.client.force_authenticate(user=self.user_1)
+        url = OBJECT_TAGS_RETRIEVE_URL.format(object_id="problem*")
+
+        response = self.client.get(url, {"pagination": "cursor", "page_size": 3})
+        assert response.status_code == status.HTTP_200_OK
+        assert list(response.data["results"]) == ["problem1", "problem2", "problem3"]
+        assert [tag["value"] for tag in response.data["results"]["problem1"]["taxonomies"][0]["tags"]] == [
+            "Mammalia", "Fungi",
+        ]
+        assert response.data["previous"] is None
+
+        response = self.client.get(response.data["next"])
+        assert response.status_code == status.HTTP_200_OK
+        assert list(response.data["results"]) == ["problem4"]
+        assert response.data["next"] is None
+
+        response = self.client.get(response.data["previous"])
+        assert list(response.data["results"]) == ["problem1", "problem2", "problem3"]
+
+        response = self.client.get(url, {"pagination": "pages"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_retrieve_object_tags_multiple_invalid(self):
+        """
+        Test that multiple object IDs are rejected when needed
+        """
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get(OBJECT_TAGS_RETRIEVE_URL.format(object_id="problem1,unauthorized_id"))
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        response = self.client.get(OBJECT_TAGS_RETRIEVE_URL.format(object_id="problem*1"))
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        # A wildcard must have a prefix
+        response = self.client.get(OBJECT_TAGS_RETRIEVE_URL.format(object_id="*"))
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        # Wildcards that match too many object tags must be paginated
+        api.tag_object(object_id="problem1", taxonomy=self.taxonomy, tags=["Mammalia", "Fungi"])
+        api.tag_object(object_id="problem2", taxonomy=self.taxonomy, tags=["Fungi"])
+        with patch.object(ObjectTagView, "max_wildcard_object_tags", 2):
+            response = self.client.get(OBJECT_TAGS_RETRIEVE_URL.format(object_id="problem*"))
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+            assert "pagination=cursor" in str(response.data)
+            response = self.client.get(OBJECT_TAGS_RETRIEVE_URL.format(object_id="problem*"), {"pagination": "cursor"})
+            assert response.status_code == status.HTTP_200_OK
+            assert list(response.data["results"]) == ["problem1", "problem2"]
+
+        response = self.client.put(
+            OBJECT_TAGS_UPDATE_URL.format(object_id="problem1,problem2"),
+            {"tagsData": [{"taxonomy": self.taxonomy.pk, "tags": ["Fungi"]}]},
+            format="json",
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_retrieve_object_tags_wildcard_permissions(self):
+        """
+        Test that the permissions of the objects matched by a wildcard are checked all at once
+        """
+        for object_id in ["problem1", "problem2", "problem3", "unauthorized_id"]:
+            api.tag_object(object_id=object_id, taxonomy=self.taxonomy, tags=["Fungi"])
+        self.client.force_authenticate(user=self.user_1)
+        checked_object_ids = []
+
+        def _view_objects_permission(_user, object_ids: tuple[str, ...]) -> bool:
+            checked_object_ids.append(object_ids)
+            return "unauthorized_id" not in object_ids
+
+        rules.set_perm("oel_tagging.view_objecttag_objectids", _view_objects_permission)
+        self.addCleanup(rules.set_perm, "oel_tagging.view_objecttag_objectids", can_view_object_tag_objectids)
+
+        response = self.client.get(OBJECT_TAGS_RETRIEVE_URL.format(object_id="problem*"))
+        assert response.status_code == status.HTTP_200_OK
+        assert checked_object_ids == [("problem1", "problem2", "problem3")]
+
+        response = self.client.get(OBJECT_TAGS_RETRIEVE_URL.format(object_id="unauthorized*"))
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        # The number of objects checked in one request is limited
+        with patch.object(ObjectTagView, "max_checked_objects", 2):
+            response = self.client.get(OBJECT_TAGS_RETRIEVE_URL.format(object_id="problem*"))
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+            assert "pagination=cursor" in str(response.data)
+            response = self.client.get(
+                OBJECT_TAGS_RETRIEVE_URL.format(object_id="problem*"), {"pagination": "cursor", "page_size": 2},
+            )
+            assert response.status_code == status.HTTP_200_OK
+            assert list(response.data["results"]) == ["problem1", "problem2"]
+
     @ddt.data(
         (None, status.HTTP_401_UNAUTHORIZED, 'html7.3'),
         ("user_1", status.HTTP_200_OK, 'html7'),
@@ -924,8 +1061,7 @@ class TestObjectTagViewSet(TestTagTaxonomyMixin, APITestCase):
         assert response.status_code == expected_status
         if status.is_success(expected_status):
             assert response.data == {
-                # In the future, this API may allow retrieving tags for multiple objects at once, so it's grouped by
-                # object ID.
+                # This API can also retrieve tags for multiple objects at once, so it's grouped by object ID.
                 object_id: {
                     "taxonomies": [
                         # The "Life on Earth" tags are excluded here...
@@ -1336,13 +1472,11 @@ class TestObjectTagCountsViewSet(TestTagTaxonomyMixin, APITestCase):
         assert "Wildcard matches are only supported if the * is at the end." in str(result.content)
 
 
-class TestTaxonomyTagsView(TestTaxonomyViewMixin):
+class TestTaxonomyTagsView(TaggingFixtureMixin, TestTaxonomyViewMixin):
     """
     Tests the list/create/update/delete tags of taxonomy view
     """
 
-    fixtures = ["tests/openedx_tagging/core/fixtures/tagging.yaml"]
-
     def setUp(self):
         self.small_taxonomy = Taxonomy.objects.get(name="Life on Earth")
         self.large_taxonomy = Taxonomy(name="Large Taxonomy")
@@ -1507,6 +1641,55 @@ class TestTaxonomyTagsView(TestTaxonomyViewMixin):
         ]
         assert next_data.get("current_page") == 2
 
+    def test_small_taxonomy_cursor_paged(self):
+        """
+        Test loading the tags of a small taxonomy a few at a time, with a cursor.
+        """
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get(self.small_taxonomy_url, {"pagination": "cursor", "page_size": 2})
+        assert response.status_code == status.HTTP_200_OK
+        data = response.data
+        assert pretty_format_tags(data["results"]) == [
+            "Archaea (None) (children: 3)",
+            "Bacteria (None) (children: 2)",
+        ]
+        assert data["previous"] is None
+        assert data["can_add_tag"] is True
+        assert "count" not in data
+
+        # Get the next page:
+        next_data = self.client.get(data["next"]).data
+        assert pretty_format_tags(next_data["results"]) == [
+            "Eukaryota (None) (children: 5 + 8)",
+        ]
+        assert next_data["next"] is None
+        # And back:
+        previous_data = self.client.get(next_data["previous"]).data
+        assert pretty_format_tags(previous_data["results"]) == pretty_format_tags(data["results"])
+
+    def test_small_taxonomy_cursor_paged_tree_order(self):
+        """
+        Test loading the child tags of a deep query with a cursor, where the
+        tags are sorted in tree order.
+        """
+        self.client.force_authenticate(user=self.staff)
+        # The full depth results don't fit in the threshold, so a single level is returned
+        query = {"parent_tag": "Eukaryota", "full_depth_threshold": 1, "pagination": "cursor", "page_size": 3}
+        values = []
+        url = self.small_taxonomy_url
+        while url:
+            response = self.client.get(url, query)
+            assert response.status_code == status.HTTP_200_OK
+            assert len(response.data["results"]) <= 3
+            values += [tag["value"] for tag in response.data["results"]]
+            url, query = response.data["next"], {}
+        assert values == ["Animalia", "Fungi", "Monera", "Plantae", "Protista"]
+
+    def test_invalid_pagination(self):
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get(self.small_taxonomy_url, {"pagination": "pages"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
     def test_small_search(self):
         """
         Test performing a search
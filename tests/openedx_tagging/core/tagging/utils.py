@@ -3,6 +3,28 @@ Useful utilities for testing tagging and taxonomy code.
 """
 from __future__ import annotations
 
+from io import StringIO
+
+from django.core.management import call_command
+
+
+class TaggingFixtureMixin:
+    """
+    Mixin for test cases that load the tagging fixture.
+
+    The fixture only has the taxonomies and tags themselves, so the data that's
+    derived from them (the lineage fields of the tags, and the TagAncestor,
+    TagSearchTrigram and TagCounts rows) is computed after it's loaded, the
+    same way as after loading any other fixture.
+    """
+
+    fixtures = ["tests/openedx_tagging/core/fixtures/tagging.yaml"]
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        call_command("recompute_tag_counts", stdout=StringIO())
+
 
 def pretty_format_tags(result, parent=True, external_id=False) -> list[str]:
     """